@@ -0,0 +1,180 @@
+"""Classes for the device-major apply plan of VRA network configurations.
+
+The plan (manifest) is written by the 'create' command next to the
+generated configuration files and consumed by the 'apply' command.
+
+Usage example:
+
+apply_plan = ApplyPlan.load("generated_vra_configs")
+for plan_device in apply_plan:
+    for plan_block in plan_device.blocks:
+        commands = apply_plan.read_block(plan_block)
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import pathlib
+from datetime import datetime
+from typing import Iterator, NamedTuple, Optional
+
+from Utils.ConfigWriter import ConfigWriter, WrittenFile
+
+
+class ExceptionApplyPlan(Exception):
+    """Exception class for reading and checking the apply plan."""
+
+    def __init__(self, *args):
+        self.message = args[0] if args else "Undefined error."
+
+    def __str__(self):
+        return f"Error: {self.message}"
+
+
+class PlanBlock(NamedTuple):
+    """Ordered command block (one VRA configuration file) of the network
+    device."""
+
+    vrf_name: str
+    vlan_id: int
+    path: str
+    sha256: str
+    lines: int
+
+
+class PlanDevice(NamedTuple):
+    """Network device with its ordered command blocks."""
+
+    device: str
+    device_type: Optional[str]
+    blocks: list[PlanBlock]
+
+    @property
+    def lines(self) -> int:
+        """Total number of commands of the network device."""
+        return sum(plan_block.lines for plan_block in self.blocks)
+
+
+class ApplyPlan:
+    """The class collects the generated configuration files device by device
+    and saves/loads them as a JSON manifest."""
+
+    __slots__ = ("config_dir", "environment", "created", "devices")
+
+    PLAN_FILE = "plan.json"
+    PLAN_VERSION = 1
+
+    def __init__(self, config_dir: str, environment: Optional[str] = None, created: Optional[str] = None) -> None:
+        """ApplyPlan class __init__."""
+
+        self.config_dir = pathlib.Path(config_dir)
+        self.environment = environment
+        self.created = created or datetime.now().isoformat(timespec="seconds")
+        self.devices: dict[str, PlanDevice] = {}
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self.devices)} network devices"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def __iter__(self) -> Iterator[PlanDevice]:
+        return iter(self.devices.values())
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    @property
+    def plan_path(self) -> pathlib.Path:
+        """Path to the manifest file."""
+        return self.config_dir / self.PLAN_FILE
+
+    @property
+    def vlan_ids(self) -> list[int]:
+        """Sorted list of the vlan ids of all command blocks."""
+        return sorted({plan_block.vlan_id for plan_device in self for plan_block in plan_device.blocks})
+
+    def add_device(self, device: str, device_type: Optional[str] = None) -> PlanDevice:
+        """The method adds the network device to the plan keeping the order of
+        addition."""
+
+        if device not in self.devices:
+            self.devices[device] = PlanDevice(device, device_type, [])
+        return self.devices[device]
+
+    def add_block(self, device: str, vrf_name: str, vlan_id: int, written_file: WrittenFile) -> PlanBlock:
+        """The method adds the written configuration file to the device
+        commands."""
+
+        plan_block = PlanBlock(
+            vrf_name,
+            vlan_id,
+            pathlib.Path(written_file.path).relative_to(self.config_dir).as_posix(),
+            written_file.sha256,
+            written_file.lines,
+        )
+        self.add_device(device).blocks.append(plan_block)
+        return plan_block
+
+    def save(self) -> WrittenFile:
+        """The method atomically writes the manifest into the configuration
+        directory."""
+
+        plan_d = {
+            "version": self.PLAN_VERSION,
+            "environment": self.environment,
+            "created": self.created,
+            "devices": [
+                {
+                    "device": plan_device.device,
+                    "device_type": plan_device.device_type,
+                    "blocks": [plan_block._asdict() for plan_block in plan_device.blocks],
+                }
+                for plan_device in self
+            ],
+        }
+
+        return ConfigWriter().write(self.plan_path, [json.dumps(plan_d, indent=2), "\n"])
+
+    @classmethod
+    def load(cls, config_dir: str) -> "ApplyPlan":
+        """The method reads the manifest from the configuration directory."""
+
+        plan_path = pathlib.Path(config_dir) / cls.PLAN_FILE
+        try:
+            with open(plan_path, "r", encoding="utf-8") as plan_file:
+                plan_d = json.load(plan_file)
+        except FileNotFoundError:
+            raise ExceptionApplyPlan(f"The apply plan '{plan_path}' was not found. Run the 'create' command first.")
+        except json.JSONDecodeError as json_error:
+            raise ExceptionApplyPlan(f"The apply plan '{plan_path}' is damaged: {json_error}.")
+
+        if plan_d.get("version") != cls.PLAN_VERSION:
+            raise ExceptionApplyPlan(f"Unsupported apply plan version {plan_d.get('version')}.")
+
+        apply_plan = cls(config_dir, plan_d.get("environment"), plan_d.get("created"))
+        for plan_device_d in plan_d.get("devices", []):
+            plan_device = apply_plan.add_device(plan_device_d["device"], plan_device_d.get("device_type"))
+            for plan_block_d in plan_device_d.get("blocks", []):
+                plan_device.blocks.append(PlanBlock(**plan_block_d))
+
+        return apply_plan
+
+    def read_block(self, plan_block: PlanBlock) -> list[str]:
+        """The method reads the command block, checks its content hash and
+        returns the commands."""
+
+        block_path = self.config_dir / plan_block.path
+        try:
+            block_bytes = block_path.read_bytes()
+        except FileNotFoundError:
+            raise ExceptionApplyPlan(f"The configuration file '{block_path}' from the apply plan was not found.")
+
+        if hashlib.sha256(block_bytes).hexdigest() != plan_block.sha256:
+            raise ExceptionApplyPlan(f"The configuration file '{block_path}' was changed after the plan was created.")
+
+        return block_bytes.decode("utf-8").splitlines()
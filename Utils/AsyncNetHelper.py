@@ -0,0 +1,83 @@
+"""Asyncio counterpart of NetHelper.
+
+The methods return the same parsed structures as NetHelper; the blocking
+work runs in the thread pool of the ThreadedSSHConnect connection. The
+NetHelper is bound to the current netmiko connection on every call, so the
+helper may be created before connect() and survives a reconnect.
+
+Usage example:
+
+async def discover(netdev, vlan_id):
+    async with ThreadedSSHConnect(netdev, "user", "password") as ssh:
+        net_helper = AsyncNetHelper(ssh)
+        return await net_helper.get_intf_in_scope_by_stp_instance(vlan_id)
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+from typing import Optional
+
+from Utils.NetHelper import NetHelper
+from Utils.ThreadedSSHConnect import ThreadedSSHConnect
+
+
+class AsyncNetHelper:
+    """The class with awaitable methods for getting data from network
+    equipment."""
+
+    __slots__ = ("async_ssh", "verbose", "net_helper_kwargs", "__net_helper")
+
+    def __init__(self, async_ssh: ThreadedSSHConnect, verbose: Optional[bool] = False, **net_helper_kwargs) -> None:
+        """AsyncNetHelper class __init__.
+
+        net_helper_kwargs are passed to NetHelper (pipelining,
+        parse_pool, nxos_json).
+        """
+
+        self.async_ssh = async_ssh
+        self.verbose = verbose
+        self.net_helper_kwargs = net_helper_kwargs
+        self.__net_helper: Optional[NetHelper] = None
+
+    @property
+    def net_helper(self) -> NetHelper:
+        """NetHelper of the current connection, created again after a
+        reconnect (the per-session caches belong to the old session)."""
+
+        ssh_conn = self.async_ssh.connection
+        if self.__net_helper is None or self.__net_helper.ssh_conn is not ssh_conn:
+            self.__net_helper = NetHelper(ssh_conn, verbose=self.verbose, **self.net_helper_kwargs)
+        return self.__net_helper
+
+    def __repr__(self):
+        return f"{self.__class__}: {self.async_ssh.netdev_host}"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    async def get_intf_in_scope_by_description(self, scope_name: str) -> dict[str, dict[str | list[int]]]:
+        return await self.async_ssh.run(self.net_helper.get_intf_in_scope_by_description, scope_name)
+
+    async def get_intf_in_scopes_by_description(self, scope_names: list[str]) -> dict[str, dict[str, dict]]:
+        return await self.async_ssh.run(self.net_helper.get_intf_in_scopes_by_description, scope_names)
+
+    async def get_intf_in_scope_by_stp_instance(self, vlan_id: int) -> dict[str, dict[str | list[int]]]:
+        return await self.async_ssh.run(self.net_helper.get_intf_in_scope_by_stp_instance, vlan_id)
+
+    async def get_intf_in_scopes_by_stp_instance(self, scope_vlan_ids: dict[str, int]) -> dict[str, dict[str, dict]]:
+        return await self.async_ssh.run(self.net_helper.get_intf_in_scopes_by_stp_instance, scope_vlan_ids)
+
+    async def get_intf_in_scopes_by_stp_vlans(self, scope_vlan_ids: dict[str, list[int]]) -> dict[str, dict[str, dict]]:
+        return await self.async_ssh.run(self.net_helper.get_intf_in_scopes_by_stp_vlans, scope_vlan_ids)
+
+    async def get_cdp_neigbors_by_intf(self, intf: str) -> list[str]:
+        return await self.async_ssh.run(self.net_helper.get_cdp_neigbors_by_intf, intf)
+
+    async def get_ip_interfaces_status(self, intf_name: str) -> list:
+        return await self.async_ssh.run(self.net_helper.get_ip_interfaces_status, intf_name)
+
+    async def get_stp_status(self, vlan_id: str) -> list:
+        return await self.async_ssh.run(self.net_helper.get_stp_status, vlan_id)
@@ -0,0 +1,215 @@
+"""Persistent SSH transport to a jump host (bastion).
+
+One SSH connection to the bastion is shared by all network device
+sessions of the process: every device session is a 'direct-tcpip'
+channel multiplexed over it and passed to netmiko as the socket, so a
+device connect costs one channel open instead of a TCP and SSH handshake
+to the bastion.
+
+Usage example:
+
+bastion = get_bastion_tunnel("jump.example.com", username="user", password="password")
+with SSHConnect("MS-TEST-0001", "user", "password", bastion=bastion) as ssh_conn:
+    print(ssh_conn.send_command("sh clock"))
+
+The bastion host key must be known (system known_hosts or known_hosts);
+an unknown key is trusted only with accept_new_host_key=True and is then
+saved to known_hosts.
+
+Test against a local sshd (AllowTcpForwarding yes):
+
+bastion = get_bastion_tunnel("127.0.0.1", port=22, username="user", password="password", known_hosts="known_hosts")
+channel = bastion.open_channel("127.0.0.1", 22)
+print(channel.recv(64))  # SSH-2.0-OpenSSH_...
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import pathlib
+import threading
+from typing import Optional
+
+import paramiko
+
+from Utils.NetTracer import tracer
+from Utils.zlogger import zLogger
+
+
+class BastionError(Exception):
+    """An exception is generated when the bastion or the channel through it
+    is not available."""
+
+    def __init__(self, *args):
+        self.message = args[0] if args else "Undefined error."
+
+    def __str__(self):
+        return f"Error: {self.message}"
+
+
+class BastionTunnel:
+    """The class keeps one SSH transport to the bastion and opens direct-tcpip
+    channels to the network devices over it."""
+
+    __slots__ = (
+        "host",
+        "port",
+        "username",
+        "__password",
+        "timeout",
+        "keepalive",
+        "known_hosts",
+        "accept_new_host_key",
+        "channels_opened",
+        "logger",
+        "__client",
+        "__lock",
+    )
+
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: Optional[str] = None,
+        port: Optional[int] = 22,
+        timeout: Optional[float] = 10.0,
+        keepalive: Optional[int] = 30,
+        known_hosts: Optional[str | pathlib.Path] = None,
+        accept_new_host_key: Optional[bool] = False,
+    ) -> None:
+        """BastionTunnel class __init__.
+
+        known_hosts is loaded in addition to the system known_hosts; an
+        unknown bastion key is rejected unless accept_new_host_key is set.
+        """
+
+        self.host = host
+        self.port = port
+        self.username = username
+        self.__password = password
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self.known_hosts = pathlib.Path(known_hosts) if known_hosts else None
+        self.accept_new_host_key = accept_new_host_key
+        self.channels_opened = 0
+        self.logger = zLogger()
+        self.__client: Optional[paramiko.SSHClient] = None
+        self.__lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__}: {self.username}@{self.host}:{self.port}"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    @property
+    def is_active(self) -> bool:
+        return (
+            self.__client is not None
+            and self.__client.get_transport() is not None
+            and self.__client.get_transport().is_active()
+        )
+
+    def _connect(self) -> None:
+        """Establishes the SSH connection to the bastion (password, agent or
+        key files)."""
+
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        if self.known_hosts is not None:
+            if self.accept_new_host_key and not self.known_hosts.exists():
+                # Файл для сохранения принятого ключа бастиона
+                self.known_hosts.touch(mode=0o600)
+            try:
+                client.load_host_keys(str(self.known_hosts))
+            except OSError as error:
+                raise BastionError(f"The known hosts file '{self.known_hosts}' could not be read: {error}") from None
+
+        # Неизвестный ключ бастиона принимается только явно (через бастион идут все подключения к устройствам)
+        if self.accept_new_host_key:
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        else:
+            client.set_missing_host_key_policy(paramiko.RejectPolicy())
+
+        with tracer.span(self.host, "bastion connect", stage="login"):
+            try:
+                client.connect(
+                    self.host,
+                    port=self.port,
+                    username=self.username,
+                    password=self.__password,
+                    timeout=self.timeout,
+                    banner_timeout=self.timeout,
+                    auth_timeout=self.timeout,
+                    allow_agent=True,
+                    look_for_keys=True,
+                )
+            except (OSError, paramiko.SSHException) as error:
+                raise BastionError(f"SSH connection with the bastion {self.host}:{self.port} failed: {error}") from None
+
+        client.get_transport().set_keepalive(self.keepalive)
+        self.__client = client
+        self.logger.log("file").info(f"SSH connection with the bastion {self.host}:{self.port} established.")
+
+    def open_channel(self, dest_host: str, dest_port: Optional[int] = 22) -> paramiko.Channel:
+        """Opens the direct-tcpip channel to the network device, the bastion
+        connection is (re)established on demand."""
+
+        with self.__lock:
+            if not self.is_active:
+                self._connect()
+            transport = self.__client.get_transport()
+
+        with tracer.span(dest_host, "bastion channel", stage="login"):
+            try:
+                channel = transport.open_channel(
+                    "direct-tcpip", (dest_host, dest_port), ("127.0.0.1", 0), timeout=self.timeout
+                )
+            except (OSError, paramiko.SSHException) as error:
+                raise BastionError(f"Channel to {dest_host}:{dest_port} through {self.host} failed: {error}") from None
+
+        self.channels_opened += 1
+        return channel
+
+    def close(self) -> None:
+        """Closes the bastion connection and all its channels."""
+
+        with self.__lock:
+            if self.__client is not None:
+                self.__client.close()
+                self.__client = None
+                self.logger.log("file").info(f"SSH connection with the bastion {self.host}:{self.port} closed.")
+
+
+# Туннели процесса: один на бастион, используются и в create, и в apply
+_bastion_tunnels: dict[tuple[str, int, str], BastionTunnel] = {}
+_bastion_tunnels_lock = threading.Lock()
+
+
+def get_bastion_tunnel(
+    host: str, username: str, password: Optional[str] = None, port: Optional[int] = 22, **kwargs
+) -> BastionTunnel:
+    """Returns the shared tunnel to the bastion (created on the first
+    call)."""
+
+    with _bastion_tunnels_lock:
+        tunnel_key = (host, port, username)
+        if tunnel_key not in _bastion_tunnels:
+            _bastion_tunnels[tunnel_key] = BastionTunnel(host, username, password, port=port, **kwargs)
+        return _bastion_tunnels[tunnel_key]
+
+
+def parse_bastion(bastion: str) -> tuple[str, int]:
+    """'host[:port]' -> (host, port)."""
+
+    host, _, port = bastion.partition(":")
+    return host, int(port) if port else 22
@@ -0,0 +1,200 @@
+"""Per-host circuit breaker for the SSH connections.
+
+Before a connection the host port is checked with a short TCP connect; a
+host that failed is 'open' and is skipped without waiting for the netmiko
+timeout. After reset_timeout the host becomes 'half_open' and one attempt
+is allowed: a success closes the breaker, a failure opens it again. The
+states can be saved to a JSON file and loaded by the next run.
+
+Usage example:
+
+from Utils.CircuitBreaker import circuit_breaker
+
+circuit_breaker.enabled = True
+circuit_breaker.load("breaker.json")
+circuit_breaker.check("MS-TEST-0001", 22)  # raises HostUnreachable
+...
+circuit_breaker.print_summary(console)
+circuit_breaker.save()
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import json
+import pathlib
+import socket
+import threading
+import time
+from typing import Final, Optional
+
+from Utils.ConfigWriter import ConfigWriter
+
+CLOSED: Final = "closed"
+OPEN: Final = "open"
+HALF_OPEN: Final = "half_open"
+
+
+class HostUnreachable(Exception):
+    """An exception is generated when the host is skipped by the circuit
+    breaker or the connection to it failed."""
+
+    def __init__(self, *args):
+        self.message = args[0] if args else "Undefined error."
+
+    def __str__(self):
+        return f"Error: {self.message}"
+
+
+class CircuitBreaker:
+    """The class tracks connection failures per host and skips the hosts
+    which are known to be down."""
+
+    __slots__ = (
+        "enabled",
+        "failure_threshold",
+        "reset_timeout",
+        "precheck_timeout",
+        "state_file",
+        "hosts",
+        "skipped",
+        "__lock",
+    )
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = False,
+        failure_threshold: Optional[int] = 1,
+        reset_timeout: Optional[float] = 300.0,
+        precheck_timeout: Optional[float] = 2.0,
+    ) -> None:
+        """CircuitBreaker class __init__."""
+
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.precheck_timeout = precheck_timeout
+        self.state_file: Optional[pathlib.Path] = None
+        # host -> {"state": ..., "failures": ..., "opened_at": ..., "error": ...}
+        self.hosts: dict[str, dict] = {}
+        # host -> причина пропуска в текущем запуске
+        self.skipped: dict[str, str] = {}
+        self.__lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self.hosts)} hosts"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def load(self, state_file: str | pathlib.Path) -> None:
+        """Loads the host states saved by the previous run."""
+
+        self.state_file = pathlib.Path(state_file)
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as state_json:
+                self.hosts = json.load(state_json)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.hosts = {}
+
+    def save(self) -> None:
+        """Atomically writes the host states if the state file is set."""
+
+        if self.enabled and self.state_file is not None:
+            ConfigWriter().write(self.state_file, [json.dumps(self.hosts, indent=2, sort_keys=True)])
+
+    def _state(self, host: str) -> str:
+        """Returns the host state, an open breaker turns half-open after the
+        reset timeout."""
+
+        host_d = self.hosts.get(host)
+        if host_d is None:
+            return CLOSED
+        if host_d["state"] == OPEN and time.time() - host_d["opened_at"] >= self.reset_timeout:
+            host_d["state"] = HALF_OPEN
+        return host_d["state"]
+
+    def tcp_precheck(self, host: str, port: int) -> None:
+        """Checks that the host accepts TCP connections on the port."""
+
+        try:
+            with socket.create_connection((host, port), timeout=self.precheck_timeout):
+                pass
+        except OSError as error:
+            raise HostUnreachable(
+                f"{host}:{port} TCP pre-check failed ({error.__class__.__name__}: {error})."
+            ) from None
+
+    def check(self, host: str, port: Optional[int] = 22, tcp_precheck: Optional[bool] = True) -> None:
+        """Raises HostUnreachable if the host is open or does not pass the TCP
+        pre-check; does nothing when the breaker is turned off."""
+
+        if not self.enabled:
+            return
+
+        # Состояние читается и причина пропуска пишется под блокировкой: потоки прогрева меняют hosts
+        with self.__lock:
+            reason = None
+            if self._state(host) == OPEN:
+                host_d = self.hosts[host]
+                reason = f"circuit open since {time.ctime(host_d['opened_at'])}: {host_d['error']}"
+                self.skipped[host] = reason
+        if reason is not None:
+            raise HostUnreachable(f"{host} is skipped, {reason.rstrip('.')}.")
+
+        if tcp_precheck:
+            try:
+                self.tcp_precheck(host, port)
+            except HostUnreachable as unreachable:
+                self.record_failure(host, unreachable.message)
+                raise
+
+    def record_success(self, host: str) -> None:
+        """Closes the breaker of the host."""
+
+        if not self.enabled:
+            return
+
+        with self.__lock:
+            self.hosts.pop(host, None)
+
+    def record_failure(self, host: str, error: str) -> None:
+        """Counts the failure, the breaker opens after failure_threshold
+        consecutive failures (or at once in the half-open state)."""
+
+        if not self.enabled:
+            return
+
+        with self.__lock:
+            state = self._state(host)
+            host_d = self.hosts.setdefault(host, {"state": CLOSED, "failures": 0, "opened_at": 0.0, "error": ""})
+            host_d["failures"] += 1
+            host_d["error"] = error
+            if state == HALF_OPEN or host_d["failures"] >= self.failure_threshold:
+                host_d["state"] = OPEN
+                host_d["opened_at"] = time.time()
+            self.skipped[host] = error
+
+    def print_summary(self, console) -> None:
+        """Prints the devices skipped in this run to the rich console."""
+
+        if not self.skipped:
+            return
+
+        from rich import box
+        from rich.table import Table
+
+        table = Table(title="Skipped devices", box=box.HEAVY_EDGE, show_header=True, header_style="bold")
+        for name in ("Device", "State", "Failures", "Reason"):
+            table.add_column(name, justify="left")
+
+        for host, reason in sorted(self.skipped.items()):
+            host_d = self.hosts.get(host, {})
+            table.add_row(host, host_d.get("state", CLOSED), str(host_d.get("failures", 0)), reason)
+        console.print(table)
+
+
+# Общий предохранитель для всех SSH-подключений (выключен по умолчанию)
+circuit_breaker: CircuitBreaker = CircuitBreaker()
@@ -0,0 +1,136 @@
+"""Class for streaming generated configuration chunks into files.
+
+Usage example:
+
+config_writer = ConfigWriter(fsync="file")
+written_file = config_writer.write("generated_vra_configs/TEST-VRA100/MS-TEST-0001.config", vra.iter_config("MS-TEST-0001"))
+print(written_file.sha256, written_file.lines)
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import pathlib
+import tempfile
+from typing import Final, Iterable, Literal, NamedTuple, Optional
+
+
+def _umask_file_mode() -> int:
+    """Returns the mode a new file gets from open() under the current
+    umask."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Права файлов по умолчанию (mkstemp создает файл с правами 0600); umask читается один раз при импорте
+DEFAULT_FILE_MODE: Final = _umask_file_mode()
+
+
+class WrittenFile(NamedTuple):
+    """Information about the written configuration file."""
+
+    path: str
+    sha256: str
+    lines: int
+    size: int
+
+
+class ConfigWriter:
+    """The class streams text chunks into a buffered temporary file and
+    atomically renames it to the destination file.
+
+    Fsync policy:
+        never  - rely on the OS page cache (fastest);
+        file   - fsync every file before the rename;
+        always - fsync every file and its directory after the rename.
+    """
+
+    __slots__ = ("fsync", "buffer_size")
+
+    FSYNC_POLICIES = ("never", "file", "always")
+
+    def __init__(
+        self,
+        fsync: Optional[Literal["never", "file", "always"]] = "never",
+        buffer_size: Optional[int] = 1024 * 1024,
+    ) -> None:
+        """ConfigWriter class __init__."""
+
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"{fsync} - incorrect fsync policy, use one of {', '.join(self.FSYNC_POLICIES)}.")
+
+        self.fsync = fsync
+        self.buffer_size = buffer_size
+
+    def __repr__(self):
+        return f"{self.__class__}: fsync={self.fsync}"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    @staticmethod
+    def _fsync_dir(dir_path: pathlib.Path) -> None:
+        """The method flushes the directory entry to the disk (not supported
+        on Windows)."""
+
+        try:
+            dir_fd = os.open(dir_path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def write(self, path: str | pathlib.Path, chunks: Iterable[str], mode: Optional[int] = None) -> WrittenFile:
+        """The method writes text chunks into the file through one buffered
+        handle and returns the content hash, line count and size.
+
+        The file gets the mode (by default the umask-derived mode of a file
+        created by open()).
+        """
+
+        dest_path = pathlib.Path(path)
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=dest_path.parent, prefix=f".{dest_path.name}.", suffix=".tmp")
+
+        content_hash = hashlib.sha256()
+        lines = 0
+        size = 0
+        last_byte = b"\n"
+
+        try:
+            with open(tmp_fd, "wb", buffering=self.buffer_size) as config_file_dest:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    chunk_bytes = chunk.encode("utf-8")
+                    config_file_dest.write(chunk_bytes)
+                    content_hash.update(chunk_bytes)
+                    lines += chunk_bytes.count(b"\n")
+                    size += len(chunk_bytes)
+                    last_byte = chunk_bytes[-1:]
+
+                if self.fsync != "never":
+                    config_file_dest.flush()
+                    os.fsync(config_file_dest.fileno())
+
+            os.chmod(tmp_path, DEFAULT_FILE_MODE if mode is None else mode)
+            os.replace(tmp_path, dest_path)
+
+        except BaseException:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        if self.fsync == "always":
+            self._fsync_dir(dest_path.parent)
+
+        # Последняя строка без символа перевода строки тоже считается
+        if last_byte != b"\n":
+            lines += 1
+
+        return WrittenFile(str(dest_path), content_hash.hexdigest(), lines, size)
@@ -0,0 +1,128 @@
+"""Background SSH connections to the devices the crawler will visit next.
+
+The discovery learns CDP neighbors long before it processes them; the
+prewarmer starts DNS, TCP, authentication and prompt detection for them
+in a bounded thread pool, so the session is ready when the crawler gets
+there. Sessions which were not taken are closed by close().
+
+Usage example:
+
+prewarmer = ConnectionPrewarmer(lambda host: SSHConnect(host, "user", "password"), max_sessions=4)
+prewarmer.warm("MS-TEST-0002")
+...
+with prewarmer.session("MS-TEST-0002") as ssh_conn:
+    print(ssh_conn.send_command("sh clock"))
+prewarmer.close()
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import contextlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
+
+from Utils.NetTracer import tracer
+
+
+class ConnectionPrewarmer:
+    """The class keeps up to max_sessions SSH sessions connecting or waiting
+    for the crawler."""
+
+    __slots__ = ("connect_factory", "max_sessions", "hits", "misses", "__executor", "__sessions", "__lock")
+
+    def __init__(self, connect_factory: Callable, max_sessions: Optional[int] = 4) -> None:
+        """ConnectionPrewarmer class __init__.
+
+        connect_factory(host) returns a not connected SSHConnect.
+        """
+
+        self.connect_factory = connect_factory
+        self.max_sessions = max_sessions
+        self.hits = 0
+        self.misses = 0
+        self.__executor: Optional[ThreadPoolExecutor] = None
+        # host -> Future[(SSHConnect, ssh_conn)]
+        self.__sessions: dict[str, Future] = {}
+        self.__lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self.__sessions)} sessions"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def _connect(self, host: str) -> tuple:
+        ssh = self.connect_factory(host)
+        with tracer.span(host, "prewarm", stage="login"):
+            ssh_conn = ssh.connect()
+        return ssh, ssh_conn
+
+    def warm(self, host: str) -> None:
+        """Starts connecting to the host in the background if there is a free
+        slot."""
+
+        if self.max_sessions < 1:
+            return
+
+        with self.__lock:
+            if host in self.__sessions or len(self.__sessions) >= self.max_sessions:
+                return
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=self.max_sessions, thread_name_prefix="prewarm")
+            self.__sessions[host] = self.__executor.submit(self._connect, host)
+
+    def take(self, host: str) -> tuple:
+        """Returns (SSHConnect, ssh_conn) for the host: the warm session or a
+        new connection. Connection errors are raised here."""
+
+        with self.__lock:
+            session_future = self.__sessions.pop(host, None)
+
+        if session_future is None:
+            self.misses += 1
+            return self._connect(host)
+
+        self.hits += 1
+        return session_future.result()
+
+    @contextlib.contextmanager
+    def session(self, host: str) -> Iterator:
+        """Context manager with the connected session, the session is closed
+        on exit."""
+
+        ssh, ssh_conn = self.take(host)
+        try:
+            yield ssh_conn
+        finally:
+            ssh.disconnect()
+
+    def close(self) -> None:
+        """Closes the sessions which were not taken by the crawler."""
+
+        with self.__lock:
+            sessions, self.__sessions = self.__sessions, {}
+
+        for session_future in sessions.values():
+            if session_future.cancel():
+                continue
+            try:
+                ssh, _ = session_future.result()
+            except Exception:
+                # Ошибка подключения уже учтена предохранителем, сессию закрывать не нужно
+                continue
+            ssh.disconnect()
+
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
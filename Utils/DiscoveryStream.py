@@ -0,0 +1,106 @@
+"""JSONL stream of the discovery results.
+
+Every network device found by the crawler is appended to the file as one
+JSON line as soon as its interfaces are collected, so the discovery does
+not keep the whole topology in memory. The rendering reads the records
+back one device at a time.
+
+Usage example:
+
+with DiscoveryStream(".vra_cache/discovery.jsonl").open_writer() as discovery_stream:
+    discovery_stream.write("MS-TEST-0001", "cisco_ios", {"Gi1/0/1": {"intf_mode": "trunk", "allowed_vlans": [10]}})
+
+for record in DiscoveryStream(".vra_cache/discovery.jsonl"):
+    print(record.device, record.device_type, len(record.interfaces))
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import json
+import pathlib
+from typing import Iterator, NamedTuple, Optional, TextIO
+
+
+class DiscoveryStreamError(Exception):
+    """An exception is generated when the discovery stream file is
+    damaged."""
+
+    def __init__(self, *args):
+        self.message = args[0] if args else "Undefined error."
+
+    def __str__(self):
+        return f"Error: {self.message}"
+
+
+class DiscoveryRecord(NamedTuple):
+    """Discovery result of one network device."""
+
+    device: str
+    device_type: Optional[str]
+    interfaces: dict[str, dict]
+
+
+class DiscoveryStream:
+    """The class appends the discovery records to the JSONL file and iterates
+    over them."""
+
+    __slots__ = ("stream_path", "records_written", "__stream_file")
+
+    def __init__(self, stream_path: str | pathlib.Path) -> None:
+        """DiscoveryStream class __init__."""
+
+        self.stream_path = pathlib.Path(stream_path)
+        self.records_written = 0
+        self.__stream_file: Optional[TextIO] = None
+
+    def __repr__(self):
+        return f"{self.__class__}: {self.stream_path}"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def open_writer(self) -> "DiscoveryStream":
+        """Truncates the file and prepares it for the records of the new
+        discovery."""
+
+        self.stream_path.parent.mkdir(parents=True, exist_ok=True)
+        self.__stream_file = open(self.stream_path, "w", encoding="utf-8")
+        self.records_written = 0
+        return self
+
+    def write(self, device: str, device_type: Optional[str], interfaces: dict[str, dict]) -> None:
+        """Appends the device record, the line is flushed at once so the
+        collected data survives a crash of the crawler."""
+
+        record = DiscoveryRecord(device, device_type, interfaces)
+        self.__stream_file.write(json.dumps(record._asdict(), separators=(",", ":")) + "\n")
+        self.__stream_file.flush()
+        self.records_written += 1
+
+    def close(self) -> None:
+        if self.__stream_file is not None:
+            self.__stream_file.close()
+            self.__stream_file = None
+
+    def __iter__(self) -> Iterator[DiscoveryRecord]:
+        """Reads the records one by one, only the current line is kept in
+        memory."""
+
+        with open(self.stream_path, "r", encoding="utf-8") as stream_file:
+            for line_num, line in enumerate(stream_file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield DiscoveryRecord(**json.loads(line))
+                except (json.JSONDecodeError, TypeError) as error:
+                    raise DiscoveryStreamError(f"'{self.stream_path}' line {line_num} is damaged: {error}.") from None
@@ -0,0 +1,128 @@
+"""Content-addressed cache of the generated configuration files.
+
+A render key (hash of the template sources, render inputs and generator
+source code) points to the content hash of the generated file; the files
+themselves are stored once per content hash and copied into the
+configuration directory (a copy, so editing a generated file never
+changes the cached object). The object is hashed again before every
+reuse.
+
+Usage example:
+
+generation_cache = GenerationCache(".vra_cache")
+written_file = generation_cache.materialize(render_key, conf_path)
+if written_file is None:
+    written_file = config_writer.write(conf_path, vra.iter_config(net_dev))
+    generation_cache.store(render_key, written_file)
+generation_cache.save()
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import pathlib
+from typing import Optional
+
+from Utils.ConfigWriter import ConfigWriter, WrittenFile
+
+
+class GenerationCache:
+    """The class maps render keys to content-addressed configuration
+    files."""
+
+    __slots__ = ("cache_dir", "index", "hits", "misses", "__index_changed")
+
+    INDEX_FILE = "index.json"
+    OBJECTS_DIR = "objects"
+
+    def __init__(self, cache_dir: str) -> None:
+        """GenerationCache class __init__."""
+
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+        self.__index_changed = False
+
+        # render key -> {"sha256": ..., "lines": ..., "size": ...}
+        self.index: dict[str, dict] = {}
+        try:
+            with open(self.cache_dir / self.INDEX_FILE, "r", encoding="utf-8") as index_file:
+                self.index = json.load(index_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self.index)} entries"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def _object_path(self, sha256: str) -> pathlib.Path:
+        """Path to the stored file with the given content hash."""
+        return self.cache_dir / self.OBJECTS_DIR / sha256[:2] / sha256
+
+    def _read_object(self, sha256: str) -> Optional[str]:
+        """The method returns the content of the stored file or None if it is
+        missing or its content does not match the hash."""
+
+        try:
+            object_bytes = self._object_path(sha256).read_bytes()
+        except OSError:
+            return None
+        if hashlib.sha256(object_bytes).hexdigest() != sha256:
+            return None
+        try:
+            return object_bytes.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+    def materialize(self, render_key: str, dest_path: str | pathlib.Path) -> Optional[WrittenFile]:
+        """The method puts a copy of the previously generated file into the
+        destination path. Returns None if there is no usable cache entry."""
+
+        cache_entry = self.index.get(render_key)
+        if cache_entry:
+            object_text = self._read_object(cache_entry["sha256"])
+            if object_text is not None:
+                written_file = ConfigWriter().write(dest_path, [object_text])
+                self.hits += 1
+                return written_file
+
+            # Запись в кэше есть, но файл поврежден, изменен или удален
+            del self.index[render_key]
+            self.__index_changed = True
+
+        self.misses += 1
+        return None
+
+    def store(self, render_key: str, written_file: WrittenFile) -> None:
+        """The method stores a copy of the written file under its content hash
+        (once for identical outputs) and remembers the render key."""
+
+        object_path = self._object_path(written_file.sha256)
+
+        # Такой же файл уже есть в кэше и не поврежден - храним его один раз
+        if self._read_object(written_file.sha256) is None:
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            ConfigWriter().write(object_path, [pathlib.Path(written_file.path).read_bytes().decode("utf-8")])
+
+        self.index[render_key] = {
+            "sha256": written_file.sha256,
+            "lines": written_file.lines,
+            "size": written_file.size,
+        }
+        self.__index_changed = True
+
+    def save(self) -> None:
+        """The method atomically writes the cache index if it was changed."""
+
+        if not self.__index_changed:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        ConfigWriter().write(self.cache_dir / self.INDEX_FILE, [json.dumps(self.index, sort_keys=True)])
+        self.__index_changed = False
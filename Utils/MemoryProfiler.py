@@ -0,0 +1,158 @@
+"""Opt-in tracemalloc based memory profiler for the pipeline stages.
+
+Usage example:
+
+memory_profiler = MemoryProfiler(enabled=True, budget_mb=512)
+memory_profiler.start()
+...
+memory_profiler.checkpoint("discovery")
+...
+memory_profiler.checkpoint("render and write")
+memory_profiler.stop()
+memory_profiler.print_summary(console)
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import tracemalloc
+from typing import NamedTuple, Optional
+
+
+class MemoryBudgetExceeded(Exception):
+    """An exception is generated when the peak memory of the stage exceeds
+    the configured budget."""
+
+    def __init__(self, *args):
+        self.message = args[0] if args else "Undefined error."
+
+    def __str__(self):
+        return f"Error: {self.message}"
+
+
+class StageMemory(NamedTuple):
+    """Memory statistics of one pipeline stage."""
+
+    stage: str
+    peak: int
+    retained: int
+    retained_delta: int
+    top_sites: list[tuple[str, int]]
+
+
+class MemoryProfiler:
+    """The class takes tracemalloc snapshots at the stage boundaries and
+    reports the peak and retained memory with the top allocation sites."""
+
+    __slots__ = ("enabled", "budget", "top_n", "frames", "stages", "__last_snapshot", "__last_retained")
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = False,
+        budget_mb: Optional[float] = None,
+        top_n: Optional[int] = 5,
+        frames: Optional[int] = 1,
+    ) -> None:
+        """MemoryProfiler class __init__."""
+
+        self.enabled = enabled
+        self.budget = int(budget_mb * 1024 * 1024) if budget_mb else None
+        self.top_n = top_n
+        self.frames = frames
+        self.stages: list[StageMemory] = []
+        self.__last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.__last_retained = 0
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self.stages)} stages"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    @staticmethod
+    def _filter_snapshot(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+        """Excludes the allocations of the profiler, tracemalloc and the import
+        machinery."""
+        return snapshot.filter_traces(
+            (
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            )
+        )
+
+    def start(self) -> None:
+        """Starts tracing memory allocations."""
+
+        if not self.enabled:
+            return
+
+        tracemalloc.start(self.frames)
+        self.__last_snapshot = self._filter_snapshot(tracemalloc.take_snapshot())
+        self.__last_retained = tracemalloc.get_traced_memory()[0]
+
+    def checkpoint(self, stage: str) -> Optional[StageMemory]:
+        """Closes the stage: records its peak and retained memory and the top
+        allocation sites since the previous checkpoint.
+
+        Raises MemoryBudgetExceeded when the stage peak is over the
+        budget.
+        """
+
+        if not self.enabled or not tracemalloc.is_tracing():
+            return None
+
+        retained, peak = tracemalloc.get_traced_memory()
+        snapshot = self._filter_snapshot(tracemalloc.take_snapshot())
+
+        top_sites = []
+        for stat_diff in snapshot.compare_to(self.__last_snapshot, "lineno")[: self.top_n]:
+            frame = stat_diff.traceback[0]
+            top_sites.append((f"{frame.filename}:{frame.lineno}", stat_diff.size_diff))
+
+        stage_memory = StageMemory(stage, peak, retained, retained - self.__last_retained, top_sites)
+        self.stages.append(stage_memory)
+
+        self.__last_snapshot = snapshot
+        self.__last_retained = retained
+        tracemalloc.reset_peak()
+
+        if self.budget and peak > self.budget:
+            raise MemoryBudgetExceeded(
+                f"Stage '{stage}' peak memory {peak / 1024 / 1024:.1f} MB exceeds the budget "
+                f"{self.budget / 1024 / 1024:.1f} MB."
+            )
+
+        return stage_memory
+
+    def stop(self) -> None:
+        """Stops tracing memory allocations."""
+
+        if self.enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def print_summary(self, console) -> None:
+        """Prints the memory statistics of the stages to the rich console."""
+
+        if not self.stages:
+            return
+
+        from rich import box
+        from rich.table import Table
+
+        table = Table(title="Memory by pipeline stage", box=box.HEAVY_EDGE, show_header=True, header_style="bold")
+        for name in ("Stage", "Peak, MB", "Retained, MB", "Retained delta, MB", "Top allocation sites"):
+            table.add_column(name, justify="left" if name in ("Stage", "Top allocation sites") else "right")
+
+        for stage_memory in self.stages:
+            table.add_row(
+                stage_memory.stage,
+                f"{stage_memory.peak / 1024 / 1024:.2f}",
+                f"{stage_memory.retained / 1024 / 1024:.2f}",
+                f"{stage_memory.retained_delta / 1024 / 1024:+.2f}",
+                "\n".join(f"{site} ({size / 1024:+.1f} KB)" for site, size in stage_memory.top_sites),
+            )
+        console.print(table)
@@ -1,15 +1,195 @@
-"""The class checks output errors from network devices."""
+"""The class checks output errors from network devices.
+
+The output is classified by a compiled rule table: the ignore and error
+rules of the vendor are combined into one regular expression, so a large
+output of a batch of commands is scanned in a single linear pass.
+
+Usage example:
+
+classifier = NetErrorDetect.classifier("cisco_ios")
+for detected_error in classifier.classify(output, commands):
+    print(detected_error.offset, detected_error.command, detected_error.message)
+"""
 
 __author__ = "ZHEZLYAEV Aleksandr"
 __version__ = "1.0"
 
 # -*- coding: utf-8 -*-
 
+import re
+from typing import Final, Iterable, NamedTuple, Optional
+
+# Уровни важности: правила с уровнем "ignore" не возвращаются
+SEVERITY_LEVELS: Final = {"ignore": 0, "info": 1, "warning": 2, "error": 3}
+
+
+class ErrorRule(NamedTuple):
+    """Rule of the classifier: the regular expression must capture the error
+    text in the named group 'text' (ignore rules need no group)."""
+
+    name: str
+    pattern: str
+    severity: str
+
+
+class DetectedError(NamedTuple):
+    """Error found in the device output."""
+
+    offset: int
+    command: Optional[str]
+    rule: str
+    severity: str
+    text: str
+
+    @property
+    def message(self) -> str:
+        return f'An error occurred while executing the command "{(self.command or "").strip()}" -> {self.text}'
+
+
+# Правила по вендорам. Порядок важен: при совпадении в одной позиции побеждает первое правило,
+# поэтому игнорируемые сообщения стоят перед общими правилами.
+VENDOR_RULES: Final = {
+    "cisco": (
+        ErrorRule("applying_vlan_changes", r"% Applying VLAN changes[^\n]*", "ignore"),
+        ErrorRule("mask_31_warning", r"% Warning: use /31 mask[^\n]*", "ignore"),
+        ErrorRule("warning", r"% ?(?P<text>Warning:[^\n]*)", "warning"),
+        ErrorRule("invalid_input", r"% ?(?P<text>Invalid input detected[^\n]*)", "error"),
+        ErrorRule("incomplete_command", r"% ?(?P<text>Incomplete command[^\n]*)", "error"),
+        ErrorRule("ambiguous_command", r"% ?(?P<text>Ambiguous command[^\n]*)", "error"),
+        ErrorRule("command_rejected", r"Command rejected:(?P<text>[^\n]*)", "error"),
+        ErrorRule("generic", r"%(?P<text>[^\n]*)", "error"),
+    ),
+    "huawei": (
+        ErrorRule("warning", r"Warning:(?P<text>[^\n]*)", "warning"),
+        ErrorRule("error", r"Error:(?P<text>[^\n]*)", "error"),
+    ),
+}
+
+
+class NetErrorClassifier:
+    """Classifies the device output with one compiled regular expression
+    built from the vendor rule table."""
+
+    __slots__ = ("vendor", "rules", "severities", "__regex")
+
+    def __init__(
+        self,
+        vendor: str,
+        rules: Optional[Iterable[ErrorRule]] = None,
+        severities: Optional[dict[str, str]] = None,
+    ) -> None:
+        """NetErrorClassifier class __init__.
+
+        severities overrides the severity of the rules by rule name,
+        e.g. {"warning": "error"} or {"generic": "ignore"}.
+        """
+
+        self.vendor = vendor
+        self.rules: tuple[ErrorRule, ...] = tuple(rules if rules is not None else VENDOR_RULES[vendor])
+        self.severities: dict[str, str] = {rule.name: rule.severity for rule in self.rules}
+
+        for rule_name, severity in (severities or {}).items():
+            if rule_name not in self.severities:
+                raise ValueError(f"Unknown rule '{rule_name}' for vendor '{vendor}'.")
+            if severity not in SEVERITY_LEVELS:
+                raise ValueError(f"Unknown severity '{severity}', expected one of {', '.join(SEVERITY_LEVELS)}.")
+            self.severities[rule_name] = severity
+
+        # Каждое правило - отдельная именованная группа, группы 'text' переименовываются в '<rule>__text'
+        alternatives = []
+        for rule in self.rules:
+            pattern = rule.pattern.replace("(?P<text>", f"(?P<{rule.name}__text>")
+            alternatives.append(f"(?P<{rule.name}>{pattern})")
+        self.__regex: re.Pattern = re.compile("|".join(alternatives))
+
+    def __repr__(self):
+        return f"{self.__class__}: {self.vendor}"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    @staticmethod
+    def _command_offsets(output: str, commands: list[str]) -> list[tuple[int, str]]:
+        """Finds the echo of the commands in the output (in the order they were
+        sent) and returns their offsets."""
+
+        command_offsets = []
+        position = 0
+        for command in commands:
+            command_echo = command.strip()
+            if not command_echo:
+                continue
+            offset = output.find(command_echo, position)
+            if offset == -1:
+                continue
+            command_offsets.append((offset, command))
+            position = offset + len(command_echo)
+        return command_offsets
+
+    def classify(
+        self,
+        output: str,
+        commands: Optional[list[str]] = None,
+        min_severity: Optional[str] = "warning",
+    ) -> list[DetectedError]:
+        """Returns all errors of the output with the severity not lower than
+        min_severity.
+
+        The originating command of the error is the last command whose
+        echo precedes the error; if no echo is found, the first command
+        is used (the output of a single command often has no echo).
+        """
+
+        commands = commands or []
+        min_level = SEVERITY_LEVELS[min_severity]
+        command_offsets = self._command_offsets(output, commands)
+        command_index = -1
+
+        detected_errors = []
+        for match in self.__regex.finditer(output):
+            rule_name = match.lastgroup
+            severity = self.severities[rule_name]
+            if SEVERITY_LEVELS[severity] < max(min_level, 1):
+                continue
+
+            offset = match.start()
+            while command_index + 1 < len(command_offsets) and command_offsets[command_index + 1][0] < offset:
+                command_index += 1
+            if command_index >= 0:
+                command = command_offsets[command_index][1]
+            else:
+                command = commands[0] if commands else None
+
+            text = match.group(f"{rule_name}__text") if f"{rule_name}__text" in match.re.groupindex else ""
+            detected_errors.append(DetectedError(offset, command, rule_name, severity, (text or "").strip()))
+
+        return detected_errors
+
 
 class NetErrorDetect:
     """Class get output from network devices and checks it for errors
     (Cisco/Huawei)."""
 
+    __classifiers: dict[str, NetErrorClassifier] = {}
+
+    @classmethod
+    def classifier(cls, device_type: str) -> Optional[NetErrorClassifier]:
+        """Returns the shared classifier for the netmiko device type (None if
+        the OS is not supported)."""
+
+        vendor = device_type.split("_")[0]
+        if vendor not in VENDOR_RULES:
+            return None
+        if vendor not in cls.__classifiers:
+            cls.__classifiers[vendor] = NetErrorClassifier(vendor)
+        return cls.__classifiers[vendor]
+
+    @classmethod
+    def _check_errors(cls, vendor: str, input, output) -> Optional[str]:
+        detected_errors = cls.classifier(vendor).classify(output, [input], min_severity="error")
+        if detected_errors:
+            return detected_errors[0].message
+
     @classmethod
     def check_cisco_errors(cls, input, output) -> str:
         """Checks Cisco IOS output for errors during configuration.
@@ -17,28 +197,9 @@ class NetErrorDetect:
         The method checks the output for Invalid input detected,
         Incomplete command, Ambiguous command errors.
         """
-
-        if "% Applying VLAN changes" in output:
-            pass
-
-        elif "% Warning: use /31 mask" in output:
-            pass
-
-        elif "%" in output:
-            error = output.split("%")[1].split("\n")[0]
-            error_mesage = f'An error occurred while executing the command "{input.strip()}" -> {error.strip()}'
-            return error_mesage
-
-        elif "Command rejected" in output:
-            error = output.split("Command rejected:")[1].split("\n")[0]
-            error_mesage = f'An error occurred while executing the command "{input.strip()}" -> {error.strip()}'
-            return error_mesage
+        return cls._check_errors("cisco", input, output)
 
     @classmethod
     def check_huawei_errors(cls, input, output) -> str:
         """Checks Huawei VRP output for errors during configuration."""
-
-        if "Error:" in output:
-            error = output.split("Error:")[1].split("\n")[0].strip()
-            error_mesage = f'An error occurred while executing the command "{input.strip()}" -> {error.strip()}'
-            return error_mesage
+        return cls._check_errors("huawei", input, output)
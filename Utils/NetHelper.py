@@ -6,12 +6,26 @@ __version__ = "1.0"
 # -*- coding: utf-8 -*-
 
 
+import functools
+import json
 import re
+import time
+from collections import defaultdict
+from concurrent.futures import Future
 from string import ascii_letters, digits
 from typing import Optional
 
 from CiscoInterfaceNameConverter.converter import convert_interface
 
+from Utils.NetTracer import tracer
+from Utils.NxosJson import (
+    map_cdp_neighbors_detail,
+    map_interfaces_switchport,
+    map_port_channel_summary,
+    map_spanning_tree,
+)
+from Utils.ParsePool import ParsePool, parse_output
+from Utils.RunMetrics import run_metrics
 from Utils.zlogger import zLogger
 
 
@@ -37,21 +51,205 @@ class NetworkParsingError(Exception):
         return f"Error: {self.message}"
 
 
+@functools.lru_cache(maxsize=4096)
+def short_interface_name(intf: str) -> str:
+    """Returns the short interface name (GigabitEthernet1/1 -> Gi1/1), the
+    results are memoized."""
+    return convert_interface(intf, return_short=True)
+
+
+@functools.lru_cache(maxsize=64)
+def scope_names_pattern(scope_names: tuple[str, ...]) -> re.Pattern:
+    """Returns one compiled alternation matching any of the vlan scope names
+    as a whole word, the patterns are memoized per set of scopes."""
+    # Длинные имена первыми, чтобы при общем префиксе совпадение было по полному имени
+    alternatives = "|".join(re.escape(scope_name) for scope_name in sorted(scope_names, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\b")
+
+
 class NetHelper:
     """The class with useful methods for getting data from network
     equipment."""
 
-    def __init__(self, ssh_conn, verbose: Optional[bool] = False) -> None:
+    # Максимальное количество команд, отправляемых в канал за один раз в режиме конвейера
+    PIPELINE_DEPTH = 32
+    # Максимальная длина списка vlan в 'sh spanning-tree vlan X-Y,Z', длиннее - запрашивается весь stp
+    STP_VLAN_RANGE_MAX_LEN = 200
+
+    def __init__(
+        self,
+        ssh_conn,
+        verbose: Optional[bool] = False,
+        pipelining: Optional[bool] = False,
+        parse_pool: Optional[ParsePool] = None,
+        nxos_json: Optional[bool] = False,
+    ) -> None:
         self.ssh_conn = ssh_conn
         self.verbose = verbose
+        self.pipelining = pipelining
+        self.parse_pool = parse_pool
+        self.nxos_json = nxos_json
         self.logger = zLogger()
 
+        # Данные устройства, которые запрашиваются один раз за сессию
+        self.__po_info: Optional[dict[str, list[str]]] = None
+        self.__cdp_neighbors_index: Optional[dict[str, set[str]]] = None
+
     def __repr__(self):
         return f"{self.__class__}"
 
     def __str__(self):
         return f"{self.__class__.__name__}"
 
+    def _submit_parse(self, raw_output: str, textfsm_template: str, span) -> Future:
+        """The method parses the output inline or submits it to the parse pool.
+        The parse time is added to the span when parsing is done."""
+
+        if self.parse_pool is None:
+            future = Future()
+            future.set_result(parse_output(raw_output, textfsm_template))
+        else:
+            future = self.parse_pool.submit(raw_output, textfsm_template)
+
+        def trace_parse_time(done_future: Future) -> None:
+            if done_future.exception() is None:
+                span.parsed(done_future.result()[1])
+
+        future.add_done_callback(trace_parse_time)
+        return future
+
+    def _fetch_command(self, command: str, command_group: Optional[str] = None) -> tuple[str, object]:
+        """The method sends the show command and returns the raw output with
+        the span of the operation."""
+
+        with tracer.span(self.ssh_conn.host, command_group or command) as span:
+            raw_output: str = self.ssh_conn.send_command(command)
+            span.received(len(raw_output))
+        run_metrics.inc("commands_sent")
+        run_metrics.inc("bytes_received", len(raw_output))
+        return raw_output, span
+
+    def _send_command(self, command: str, textfsm_template: str, command_group: Optional[str] = None):
+        """The method sends the show command, parses the output with the
+        TextFSM template and traces both steps.
+
+        Returns the list of dicts or the raw output if it could not be
+        parsed (same as netmiko use_textfsm=True).
+        """
+
+        raw_output, span = self._fetch_command(command, command_group)
+        return self._submit_parse(raw_output, textfsm_template, span).result()[0]
+
+    def _send_nxos_json_command(self, command: str, json_mapper, command_group: Optional[str] = None):
+        """The method sends the '| json' variant of the NX-OS show command and
+        maps it to the TextFSM dict shape.
+
+        Returns None if the output has an unexpected structure.
+        """
+
+        with tracer.span(self.ssh_conn.host, f"{command_group or command} | json") as span:
+            raw_output: str = self.ssh_conn.send_command(f"{command} | json")
+            span.received(len(raw_output))
+            run_metrics.inc("commands_sent")
+            run_metrics.inc("bytes_received", len(raw_output))
+
+            parse_start = time.perf_counter()
+            try:
+                structured_output = json_mapper(json.loads(raw_output))
+            except (ValueError, KeyError, TypeError) as error:
+                self.logger.log("file").warning(
+                    f"{self.ssh_conn.host} [{self.ssh_conn.device_type}] - '{command} | json' output could not be "
+                    f"mapped ({error!r}), falling back to TextFSM."
+                )
+                structured_output = None
+            span.parsed(time.perf_counter() - parse_start)
+
+        return structured_output
+
+    def _send_structured_command(
+        self, command: str, textfsm_template: str, json_mapper, command_group: Optional[str] = None
+    ):
+        """The method uses the NX-OS JSON backend if it is turned on and falls
+        back to the TextFSM parsing."""
+
+        if self.nxos_json and self.ssh_conn.device_type == "cisco_nxos":
+            structured_output = self._send_nxos_json_command(command, json_mapper, command_group)
+            if structured_output is not None:
+                return structured_output
+
+        return self._send_command(command, textfsm_template, command_group)
+
+    def _send_commands(self, commands: list[str], textfsm_template: str, command_group: Optional[str] = None) -> list:
+        """The method sends several read-only show commands and parses every
+        output with the TextFSM template.
+
+        In the pipelining mode the commands are written to the channel
+        back-to-back, otherwise they are sent one by one. With the parse
+        pool the outputs are parsed while the next commands are fetched.
+        """
+
+        parse_futures: list[Future] = []
+
+        if not self.pipelining or len(commands) < 2:
+            for command in commands:
+                raw_output, span = self._fetch_command(command, command_group)
+                parse_futures.append(self._submit_parse(raw_output, textfsm_template, span))
+
+        else:
+            for batch_start in range(0, len(commands), self.PIPELINE_DEPTH):
+                batch = commands[batch_start : batch_start + self.PIPELINE_DEPTH]
+                with tracer.span(self.ssh_conn.host, f"{command_group or batch[0]} (pipelined)") as span:
+                    raw_outputs = self._send_commands_pipelined(batch)
+                    span.received(sum(len(raw_output) for raw_output in raw_outputs))
+                run_metrics.inc("commands_sent", len(batch))
+                run_metrics.inc("bytes_received", sum(len(raw_output) for raw_output in raw_outputs))
+
+                for raw_output in raw_outputs:
+                    parse_futures.append(self._submit_parse(raw_output, textfsm_template, span))
+
+        return [parse_future.result()[0] for parse_future in parse_futures]
+
+    def _send_commands_pipelined(self, commands: list[str], read_timeout: Optional[float] = 30.0) -> list[str]:
+        """The method writes the commands to the channel without waiting for
+        the prompt and splits the received stream into per-command outputs by
+        the prompt and the echoed commands.
+
+        The whole batch takes about one round trip instead of one round
+        trip per command.
+        """
+
+        prompt: str = self.ssh_conn.find_prompt()
+        prompt_re = re.compile(rf"(?:^|\n){re.escape(prompt)}")
+
+        self.ssh_conn.clear_buffer()
+        self.ssh_conn.write_channel("".join(f"{command}{self.ssh_conn.RETURN}" for command in commands))
+
+        # Каждая команда завершается приглашением устройства
+        stream = ""
+        deadline = time.monotonic() + read_timeout
+        while len(prompt_re.findall(stream)) < len(commands):
+            if time.monotonic() > deadline:
+                raise NetworkParsingError(
+                    f"{self.__class__} {self.ssh_conn.host} timed out waiting for the pipelined commands output."
+                )
+            chunk = self.ssh_conn.read_channel()
+            if chunk:
+                stream += self.ssh_conn.normalize_linefeeds(chunk)
+            else:
+                time.sleep(0.01)
+
+        raw_outputs = []
+        for command, segment in zip(commands, prompt_re.split(stream)):
+            # Убираем эхо команды в начале сегмента
+            first_line, _, command_output = segment.partition("\n")
+            if command.strip() not in first_line:
+                raise NetworkParsingError(
+                    f"{self.__class__} {self.ssh_conn.host} could not split the pipelined output of '{command}'."
+                )
+            raw_outputs.append(command_output.rstrip("\n"))
+
+        return raw_outputs
+
     @staticmethod
     def _verify_vlan_scope_name(vlan_scope_name: str) -> None:
         """The internal method checks the correctness of vlan scope name."""
@@ -69,102 +267,246 @@ class NetHelper:
         """The method searches for interfaces in the description of which the
         vlan scope of interest is specified."""
 
-        # Проверяем корректность имени VLAN SCOPE
-        self._verify_vlan_scope_name(scope_name)
+        return self.get_intf_in_scopes_by_description([scope_name])[scope_name]
 
-        cisco_ios_show_interfaces_description_template = "ntc_templates/cisco_ios_show_interfaces_description.textfsm"
+    def get_intf_in_scopes_by_description(self, scope_names: list[str]) -> dict[str, dict[str, dict]]:
+        """The method classifies the interface descriptions by several vlan
+        scopes in one pass: one 'sh int description' and one regex search per
+        interface.
+
+        Returns scope name -> {interface: {"intf_mode": ..., "allowed_vlans": [...]}}.
+        """
 
-        intfs_d: dict[str, dict[str | list[int]]] = {}
-        intfs_l: list[str] = []
+        # Проверяем корректность имен VLAN SCOPE
+        for scope_name in scope_names:
+            self._verify_vlan_scope_name(scope_name)
+
+        cisco_ios_show_interfaces_description_template = "ntc_templates/cisco_ios_show_interfaces_description.textfsm"
 
         log_msg = "{} [{}] - '{}' exists on {} interfaces."
 
-        if self.ssh_conn.device_type == "cisco_ios":
-            show_interfaces_description = self.ssh_conn.send_command(
-                f"sh int description",
-                use_textfsm=True,
-                textfsm_template=cisco_ios_show_interfaces_description_template,
-            )
-            if not isinstance(show_interfaces_description, list):
-                raise UnsupportedOsType(f"{self.__class__} {self.ssh_conn.host} OS isn't supported.")
-
-            for output_d in show_interfaces_description:
-                if (
-                    re.search(rf"\b{scope_name}\b", output_d.get("descrip"))
-                    and output_d.get("status") == "up"
-                    and output_d.get("protocol") == "up"
-                ):
-                    intf_of_scope = output_d.get("port")
-                    intfs_l.append(intf_of_scope)
-
-            # Проверяем, есть ли в нашем списке PO-интерфейсы
-            po_exist_lst = [i for i in intfs_l if "Po" in i]
-
-            if po_exist_lst:
-                po_dict: dict[str, list[str]] = self.__get_po_info()
-                all_po_members = [item for sublist in list(po_dict.values()) for item in sublist]
-                intfs_l = list(set(intfs_l).difference(set(all_po_members)))
+        if self.ssh_conn.device_type != "cisco_ios":
+            raise UnsupportedOsType(f"{self.__class__} {self.ssh_conn.host} OS isn't supported.")
+
+        show_interfaces_description = self._send_command(
+            "sh int description", cisco_ios_show_interfaces_description_template
+        )
+        if not isinstance(show_interfaces_description, list):
+            raise UnsupportedOsType(f"{self.__class__} {self.ssh_conn.host} OS isn't supported.")
 
+        # Все имена скоупов собраны в одно регулярное выражение, описание просматривается один раз
+        scope_pattern = scope_names_pattern(tuple(dict.fromkeys(scope_names)))
+        scope_intfs: dict[str, list[str]] = {scope_name: [] for scope_name in scope_names}
+        for output_d in show_interfaces_description:
+            if output_d.get("status") != "up" or output_d.get("protocol") != "up":
+                continue
+            for scope_name in dict.fromkeys(scope_pattern.findall(output_d.get("descrip") or "")):
+                scope_intfs[scope_name].append(output_d.get("port"))
+
+        # Проверяем, есть ли в нашем списке PO-интерфейсы
+        if any("Po" in intf for intfs_l in scope_intfs.values() for intf in intfs_l):
+            po_dict: dict[str, list[str]] = self.__get_po_info()
+            all_po_members = {item for sublist in po_dict.values() for item in sublist}
+            scope_intfs = {
+                scope_name: [intf for intf in intfs_l if intf not in all_po_members]
+                for scope_name, intfs_l in scope_intfs.items()
+            }
+
+        # Данные switchport запрашиваются один раз для объединения интерфейсов всех скоупов
+        all_intfs = list(dict.fromkeys(intf for intfs_l in scope_intfs.values() for intf in intfs_l))
+        switchport_info_d = dict(zip(all_intfs, self.__get_intfs_switchport_info(all_intfs)))
+
+        scopes_intfs_d: dict[str, dict[str, dict]] = {}
+        for scope_name, intfs_l in scope_intfs.items():
+            intfs_d = scopes_intfs_d[scope_name] = {}
             for intf in intfs_l:
-                intf_mode, vlan_list = self.__get_intf_switchport_info(intf)
+                # Выключенные интерфейсы пропускаем
+                if switchport_info_d[intf] is None:
+                    continue
+                intf_mode, vlan_list = switchport_info_d[intf]
                 intfs_d[intf] = dict(intf_mode=intf_mode, allowed_vlans=vlan_list)
 
-            if self.verbose:
-                self.logger.log("all").info(
-                    log_msg.format(self.ssh_conn.host, self.ssh_conn.device_type, scope_name, ", ".join(intfs_l))
-                )
-            else:
-                self.logger.log("file").info(
-                    log_msg.format(self.ssh_conn.host, self.ssh_conn.device_type, scope_name, ", ".join(intfs_l))
-                )
-
-            return intfs_d
+            self.logger.log("all" if self.verbose else "file").info(
+                log_msg.format(self.ssh_conn.host, self.ssh_conn.device_type, scope_name, ", ".join(intfs_l))
+            )
 
-        else:
-            raise UnsupportedOsType(f"{self.__class__} {self.ssh_conn.host} OS isn't supported.")
+        return scopes_intfs_d
 
     def get_intf_in_scope_by_stp_instance(self, vlan_id: int):
         """The method builds a network tree according to the stp protocol
         data."""
 
+        return self.get_intf_in_scopes_by_stp_instance({f"vlan {vlan_id}": vlan_id})[f"vlan {vlan_id}"]
+
+    def __get_stp_intfs(self, vlan_ids: list[int]) -> dict[int, list[str]]:
+        """The method returns the interfaces of the stp instance of every
+        vlan."""
+
         cisco_ios_show_spanning_tree_template = "ntc_templates/cisco_ios_show_spanning-tree.textfsm"
-        stp_tree_d = {}
-        log_msg = "{} [{}] - interface {} was found based on the search criteria."
+        stp_commands = [f"sh spanning-tree vlan {vlan_id}" for vlan_id in vlan_ids]
 
-        if self.ssh_conn.device_type == "cisco_ios" or self.ssh_conn.device_type == "cisco_nxos":
-            # Смотрим в какие порты подан нужный нам vlan
-            sh_spanning_tree = self.ssh_conn.send_command(
-                f"sh spanning-tree vlan {vlan_id}",
-                use_textfsm=True,
-                textfsm_template=cisco_ios_show_spanning_tree_template,
+        if self.nxos_json and self.ssh_conn.device_type == "cisco_nxos":
+            sh_spanning_tree_lst = [
+                self._send_structured_command(
+                    stp_command, cisco_ios_show_spanning_tree_template, map_spanning_tree, "sh spanning-tree vlan"
+                )
+                for stp_command in stp_commands
+            ]
+        else:
+            sh_spanning_tree_lst = self._send_commands(
+                stp_commands, cisco_ios_show_spanning_tree_template, "sh spanning-tree vlan"
             )
 
+        stp_intfs_d: dict[int, list[str]] = {}
+        for vlan_id, sh_spanning_tree in zip(vlan_ids, sh_spanning_tree_lst):
             if not isinstance(sh_spanning_tree, list):
                 raise NetworkParsingError(
                     f"{self.__class__} {self.ssh_conn.host} could not process the stp network data output."
                 )
+            stp_intfs_d[vlan_id] = [stp_dict.get("interface") for stp_dict in sh_spanning_tree]
 
-            for stp_dict in sh_spanning_tree:
-                intf_in_stp_topo = stp_dict.get("interface")
-                intf_mode, vlan_list = self.__get_intf_switchport_info(intf_in_stp_topo)
-                stp_tree_d[intf_in_stp_topo] = dict(intf_mode=intf_mode, allowed_vlans=vlan_list)
-
-                if self.verbose:
-                    self.logger.log("all").info(
-                        log_msg.format(self.ssh_conn.host, self.ssh_conn.device_type, intf_in_stp_topo)
-                    )
-                else:
-                    self.logger.log("file").self.info(
-                        log_msg.format(self.ssh_conn.host, self.ssh_conn.device_type, intf_in_stp_topo)
-                    )
+        return stp_intfs_d
 
-            return stp_tree_d
+    @staticmethod
+    def _format_vlan_ranges(vlan_ids: list[int]) -> str:
+        """The internal method compresses the vlan ids to the CLI range form,
+        e.g. [100, 101, 102, 200] -> '100-102,200'."""
+
+        vlan_ranges: list[str] = []
+        sorted_vlan_ids = sorted(set(vlan_ids))
+        range_start = range_end = sorted_vlan_ids[0]
+        for vlan_id in sorted_vlan_ids[1:] + [None]:
+            if vlan_id is not None and vlan_id == range_end + 1:
+                range_end = vlan_id
+                continue
+            vlan_ranges.append(str(range_start) if range_start == range_end else f"{range_start}-{range_end}")
+            range_start = range_end = vlan_id
+
+        return ",".join(vlan_ranges)
+
+    def __get_stp_vlan_map(self, vlan_ids: list[int]) -> dict[str, set[int]]:
+        """The method requests the stp instances of all vlans with one command
+        and returns interface -> set of vlans (only the given vlans).
+
+        The VLAN-range form of the command is used while it is short enough,
+        otherwise the unfiltered 'sh spanning-tree'.
+        """
 
+        cisco_ios_show_spanning_tree_template = "ntc_templates/cisco_ios_show_spanning-tree.textfsm"
+        vlan_ranges = self._format_vlan_ranges(vlan_ids)
+        if len(vlan_ranges) <= self.STP_VLAN_RANGE_MAX_LEN:
+            stp_command = f"sh spanning-tree vlan {vlan_ranges}"
         else:
+            stp_command = "sh spanning-tree"
+
+        sh_spanning_tree = self._send_structured_command(
+            stp_command, cisco_ios_show_spanning_tree_template, map_spanning_tree, "sh spanning-tree"
+        )
+        if not isinstance(sh_spanning_tree, list):
+            raise NetworkParsingError(
+                f"{self.__class__} {self.ssh_conn.host} could not process the stp network data output."
+            )
+
+        scope_vlans = set(vlan_ids)
+        stp_vlan_map: dict[str, set[int]] = {}
+        for stp_dict in sh_spanning_tree:
+            # Строки без номера vlan (например, MST) сопоставить со скоупом нельзя
+            if not str(stp_dict.get("vlan_id", "")).isdigit():
+                continue
+            vlan_id = int(stp_dict["vlan_id"])
+            if vlan_id in scope_vlans:
+                stp_vlan_map.setdefault(stp_dict.get("interface"), set()).add(vlan_id)
+
+        return stp_vlan_map
+
+    def get_intf_in_scopes_by_stp_vlans(self, scope_vlan_ids: dict[str, list[int]]) -> dict[str, dict[str, dict]]:
+        """The method builds the network trees of several vlan scopes from one
+        stp output: an interface belongs to the scope if it carries any vlan
+        of the scope.
+
+        scope_vlan_ids: scope name -> all vlan ids of the scope. Returns the
+        same structure as get_intf_in_scopes_by_stp_instance.
+        """
+
+        if self.ssh_conn.device_type not in ("cisco_ios", "cisco_nxos"):
             raise UnsupportedOsType(f"{self.__class__} {self.ssh_conn.host} OS isn't supported.")
 
+        # Один запрос stp для vlan всех скоупов, разбор один раз
+        stp_vlan_map = self.__get_stp_vlan_map(
+            [vlan_id for vlan_ids in scope_vlan_ids.values() for vlan_id in vlan_ids]
+        )
+
+        scope_stp_intfs: dict[str, list[str]] = {}
+        for scope_name, vlan_ids in scope_vlan_ids.items():
+            scope_vlans = set(vlan_ids)
+            scope_stp_intfs[scope_name] = [
+                intf for intf, intf_vlans in stp_vlan_map.items() if intf_vlans & scope_vlans
+            ]
+
+        return self.__build_scope_trees(scope_stp_intfs)
+
+    def get_intf_in_scopes_by_stp_instance(self, scope_vlan_ids: dict[str, int]) -> dict[str, dict[str, dict]]:
+        """The method builds the network trees of several vlan scopes in one
+        pass: the stp instance of every scope vlan is requested once and the
+        switchport data once per interface for all scopes.
+
+        scope_vlan_ids: scope name -> vlan id of the scope. Returns scope
+        name -> {interface: {"intf_mode": ..., "allowed_vlans": [...]}}.
+        """
+
+        if self.ssh_conn.device_type not in ("cisco_ios", "cisco_nxos"):
+            raise UnsupportedOsType(f"{self.__class__} {self.ssh_conn.host} OS isn't supported.")
+
+        # Смотрим в какие порты поданы vlan всех скоупов (одинаковые vlan запрашиваются один раз)
+        stp_intfs_d = self.__get_stp_intfs(sorted(set(scope_vlan_ids.values())))
+
+        return self.__build_scope_trees(
+            {scope_name: stp_intfs_d[vlan_id] for scope_name, vlan_id in scope_vlan_ids.items()}
+        )
+
+    def __build_scope_trees(self, scope_stp_intfs: dict[str, list[str]]) -> dict[str, dict[str, dict]]:
+        """The method adds the switchport data to the stp interfaces of every
+        scope, the data is requested once for the union of the interfaces."""
+
+        log_msg = "{} [{}] - interface {} was found based on the search criteria ({})."
+
+        # Данные switchport запрашиваются один раз для объединения интерфейсов всех скоупов
+        all_stp_intfs = list(dict.fromkeys(intf for stp_intfs in scope_stp_intfs.values() for intf in stp_intfs))
+        switchport_info_d = dict(zip(all_stp_intfs, self.__get_intfs_switchport_info(all_stp_intfs)))
+
+        scopes_stp_tree_d: dict[str, dict[str, dict]] = {}
+        for scope_name, stp_intfs in scope_stp_intfs.items():
+            stp_tree_d = scopes_stp_tree_d[scope_name] = {}
+            for intf_in_stp_topo in stp_intfs:
+                # Выключенные интерфейсы пропускаем
+                if switchport_info_d[intf_in_stp_topo] is None:
+                    continue
+                intf_mode, vlan_list = switchport_info_d[intf_in_stp_topo]
+                stp_tree_d[intf_in_stp_topo] = dict(intf_mode=intf_mode, allowed_vlans=vlan_list)
+
+                self.logger.log("all" if self.verbose else "file").info(
+                    log_msg.format(self.ssh_conn.host, self.ssh_conn.device_type, intf_in_stp_topo, scope_name)
+                )
+
+        return scopes_stp_tree_d
+
     def __get_po_info(self) -> dict[str, list[str]]:
-        """The method finds the port-channel group members and returns them."""
+        """The method finds the port-channel group members and returns them.
+
+        The port-channels and their members are keyed by the short
+        interface names; the data is requested once per device.
+        """
+
+        if self.__po_info is None:
+            self.__po_info = {
+                short_interface_name(po_intf_name): [short_interface_name(member) for member in po_intf_members]
+                for po_intf_name, po_intf_members in self.__request_po_info().items()
+            }
+        return self.__po_info
+
+    def __request_po_info(self) -> dict[str, list[str]]:
+        """The method requests the port-channel group members from the
+        device."""
 
         cisco_ios_show_etherchannel_summary_template = "ntc_templates/cisco_ios_show_etherchannel_summary.textfsm"
         cisco_nxos_show_port_channel_summary_template = "ntc_templates/cisco_nxos_show_port-channel_summary.textfsm"
@@ -172,10 +514,8 @@ class NetHelper:
         po_dict: dict[str, list[str]] = {}
 
         if self.ssh_conn.device_type == "cisco_ios":
-            show_etherchannel_summary = self.ssh_conn.send_command(
-                f"sh etherchannel summary",
-                use_textfsm=True,
-                textfsm_template=cisco_ios_show_etherchannel_summary_template,
+            show_etherchannel_summary = self._send_command(
+                "sh etherchannel summary", cisco_ios_show_etherchannel_summary_template
             )
             if isinstance(show_etherchannel_summary, list):
                 for output_d in show_etherchannel_summary:
@@ -190,10 +530,8 @@ class NetHelper:
                 )
 
         elif self.ssh_conn.device_type == "cisco_nxos":
-            show_etherchannel_summary = self.ssh_conn.send_command(
-                f"sh port-channel summary",
-                use_textfsm=True,
-                textfsm_template=cisco_nxos_show_port_channel_summary_template,
+            show_etherchannel_summary = self._send_structured_command(
+                "sh port-channel summary", cisco_nxos_show_port_channel_summary_template, map_port_channel_summary
             )
             if isinstance(show_etherchannel_summary, list):
                 for output_d in show_etherchannel_summary:
@@ -243,107 +581,133 @@ class NetHelper:
                 all_vlan_done = True
         return final_lst
 
-    def __get_intf_switchport_info(self, intf: str) -> tuple[str, list[int]]:
+    def __get_nxos_json_switchport(self, intfs: list[str]) -> Optional[list[list[dict]]]:
+        """The method requests the switchport data of all interfaces with one
+        '| json' command and returns it in the TextFSM shape (one list per
+        interface). Returns None if the data could not be used."""
+
+        switchport_d = self._send_nxos_json_command(
+            "sh interface switchport", map_interfaces_switchport, "sh int switchport"
+        )
+        if switchport_d is None:
+            return None
+
+        switchport_d = {short_interface_name(intf): intf_d for intf, intf_d in switchport_d.items()}
+        try:
+            return [[switchport_d[short_interface_name(intf)]] for intf in intfs]
+        except KeyError:
+            return None
+
+    def __get_intfs_switchport_info(self, intfs: list[str]) -> list[tuple[str, list[int]]]:
         """The method determines the type of switchport interface and the
-        allowed vlans on the interface."""
+        allowed vlans for each interface of the list."""
 
         cisco_ios_sh_intf_switchport_template = "ntc_templates/cisco_ios_show_interfaces_switchport.textfsm"
         cisco_nxos_show_interfaces_switchport_template = "ntc_templates/cisco_nxos_show_interfaces_switchport.textfsm"
 
         if self.ssh_conn.device_type == "cisco_ios":
-            sh_int_switchport = self.ssh_conn.send_command(
-                f"sh int {intf} switchport",
-                use_textfsm=True,
-                textfsm_template=cisco_ios_sh_intf_switchport_template,
+            sh_int_switchport_lst = self._send_commands(
+                [f"sh int {intf} switchport" for intf in intfs],
+                cisco_ios_sh_intf_switchport_template,
+                "sh int switchport",
             )
 
+        elif self.ssh_conn.device_type == "cisco_nxos":
+            sh_int_switchport_lst = self.__get_nxos_json_switchport(intfs) if self.nxos_json else None
+            if sh_int_switchport_lst is None:
+                sh_int_switchport_lst = self._send_commands(
+                    [f"sh int {intf} switchport" for intf in intfs],
+                    cisco_nxos_show_interfaces_switchport_template,
+                    "sh int switchport",
+                )
+
+        else:
+            raise UnsupportedOsType(f"{self.__class__} {self.ssh_conn.host} OS isn't supported.")
+
+        switchport_info_lst = []
+        for sh_int_switchport in sh_int_switchport_lst:
             intf_mode: str = sh_int_switchport[0].get("mode")
-            trunking_vlans: list[str] = sh_int_switchport[0].get("trunking_vlans")[0]
+            trunking_vlans: list[str] = sh_int_switchport[0].get("trunking_vlans")
+            # У cisco_ios шаблон возвращает список строк
+            if self.ssh_conn.device_type == "cisco_ios":
+                trunking_vlans = trunking_vlans[0]
+
+            if intf_mode != "down":
+                switchport_info_lst.append((intf_mode, self.__parse_allowed_vlan_ranges(trunking_vlans)))
+            else:
+                switchport_info_lst.append(None)
+
+        return switchport_info_lst
+
+    def __get_cdp_neighbors_index(self) -> dict[str, set[str]]:
+        """The method builds the index of CDP neighbors keyed by the short
+        local interface name; the data is requested once per device."""
+
+        cisco_ios_show_cdp_neighbors_detail_template = "ntc_templates/cisco_ios_show_cdp_neighbors_detail.textfsm"
+        cisco_nxos_show_cdp_neighbors_detail_template = "ntc_templates/cisco_nxos_show_cdp_neighbors_detail.textfsm"
+
+        if self.__cdp_neighbors_index is not None:
+            return self.__cdp_neighbors_index
+
+        if self.ssh_conn.device_type == "cisco_ios":
+            show_cdp_neighbors_detail = self._send_command(
+                "sh cdp neighbors detail", cisco_ios_show_cdp_neighbors_detail_template
+            )
+            neighbor_host_key = "destination_host"
 
         elif self.ssh_conn.device_type == "cisco_nxos":
-            sh_int_switchport = self.ssh_conn.send_command(
-                f"sh int {intf} switchport",
-                use_textfsm=True,
-                textfsm_template=cisco_nxos_show_interfaces_switchport_template,
+            show_cdp_neighbors_detail = self._send_structured_command(
+                "sh cdp neighbors detail", cisco_nxos_show_cdp_neighbors_detail_template, map_cdp_neighbors_detail
             )
-            intf_mode: str = sh_int_switchport[0].get("mode")
-            trunking_vlans: list[str] = sh_int_switchport[0].get("trunking_vlans")
+            neighbor_host_key = "dest_host"
 
         else:
             raise UnsupportedOsType(f"{self.__class__} {self.ssh_conn.host} OS isn't supported.")
 
-        if intf_mode != "down":
-            allowed_vlans = self.__parse_allowed_vlan_ranges(trunking_vlans)
-            return intf_mode, allowed_vlans
+        if not isinstance(show_cdp_neighbors_detail, list):
+            raise NetworkParsingError(
+                f"{self.__class__} {self.ssh_conn.host} could not process the cdp network data output."
+            )
+
+        cdp_neighbors_index: dict[str, set[str]] = defaultdict(set)
+        for output_d in show_cdp_neighbors_detail:
+            neighbor_host = output_d.get(neighbor_host_key).split(".")[0]
+            cdp_neighbors_index[short_interface_name(output_d.get("local_port"))].add(neighbor_host)
+
+        self.__cdp_neighbors_index = dict(cdp_neighbors_index)
+        return self.__cdp_neighbors_index
 
     def get_cdp_neigbors_by_intf(self, intf: str) -> list[str]:
         """The method looks for CDP neighbors behind the interface on the
         switch."""
 
-        cisco_ios_show_cdp_neighbors_detail_template = "ntc_templates/cisco_ios_show_cdp_neighbors_detail.textfsm"
-        cisco_nxos_show_cdp_neighbors_detail_template = "ntc_templates/cisco_nxos_show_cdp_neighbors_detail.textfsm"
+        if self.ssh_conn.device_type not in ("cisco_ios", "cisco_nxos"):
+            raise UnsupportedOsType(f"{self.__class__} {self.ssh_conn.host} OS isn't supported.")
 
         intf_todo: list[str] = []
         neighbors_st = set()
 
         if "Po" in intf:
             po_dict = self.__get_po_info()
-            po_members = po_dict[intf]
+            po_members = po_dict[short_interface_name(intf)]
             intf_todo = intf_todo + po_members
         else:
-            intf_todo.append(intf)
-
-        if self.ssh_conn.device_type == "cisco_ios":
-            show_cdp_neighbors_detail = self.ssh_conn.send_command(
-                f"sh cdp neighbors detail",
-                use_textfsm=True,
-                textfsm_template=cisco_ios_show_cdp_neighbors_detail_template,
-            )
-
-            if not isinstance(show_cdp_neighbors_detail, list):
-                raise NetworkParsingError(
-                    f"{self.__class__} {self.ssh_conn.host} could not process the cdp network data output."
-                )
+            intf_todo.append(short_interface_name(intf))
 
-            for output_d in show_cdp_neighbors_detail:
-                for iface in intf_todo:
-                    if iface == convert_interface(output_d.get("local_port"), return_short=True):
-                        neighbor_host = output_d.get("destination_host").split(".")[0]
-                        neighbors_st.add(neighbor_host)
-
-            return list(neighbors_st)
-
-        elif self.ssh_conn.device_type == "cisco_nxos":
-            show_cdp_neighbors_detail = self.ssh_conn.send_command(
-                f"sh cdp neighbors detail",
-                use_textfsm=True,
-                textfsm_template=cisco_nxos_show_cdp_neighbors_detail_template,
-            )
+        cdp_neighbors_index = self.__get_cdp_neighbors_index()
+        for iface in intf_todo:
+            neighbors_st.update(cdp_neighbors_index.get(iface, ()))
 
-            if not isinstance(show_cdp_neighbors_detail, list):
-                raise NetworkParsingError(
-                    f"{self.__class__} {self.ssh_conn.host} could not process the cdp network data output."
-                )
-
-            for output_d in show_cdp_neighbors_detail:
-                for iface in intf_todo:
-                    if iface == convert_interface(output_d.get("local_port"), return_short=True):
-                        neighbor_host = output_d.get("dest_host").split(".")[0]
-                        neighbors_st.add(neighbor_host)
-
-            return list(neighbors_st)
-
-        else:
-            raise UnsupportedOsType(f"{self.__class__} {self.ssh_conn.host} OS isn't supported.")
+        return list(neighbors_st)
 
     def get_ip_interfaces_status(self, intf_name: str):
         """The method returns the state of the IP interfaces."""
 
         if self.ssh_conn.device_type == "cisco_ios":
-            show_ip_int_brief_output = self.ssh_conn.send_command(
+            show_ip_int_brief_output = self._send_command(
                 f"show ip int brief | inc {intf_name}",
-                textfsm_template="ntc_templates/cisco_ios_show_ip_interface_brief.textfsm",
-                use_textfsm=True,
+                "ntc_templates/cisco_ios_show_ip_interface_brief.textfsm",
+                "show ip int brief | inc",
             )
             return show_ip_int_brief_output
 
@@ -355,10 +719,11 @@ class NetHelper:
         devices."""
 
         if self.ssh_conn.device_type == "cisco_ios" or self.ssh_conn.device_type == "cisco_nxos":
-            sh_vl_id_output = self.ssh_conn.send_command(
+            sh_vl_id_output = self._send_structured_command(
                 f"show spanning-tree vlan {vlan_id}",
-                textfsm_template="ntc_templates/cisco_ios_show_spanning-tree.textfsm",
-                use_textfsm=True,
+                "ntc_templates/cisco_ios_show_spanning-tree.textfsm",
+                map_spanning_tree,
+                "show spanning-tree vlan",
             )
             return sh_vl_id_output
 
@@ -0,0 +1,240 @@
+"""Per-device and per-command latency/throughput tracing of the SSH
+operations.
+
+Tracing is turned off by default: a disabled tracer returns one shared
+no-op span, so instrumented code costs a method call and an attribute
+check.
+
+Usage example:
+
+from Utils.NetTracer import tracer
+
+tracer.enabled = True
+with tracer.span("MS-TEST-0001", "sh spanning-tree vlan", stage="command") as span:
+    output = ssh_conn.send_command("sh spanning-tree vlan 100")
+    span.received(len(output))
+tracer.print_summary(console)
+tracer.export_json("trace.json")
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import json
+import math
+import time
+from collections import defaultdict
+from typing import Optional
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Returns the nearest-rank percentile of the sorted list."""
+
+    if not values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class NullSpan:
+    """No-op span which is returned when tracing is turned off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def received(self, size: int) -> None:
+        pass
+
+    def parsed(self, parse_time: float) -> None:
+        pass
+
+
+NULL_SPAN: NullSpan = NullSpan()
+
+
+class Span:
+    """Timing record of one operation on the network device."""
+
+    __slots__ = (
+        "tracer",
+        "device",
+        "command",
+        "stage",
+        "started",
+        "wall_time",
+        "bytes_received",
+        "parse_time",
+        "error",
+    )
+
+    def __init__(self, tracer: "NetTracer", device: str, command: str, stage: str) -> None:
+        """Span class __init__."""
+
+        self.tracer = tracer
+        self.device = device
+        self.command = command
+        self.stage = stage
+        self.started = 0.0
+        self.wall_time = 0.0
+        self.bytes_received = 0
+        self.parse_time = 0.0
+        self.error: Optional[str] = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.wall_time = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer.records.append(self)
+        return False
+
+    def received(self, size: int) -> None:
+        """Adds the number of received bytes (characters) of the output."""
+        self.bytes_received += size
+
+    def parsed(self, parse_time: float) -> None:
+        """Adds the time spent on parsing the output."""
+        self.parse_time += parse_time
+
+    def as_dict(self) -> dict:
+        return {
+            "device": self.device,
+            "stage": self.stage,
+            "command": self.command,
+            "wall_time": self.wall_time,
+            "bytes_received": self.bytes_received,
+            "parse_time": self.parse_time,
+            "error": self.error,
+        }
+
+
+class NetTracer:
+    """The class collects spans and aggregates them into p50/p95/max
+    tables."""
+
+    __slots__ = ("enabled", "records")
+
+    def __init__(self, enabled: Optional[bool] = False) -> None:
+        """NetTracer class __init__."""
+
+        self.enabled = enabled
+        self.records: list[Span] = []
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self.records)} records"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def span(self, device: str, command: str, stage: Optional[str] = "command") -> Span | NullSpan:
+        """Returns the context manager which measures one operation.
+
+        Commands with variable arguments (interface, vlan) should be
+        passed without them, so they are aggregated together.
+        """
+
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, device, command, stage)
+
+    def _aggregate(self, key_func) -> list[dict]:
+        """Groups the spans by key and calculates the statistics."""
+
+        groups: dict[tuple, list[Span]] = defaultdict(list)
+        for span in self.records:
+            groups[key_func(span)].append(span)
+
+        rows = []
+        for key, spans in groups.items():
+            wall_times = sorted(span.wall_time for span in spans)
+            parse_times = sorted(span.parse_time for span in spans)
+            rows.append(
+                {
+                    "key": key,
+                    "count": len(spans),
+                    "errors": sum(1 for span in spans if span.error),
+                    "total": sum(wall_times),
+                    "p50": percentile(wall_times, 50),
+                    "p95": percentile(wall_times, 95),
+                    "max": wall_times[-1],
+                    "bytes": sum(span.bytes_received for span in spans),
+                    "parse_p95": percentile(parse_times, 95),
+                }
+            )
+
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def by_command(self) -> list[dict]:
+        """Statistics per stage and command."""
+        return self._aggregate(lambda span: (span.stage, span.command))
+
+    def by_device(self) -> list[dict]:
+        """Statistics per network device."""
+        return self._aggregate(lambda span: (span.device,))
+
+    def print_summary(self, console) -> None:
+        """Prints the p50/p95/max tables to the rich console."""
+
+        if not self.records:
+            return
+
+        from rich import box
+        from rich.table import Table
+
+        for title, rows, key_headers in (
+            ("SSH operations by command", self.by_command(), ("Stage", "Command")),
+            ("SSH operations by device", self.by_device(), ("Device",)),
+        ):
+            table = Table(title=title, box=box.HEAVY_EDGE, show_header=True, header_style="bold")
+            for name in (
+                *key_headers,
+                "Count",
+                "Errors",
+                "Total, s",
+                "p50, s",
+                "p95, s",
+                "Max, s",
+                "Bytes",
+                "Parse p95, s",
+            ):
+                table.add_column(name, justify="left" if name in key_headers else "right")
+
+            for row in rows:
+                table.add_row(
+                    *row["key"],
+                    str(row["count"]),
+                    str(row["errors"]),
+                    f"{row['total']:.3f}",
+                    f"{row['p50']:.3f}",
+                    f"{row['p95']:.3f}",
+                    f"{row['max']:.3f}",
+                    str(row["bytes"]),
+                    f"{row['parse_p95']:.3f}",
+                )
+            console.print(table)
+
+    def export_json(self, path: str) -> None:
+        """Writes the raw spans and the aggregated statistics to the JSON
+        file."""
+
+        trace_d = {
+            "spans": [span.as_dict() for span in self.records],
+            "by_command": [dict(row, key=list(row["key"])) for row in self.by_command()],
+            "by_device": [dict(row, key=list(row["key"])) for row in self.by_device()],
+        }
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump(trace_d, trace_file, indent=2)
+
+
+# Общий трассировщик для всех модулей (выключен по умолчанию)
+tracer: NetTracer = NetTracer()
@@ -0,0 +1,117 @@
+"""Mappers of the NX-OS '| json' command outputs to the dict shapes of the
+ntc-templates TextFSM parsing, so NetHelper returns the same data with
+both backends.
+
+A mapper raises KeyError/TypeError/ValueError when the output does not
+have the expected structure; NetHelper then falls back to TextFSM.
+
+Usage example:
+
+raw_output = ssh_conn.send_command("show cdp neighbors detail | json")
+cdp_neighbors = map_cdp_neighbors_detail(json.loads(raw_output))
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+from typing import Final
+
+from CiscoInterfaceNameConverter.converter import convert_interface
+
+# Состояния и роли STP в NX-OS JSON -> сокращения из текстового вывода
+STP_STATES: Final = {
+    "forwarding": "FWD",
+    "blocking": "BLK",
+    "learning": "LRN",
+    "listening": "LIS",
+    "discarding": "BLK",
+    "broken": "BKN",
+    "disabled": "DIS",
+}
+STP_ROLES: Final = {
+    "root": "Root",
+    "designated": "Desg",
+    "alternate": "Altn",
+    "backup": "Back",
+    "master": "Mstr",
+    "disabled": "Dsbl",
+}
+
+
+def table_rows(output_d: dict, table_name: str) -> list[dict]:
+    """Returns the rows of the NX-OS JSON table.
+
+    NX-OS returns a dict instead of a list when the table has one row.
+    """
+
+    rows = output_d[f"TABLE_{table_name}"][f"ROW_{table_name}"]
+    return rows if isinstance(rows, list) else [rows]
+
+
+def map_interfaces_switchport(output_d: dict) -> dict[str, dict]:
+    """'show interface switchport | json' -> {interface: {"interface", "mode",
+    "trunking_vlans"}}."""
+
+    switchport_d = {}
+    for row in table_rows(output_d, "interface"):
+        switchport_d[row["interface"]] = {
+            "interface": row["interface"],
+            "mode": row["oper_mode"],
+            "trunking_vlans": row["trunk_vlans"],
+        }
+    return switchport_d
+
+
+def map_cdp_neighbors_detail(output_d: dict) -> list[dict]:
+    """'show cdp neighbors detail | json' -> [{"dest_host", "local_port",
+    "remote_port"}]."""
+
+    return [
+        {
+            "dest_host": row["device_id"].split("(")[0],
+            "local_port": row["intf_id"],
+            "remote_port": row.get("port_id", ""),
+        }
+        for row in table_rows(output_d, "cdp_neighbor_detail_info")
+    ]
+
+
+def map_port_channel_summary(output_d: dict) -> list[dict]:
+    """'show port-channel summary | json' -> [{"bundle_iface",
+    "phys_iface"}]."""
+
+    port_channels = []
+    for row in table_rows(output_d, "channel"):
+        members = table_rows(row, "member") if "TABLE_member" in row else []
+        port_channels.append(
+            {
+                "bundle_iface": row["port-channel"],
+                "phys_iface": [member["port"] for member in members],
+            }
+        )
+    return port_channels
+
+
+def map_spanning_tree(output_d: dict) -> list[dict]:
+    """'show spanning-tree vlan X | json' -> [{"vlan_id", "interface", "role",
+    "status", "cost", "port_priority", "port_id", "type"}]."""
+
+    stp_ports = []
+    for tree_row in table_rows(output_d, "tree_inst"):
+        for port_row in table_rows(tree_row, "port"):
+            port_priority, _, port_id = port_row["port_id"].partition(".")
+            stp_ports.append(
+                {
+                    "vlan_id": str(tree_row["tree_inst"]),
+                    "interface": convert_interface(port_row["ifname"], return_short=True),
+                    "role": STP_ROLES[port_row["role"].lower()],
+                    "status": STP_STATES[port_row["state"].lower()],
+                    "cost": str(port_row["cost"]),
+                    "port_priority": port_row.get("prio", port_priority),
+                    "port_id": port_id,
+                    "type": port_row.get("type", ""),
+                }
+            )
+    return stp_ports
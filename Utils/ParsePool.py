@@ -0,0 +1,91 @@
+"""Process pool for the TextFSM parsing of the device outputs.
+
+The SSH thread only fetches the raw text and submits it to the pool; the
+number of outputs waiting for parsing is bounded, so a fast fetch stage
+blocks instead of buffering an unbounded amount of text.
+
+Usage example:
+
+with ParsePool(max_workers=4, max_pending=64) as parse_pool:
+    future = parse_pool.submit(raw_output, "ntc_templates/cisco_ios_show_cdp_neighbors_detail.textfsm")
+    ...
+    parsed_output, parse_time = future.result()
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+
+def parse_output(raw_output: str, textfsm_template: str) -> tuple[list[dict] | str, float]:
+    """Parses the raw output with the precompiled TextFSM template.
+
+    Returns the parsed output (or the raw output if it could not be
+    parsed) and the parse time. Runs both inline and in the pool
+    workers.
+    """
+
+    from Utils.TextFSMRegistry import template_registry
+
+    parse_start = time.perf_counter()
+    parsed_output = template_registry.parse_template(textfsm_template, raw_output)
+    return parsed_output, time.perf_counter() - parse_start
+
+
+class ParsePool:
+    """The class runs the parse stage in worker processes and limits the
+    number of pending outputs."""
+
+    __slots__ = ("max_workers", "max_pending", "__executor", "__pending")
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None) -> None:
+        """ParsePool class __init__."""
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        self.__pending = threading.BoundedSemaphore(self.max_pending)
+
+    def __repr__(self):
+        return f"{self.__class__}: {self.max_workers} workers"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        return False
+
+    def submit(self, raw_output: str, textfsm_template: str) -> Future:
+        """Submits the output for parsing; blocks while max_pending outputs
+        are waiting."""
+
+        # Процессы стартуют при первой отправке, а не при создании пула
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        self.__pending.acquire()
+        try:
+            future = self.__executor.submit(parse_output, raw_output, textfsm_template)
+        except BaseException:
+            self.__pending.release()
+            raise
+        future.add_done_callback(lambda _: self.__pending.release())
+        return future
+
+    def shutdown(self) -> None:
+        """Waits for the pending outputs and stops the worker processes."""
+
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
@@ -0,0 +1,129 @@
+"""Run statistics of the create/apply commands exported as an OpenMetrics
+textfile (e.g. for the node-exporter textfile collector).
+
+Usage example:
+
+from Utils.RunMetrics import run_metrics
+
+run_metrics.begin("apply")
+...
+run_metrics.mark_stage("push")
+run_metrics.inc("commands_sent")
+run_metrics.finish(success=True)
+run_metrics.write_textfile("/var/lib/node_exporter/textfile_collector/vra_apply.prom")
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import time
+from typing import Final, Optional
+
+from Utils.ConfigWriter import ConfigWriter
+
+
+class RunMetrics:
+    """The class collects the run duration, stage durations and counters of
+    one command run."""
+
+    __slots__ = ("command", "started", "duration", "success", "stages", "values", "__stage_started")
+
+    # metric name -> help text; all values are gauges, the file is overwritten by every run
+    METRICS: Final = {
+        "devices": "Number of network devices processed by the run.",
+        "commands_sent": "Number of commands sent to the network devices.",
+        "bytes_pushed": "Number of configuration bytes pushed to the network devices.",
+        "bytes_received": "Number of output bytes received from the network devices.",
+        "errors_detected": "Number of errors detected in the device output by NetErrorDetect.",
+        "reconnects": "Number of SSH sessions re-established during the run.",
+        "stp_wait_seconds": "Time spent waiting for the STP convergence.",
+    }
+    PREFIX: Final = "vra"
+    # Textfile collector node-exporter читает файл от другого пользователя
+    TEXTFILE_MODE: Final = 0o644
+
+    def __init__(self) -> None:
+        """RunMetrics class __init__."""
+        self.begin(None)
+
+    def __repr__(self):
+        return f"{self.__class__}: {self.command}"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def begin(self, command: Optional[str]) -> None:
+        """Resets the statistics and starts measuring the command run."""
+
+        self.command = command
+        self.started = time.time()
+        self.duration = 0.0
+        self.success = False
+        self.stages: dict[str, float] = {}
+        self.values: dict[str, float] = dict.fromkeys(self.METRICS, 0)
+        self.__stage_started = time.perf_counter()
+
+    def mark_stage(self, stage: str) -> None:
+        """Closes the stage which was started at the previous mark (or at the
+        beginning of the run)."""
+
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.__stage_started
+        self.__stage_started = now
+
+    def inc(self, name: str, value: Optional[float] = 1) -> None:
+        """Increases the value of the metric."""
+        self.values[name] += value
+
+    def set(self, name: str, value: float) -> None:
+        """Sets the value of the metric."""
+        self.values[name] = value
+
+    def finish(self, success: bool) -> None:
+        """Stops measuring the command run."""
+
+        self.duration = time.time() - self.started
+        self.success = success
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        return str(int(value)) if float(value).is_integer() else f"{value:.6f}"
+
+    def to_openmetrics(self) -> str:
+        """Returns the statistics in the OpenMetrics text format."""
+
+        command_label = f'command="{self.command}"'
+        lines = []
+
+        def add_metric(name: str, help_text: str, samples: list[tuple[str, float]]) -> None:
+            metric_name = f"{self.PREFIX}_{name}"
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} gauge")
+            for labels, value in samples:
+                lines.append(f"{metric_name}{{{labels}}} {self._format_value(value)}")
+
+        add_metric("run_timestamp_seconds", "Unix time of the run start.", [(command_label, int(self.started))])
+        add_metric("run_success", "1 if the run finished successfully.", [(command_label, int(self.success))])
+        add_metric("run_duration_seconds", "Duration of the run.", [(command_label, self.duration)])
+        add_metric(
+            "stage_duration_seconds",
+            "Duration of the run stage.",
+            [(f'{command_label},stage="{stage}"', duration) for stage, duration in self.stages.items()],
+        )
+        for name, help_text in self.METRICS.items():
+            add_metric(name, help_text, [(command_label, self.values[name])])
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically writes the statistics to the textfile, so the collector
+        never reads a partially written file. The file is world-readable:
+        the collector usually runs as another user."""
+        ConfigWriter().write(path, [self.to_openmetrics()], mode=self.TEXTFILE_MODE)
+
+
+# Общая статистика текущего запуска команды
+run_metrics: RunMetrics = RunMetrics()
@@ -0,0 +1,105 @@
+"""Compact console output of the create/apply commands.
+
+Instead of a table row per interface the console gets aggregated counts
+per section; the rows themselves are kept only when the report file is
+set and are written to it at the end of the run.
+
+Usage example:
+
+run_report = RunReport("vra_report.txt")
+run_report.add_row("STP", ("Device", "Interface", "Status"), ("MS-TEST-0002", "Gi1/0/1", "FWD"))
+run_report.count("STP", "FWD")
+...
+run_report.print_summary(console)
+run_report.write()
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import io
+import pathlib
+from collections import Counter
+from typing import Optional
+
+from Utils.ConfigWriter import ConfigWriter
+
+
+class RunReport:
+    """The class aggregates the per-row check results into counts and keeps
+    the rows for the report file."""
+
+    __slots__ = ("report_path", "counters", "__sections")
+
+    # Ширина таблиц в файле отчета (строки не переносятся)
+    REPORT_WIDTH = 160
+
+    def __init__(self, report_path: Optional[str | pathlib.Path] = None) -> None:
+        """RunReport class __init__."""
+
+        self.report_path = pathlib.Path(report_path) if report_path else None
+        # section -> Counter
+        self.counters: dict[str, Counter] = {}
+        # section -> (headers, [row, ...])
+        self.__sections: dict[str, tuple[tuple[str, ...], list]] = {}
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self.counters)} sections"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    @property
+    def enabled(self) -> bool:
+        """The rows are collected only when the report file is set."""
+        return self.report_path is not None
+
+    def count(self, section: str, key: str, value: Optional[int] = 1) -> None:
+        self.counters.setdefault(section, Counter())[key] += value
+
+    def add_row(self, section: str, headers: tuple[str, ...], row: tuple) -> None:
+        if self.enabled:
+            self.__sections.setdefault(section, (headers, []))[1].append(tuple(map(str, row)))
+
+    def print_summary(self, console) -> None:
+        """Prints one table with the counts of all sections to the rich
+        console."""
+
+        if not self.counters:
+            return
+
+        from rich import box
+        from rich.table import Table
+
+        table = Table(title="Run summary", box=box.HEAVY_EDGE, show_header=True, header_style="bold")
+        for name in ("Section", "Counts"):
+            table.add_column(name, justify="left")
+
+        for section, counter in self.counters.items():
+            table.add_row(section, ", ".join(f"{key}: {value}" for key, value in sorted(counter.items())))
+        console.print(table)
+
+    def write(self) -> None:
+        """Atomically writes the collected rows as plain text tables if the
+        report file is set."""
+
+        if not self.enabled:
+            return
+
+        from rich import box
+        from rich.console import Console
+        from rich.table import Table
+
+        report_buffer = io.StringIO()
+        report_console = Console(file=report_buffer, width=self.REPORT_WIDTH, color_system=None)
+        for section, (headers, rows) in self.__sections.items():
+            table = Table(title=section, box=box.ASCII, show_header=True)
+            for name in headers:
+                table.add_column(name, justify="left")
+            for row in rows:
+                table.add_row(*row)
+            report_console.print(table)
+
+        ConfigWriter().write(self.report_path, [report_buffer.getvalue()])
@@ -35,9 +35,38 @@ from typing import Literal, Optional
 from netmiko import ConnectHandler
 from netmiko.exceptions import NetMikoAuthenticationException, NetMikoTimeoutException
 from netmiko.ssh_autodetect import SSHDetect
+from paramiko.ssh_exception import AuthenticationException, SSHException
 
+from Utils.BastionTunnel import BastionError, BastionTunnel
+from Utils.CircuitBreaker import HostUnreachable, circuit_breaker
+from Utils.NetTracer import tracer
 from Utils.zlogger import zLogger
 
+# Ошибки подключения, которые учитывает предохранитель
+CONNECTION_ERRORS = (
+    NetMikoTimeoutException,
+    SSHException,
+    BastionError,
+    OSError,
+)
+
+# Ошибки аутентификации: устройство доступно, неверны учетные данные (предохранитель их не учитывает)
+AUTHENTICATION_ERRORS = (
+    NetMikoAuthenticationException,
+    AuthenticationException,
+)
+
+
+class AuthenticationFailed(Exception):
+    """An exception is generated when the device rejected the credentials.
+    The host is reachable, so the circuit breaker does not count it."""
+
+    def __init__(self, *args):
+        self.message = args[0] if args else "Undefined error."
+
+    def __str__(self):
+        return f"Error: {self.message}"
+
 
 class CheckCredentials:
     """Data descriptor for checking credentials."""
@@ -81,6 +110,7 @@ class SSHConnect:
         "ssh_conn",
         "log_to",
         "logger",
+        "bastion",
     )
 
     username = CheckCredentials()
@@ -94,9 +124,12 @@ class SSHConnect:
         device_type: Optional[str] = None,
         port: Optional[int] = 22,
         log_to: Optional[Literal["console", "rich_console", "file", "all", "all"]] = "file",
+        bastion: Optional[BastionTunnel] = None,
     ) -> None:
         """SSHConnect class __init__."""
 
+        # Через бастион устройство подключается каналом direct-tcpip, имя разрешается на бастионе
+        self.bastion = bastion
         self.netdev_host = netdev_host
         self.__username = username
         self.__password = password
@@ -119,17 +152,29 @@ class SSHConnect:
     @netdev_host.setter
     def netdev_host(self, netdev_host):
         """Setter for network device hostname."""
-        self._verify_netdev_host(netdev_host)
+        if self.bastion is None:
+            self._verify_netdev_host(netdev_host)
+        elif not isinstance(netdev_host, str):
+            raise TypeError("The network device hostname value must be a string.")
         self._netdev_host = netdev_host
 
     @staticmethod
     def _verify_netdev_host(netdev_host: str) -> None:
         """The method checks the validity of the dns record if it is passed as
-        an argument."""
+        an argument.
+
+        Raises HostUnreachable (the failure is counted by the circuit
+        breaker) if the name is not resolved.
+        """
         if not isinstance(netdev_host, str):
             raise TypeError("The network device hostname value must be a string.")
 
-        netdev_host_iр = socket.gethostbyname(netdev_host)
+        with tracer.span(netdev_host, "gethostbyname", stage="dns"):
+            try:
+                netdev_host_iр = socket.gethostbyname(netdev_host)
+            except socket.gaierror as error:
+                circuit_breaker.record_failure(netdev_host, f"{error.__class__.__name__}: {error.strerror}")
+                raise HostUnreachable(f"DNS name {netdev_host} could not be resolved ({error.strerror}).") from error
         ipaddress.ip_interface(netdev_host_iр)
 
     @property
@@ -177,27 +222,7 @@ class SSHConnect:
             raise KeyError(f"[{obj}][{event}] - Incorrect event logging key.")
 
     def __enter__(self):
-        if self.device_type:
-            device_type = self.device_type
-        else:
-            device_type = self.get_netdev_os()
-
-        ssh_conn_params = {
-            "device_type": device_type,
-            "host": self.netdev_host,
-            "username": self.__username,
-            "password": self.__password,
-            "port": self.port,
-            "session_log": self.session_log,
-            "fast_cli": False,
-        }
-
-        self.ssh_conn = ConnectHandler(**ssh_conn_params)
-
-        if self.ssh_conn.is_alive():
-            self.__loggger_helper("ssh", "success", self.log_to)
-
-        return self.ssh_conn
+        return self.connect()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.ssh_conn.check_config_mode():
@@ -223,32 +248,61 @@ class SSHConnect:
             "session_log": self.session_log,
             "fast_cli": False,
         }
+        if self.bastion is not None:
+            autodetect_ssh_conn_params["sock"] = self.bastion.open_channel(self.netdev_host, self.port)
 
-        ssh_conn = SSHDetect(**autodetect_ssh_conn_params)
-        netdev_os_best_match = ssh_conn.autodetect()
-        ssh_conn.connection.disconnect()
+        with tracer.span(self.netdev_host, "SSHDetect", stage="autodetect"):
+            ssh_conn = SSHDetect(**autodetect_ssh_conn_params)
+            netdev_os_best_match = ssh_conn.autodetect()
+            ssh_conn.connection.disconnect()
 
         return netdev_os_best_match
 
     def connect(self):
-        """Establishes a SSH connection to the device and returns it."""
-
-        if self.device_type:
-            device_type = self.device_type
-        else:
-            device_type = self.get_netdev_os()
-
-        ssh_conn_params = {
-            "device_type": device_type,
-            "host": self.netdev_host,
-            "username": self.__username,
-            "password": self.__password,
-            "port": self.port,
-            "session_log": self.session_log,
-            "fast_cli": False,
-        }
-
-        self.ssh_conn = ConnectHandler(**ssh_conn_params)
+        """Establishes a SSH connection to the device and returns it.
+
+        Raises HostUnreachable if the host is skipped by the circuit
+        breaker or the connection failed, AuthenticationFailed if the
+        credentials were rejected.
+        """
+
+        # Через бастион TCP-проверку выполнить нельзя, ее заменяет открытие канала
+        circuit_breaker.check(self.netdev_host, self.port, tcp_precheck=self.bastion is None)
+
+        try:
+            if self.device_type:
+                device_type = self.device_type
+            else:
+                device_type = self.get_netdev_os()
+
+            ssh_conn_params = {
+                "device_type": device_type,
+                "host": self.netdev_host,
+                "username": self.__username,
+                "password": self.__password,
+                "port": self.port,
+                "session_log": self.session_log,
+                "fast_cli": False,
+            }
+            if self.bastion is not None:
+                ssh_conn_params["sock"] = self.bastion.open_channel(self.netdev_host, self.port)
+
+            with tracer.span(self.netdev_host, "ConnectHandler", stage="login"):
+                self.ssh_conn = ConnectHandler(**ssh_conn_params)
+
+        except AUTHENTICATION_ERRORS as error:
+            # Неверный пароль не признак недоступности устройства: предохранитель не трогаем
+            raise AuthenticationFailed(
+                f"Authentication to {self.netdev_host} failed, check the username and password."
+            ) from error
+        except CONNECTION_ERRORS as error:
+            error_message = str(error).strip().splitlines()[0] if str(error).strip() else ""
+            circuit_breaker.record_failure(self.netdev_host, f"{error.__class__.__name__}: {error_message}")
+            raise HostUnreachable(
+                f"SSH connection with {self.netdev_host} failed ({error.__class__.__name__})."
+            ) from error
+
+        circuit_breaker.record_success(self.netdev_host)
 
         if self.ssh_conn.is_alive():
             self.__loggger_helper("ssh", "success", self.log_to)
@@ -0,0 +1,165 @@
+"""Reachability of the network devices in several vlan scopes crawled in one
+pass.
+
+The crawler visits every device once and collects the interfaces of all
+scopes; a device belongs to the topology of a scope when it is reached
+from the root device over the interfaces of that scope (exactly as a
+separate crawl per scope would find it). The device data of a scope is
+handed over by the on_reached callback as soon as the device is known to
+be reachable and is kept only while it is not.
+
+crawl() is the one breadth-first crawler of the create command and the
+daemon: it visits every device once, skips the unreachable ones and never
+queues a device as its own neighbor.
+
+Usage example:
+
+scope_discovery = ScopeDiscovery(["SCOPE_VRA", "SCOPE_MGMT"], "MS-TEST-0001", on_reached=print)
+scope_discovery.add_device(
+    "MS-TEST-0001",
+    {"SCOPE_VRA": {"Gi1/0/1": {...}}, "SCOPE_MGMT": {}},
+    {"SCOPE_VRA": {"MS-TEST-0002"}, "SCOPE_MGMT": set()},
+)
+
+def collect_device(netdev):
+    with prewarmer.session(netdev) as ssh_conn:
+        net_helper = NetHelper(ssh_conn)
+        scope_intfs_d = net_helper.get_intf_in_scopes_by_stp_instance({"SCOPE_VRA": 100, "SCOPE_MGMT": 200})
+        return scope_intfs_d, cdp_neighbors_by_intf(net_helper, scope_intfs_d)
+
+scope_discovery.crawl(collect_device, on_skipped=lambda netdev, unreachable: print(netdev, unreachable.message))
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+from collections import deque
+from typing import Callable, Optional
+
+from Utils.CircuitBreaker import HostUnreachable
+
+
+def cdp_neighbors_by_intf(net_helper, scope_intfs_d: dict[str, dict]) -> dict[str, list[str]]:
+    """Returns interface -> CDP neighbors for the interfaces of all scopes,
+    the neighbors are requested once per interface."""
+
+    return {
+        intf: net_helper.get_cdp_neigbors_by_intf(intf)
+        for intf in dict.fromkeys(intf for intfs_d in scope_intfs_d.values() for intf in intfs_d)
+    }
+
+
+class ScopeDiscovery:
+    """The class tracks which crawled devices are reachable in every vlan
+    scope."""
+
+    __slots__ = ("scopes", "root", "on_reached", "reached", "__marked", "__pending")
+
+    def __init__(self, scopes: list[str], root: str, on_reached: Optional[Callable] = None) -> None:
+        """ScopeDiscovery class __init__.
+
+        on_reached(scope, device, interfaces) is called once per scope for
+        every reachable device.
+        """
+
+        self.scopes = list(scopes)
+        self.root = root
+        self.on_reached = on_reached
+        # scope -> устройства, данные которых переданы в on_reached
+        self.reached: dict[str, set[str]] = {scope: set() for scope in self.scopes}
+        # scope -> устройства, до которых есть путь по интерфейсам скоупа (обработанные и еще нет)
+        self.__marked: dict[str, set[str]] = {scope: {root} for scope in self.scopes}
+        # device -> scope -> (interfaces, neighbors) для скоупов, в которых устройство пока недостижимо
+        self.__pending: dict[str, dict[str, tuple[dict, set[str]]]] = {}
+
+    def __repr__(self):
+        return f"{self.__class__}: {', '.join(f'{scope} {len(self.reached[scope])}' for scope in self.scopes)}"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def add_device(self, device: str, scope_intfs: dict[str, dict], scope_neighbors: dict[str, set[str]]) -> None:
+        """Adds the crawled device: its interfaces and the CDP neighbors behind
+        them per scope."""
+
+        for scope in self.scopes:
+            intfs_d = scope_intfs.get(scope, {})
+            neighbors = scope_neighbors.get(scope, set())
+            if device in self.__marked[scope]:
+                self._reach(scope, device, intfs_d, neighbors)
+            else:
+                self.__pending.setdefault(device, {})[scope] = (intfs_d, neighbors)
+
+    def _reach(self, scope: str, device: str, intfs_d: dict, neighbors: set[str]) -> None:
+        """Hands over the device and the already crawled devices which became
+        reachable through it."""
+
+        reach_stack = [(device, intfs_d, neighbors)]
+        while reach_stack:
+            device, intfs_d, neighbors = reach_stack.pop()
+            self.reached[scope].add(device)
+            if self.on_reached is not None:
+                self.on_reached(scope, device, intfs_d)
+
+            for neighbor in neighbors:
+                if neighbor in self.__marked[scope]:
+                    continue
+                self.__marked[scope].add(neighbor)
+                pending_d = self.__pending.get(neighbor)
+                if pending_d and scope in pending_d:
+                    reach_stack.append((neighbor, *pending_d.pop(scope)))
+                    if not pending_d:
+                        del self.__pending[neighbor]
+
+    def crawl(
+        self,
+        collect_device: Callable,
+        on_visit: Optional[Callable] = None,
+        on_queued: Optional[Callable] = None,
+        on_skipped: Optional[Callable] = None,
+    ) -> list[str]:
+        """Crawls the network breadth-first from the root device and returns
+        the visited devices.
+
+        collect_device(device) returns (scope -> interfaces, interface ->
+        CDP neighbors) and raises HostUnreachable for a device which is
+        skipped. on_visit(device, number, queued), on_queued(device) and
+        on_skipped(device, unreachable) report the progress.
+        """
+
+        net_todo: deque[str] = deque([self.root])
+        # Устройства, которые уже в очереди или обработаны (каждое посещается один раз)
+        net_seen: set[str] = {self.root}
+        net_done: list[str] = []
+
+        while net_todo:
+            device = net_todo.popleft()
+            if on_visit is not None:
+                on_visit(device, len(net_done) + 1, len(net_todo))
+
+            try:
+                scope_intfs, intf_neighbors = collect_device(device)
+            except HostUnreachable as unreachable:
+                if on_skipped is not None:
+                    on_skipped(device, unreachable)
+            else:
+                scope_neighbors = {
+                    scope: {neighbor for intf in intfs_d for neighbor in intf_neighbors.get(intf, ())} - {device}
+                    for scope, intfs_d in scope_intfs.items()
+                }
+                self.add_device(device, scope_intfs, scope_neighbors)
+
+                for neighbor in dict.fromkeys(
+                    neighbor for intf in intf_neighbors for neighbor in intf_neighbors[intf] if neighbor != device
+                ):
+                    if neighbor not in net_seen:
+                        net_seen.add(neighbor)
+                        net_todo.append(neighbor)
+                        if on_queued is not None:
+                            on_queued(neighbor)
+
+            net_done.append(device)
+
+        return net_done
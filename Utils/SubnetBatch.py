@@ -0,0 +1,217 @@
+"""Classes for reading and validating a batch of IPv4 subnets for VRA
+networks.
+
+Usage example:
+
+with open("networks.txt") as networks:
+    subnet_batch = SubnetBatch.from_file(networks)
+
+for subnet_record in subnet_batch:
+    print(subnet_record.with_prefixlen, subnet_record.gateway_and_netmask)
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+from array import array
+from typing import Iterable, Iterator, NamedTuple, TextIO
+
+# RFC1918 address space as (network, netmask) pairs
+RFC1918_NETWORKS: tuple[tuple[int, int], ...] = (
+    (0x0A000000, 0xFF000000),  # 10.0.0.0/8
+    (0xAC100000, 0xFFF00000),  # 172.16.0.0/12
+    (0xC0A80000, 0xFFFF0000),  # 192.168.0.0/16
+)
+
+
+class SubnetValidationError(ValueError):
+    """An exception is generated when the subnet batch contains incorrect
+    networks."""
+
+    def __init__(self, *args):
+        self.message = args[0] if args else "Undefined error."
+
+    def __str__(self):
+        return f"Error: {self.message}"
+
+
+def int_to_ipv4(ip_int: int) -> str:
+    """Converts an integer into a dotted IPv4 address string."""
+    return f"{ip_int >> 24 & 0xFF}.{ip_int >> 16 & 0xFF}.{ip_int >> 8 & 0xFF}.{ip_int & 0xFF}"
+
+
+def prefix_len_to_netmask(prefix_len: int) -> int:
+    """Converts a prefix length into an integer netmask."""
+    return (0xFFFFFFFF << (32 - prefix_len)) & 0xFFFFFFFF
+
+
+class SubnetRecord(NamedTuple):
+    """Compact integer representation of the VRA subnet."""
+
+    network: int
+    prefix_len: int
+    netmask: int
+    gateway: int
+
+    @classmethod
+    def from_string(cls, subnet_with_prefix_len: str) -> "SubnetRecord":
+        """Parses and fully validates a single network address with the prefix
+        length."""
+        subnet_batch = SubnetBatch.from_lines([subnet_with_prefix_len])
+        return subnet_batch[0]
+
+    @property
+    def with_prefixlen(self) -> str:
+        """Network address with the prefix length, e.g. '192.168.1.0/24'."""
+        return f"{int_to_ipv4(self.network)}/{self.prefix_len}"
+
+    @property
+    def network_and_netmask(self) -> str:
+        """Network address and network mask, e.g. '192.168.1.0
+        255.255.255.0'."""
+        return f"{int_to_ipv4(self.network)} {int_to_ipv4(self.netmask)}"
+
+    @property
+    def gateway_and_netmask(self) -> str:
+        """Gateway address and gateway mask, e.g. '192.168.1.1
+        255.255.255.0'."""
+        return f"{int_to_ipv4(self.gateway)} {int_to_ipv4(self.netmask)}"
+
+
+class SubnetBatch:
+    """The class reads IPv4 subnets once, stores them as integer columns and
+    validates the whole batch in one pass."""
+
+    __slots__ = ("lines", "networks", "prefix_lens", "parse_errors")
+
+    def __init__(self) -> None:
+        """SubnetBatch class __init__."""
+
+        # Исходные строки (нужны только для сообщений об ошибках)
+        self.lines: list[str] = []
+        # Колонки с адресом сети и длиной префикса
+        self.networks = array("L")
+        self.prefix_lens = array("B")
+        # Номера строк, которые не удалось разобрать
+        self.parse_errors: list[int] = []
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self)} subnets"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def __len__(self) -> int:
+        return len(self.networks)
+
+    def __getitem__(self, index: int) -> SubnetRecord:
+        return self._record(self.networks[index], self.prefix_lens[index])
+
+    def __iter__(self) -> Iterator[SubnetRecord]:
+        for network, prefix_len in zip(self.networks, self.prefix_lens):
+            yield self._record(network, prefix_len)
+
+    @staticmethod
+    def _record(network: int, prefix_len: int) -> SubnetRecord:
+        """Builds the subnet record from the integer columns."""
+        netmask = prefix_len_to_netmask(prefix_len)
+        gateway = network + 1 if prefix_len < 32 else network
+        return SubnetRecord(network, prefix_len, netmask, gateway)
+
+    @staticmethod
+    def _parse_subnet(subnet_with_prefix_len: str) -> tuple[int, int]:
+        """Parses the network address with the prefix length into integers
+        without validating the address space."""
+
+        address, sep, prefix_len_str = subnet_with_prefix_len.partition("/")
+        if not sep:
+            prefix_len_str = "32"
+
+        octets = address.split(".")
+        if len(octets) != 4 or not prefix_len_str.isdigit() or len(prefix_len_str) > 2:
+            raise ValueError
+
+        network = 0
+        for octet in octets:
+            if not octet.isdigit() or len(octet) > 3 or (len(octet) > 1 and octet[0] == "0"):
+                raise ValueError
+            octet_int = int(octet)
+            if octet_int > 255:
+                raise ValueError
+            network = network << 8 | octet_int
+
+        prefix_len = int(prefix_len_str)
+        if prefix_len > 32:
+            raise ValueError
+
+        return network, prefix_len
+
+    def append(self, subnet_with_prefix_len: str) -> None:
+        """Parses the line and appends it to the integer columns."""
+
+        self.lines.append(subnet_with_prefix_len)
+        try:
+            network, prefix_len = self._parse_subnet(subnet_with_prefix_len)
+        except ValueError:
+            self.parse_errors.append(len(self.lines) - 1)
+            network, prefix_len = 0, 0
+
+        self.networks.append(network)
+        self.prefix_lens.append(prefix_len)
+
+    def validate(self) -> "SubnetBatch":
+        """The method checks the format, RFC1918 address space, strict host
+        bits and duplicates of the whole batch in one pass."""
+
+        errors: list[str] = [f"{self.lines[i]} does not appear to be an IPv4 network." for i in self.parse_errors]
+        parse_errors = set(self.parse_errors)
+        seen_networks: dict[int, int] = {}
+
+        for index, (network, prefix_len) in enumerate(zip(self.networks, self.prefix_lens)):
+            if index in parse_errors:
+                continue
+
+            subnet = self.lines[index]
+            netmask = prefix_len_to_netmask(prefix_len)
+
+            if network & ~netmask & 0xFFFFFFFF:
+                errors.append(f"{subnet} has host bits set.")
+                continue
+
+            if not any(
+                network & rfc_netmask == rfc_network and netmask & rfc_netmask == rfc_netmask
+                for rfc_network, rfc_netmask in RFC1918_NETWORKS
+            ):
+                errors.append(f"{subnet} isn't in the RFС1918 address space.")
+                continue
+
+            key = network << 6 | prefix_len
+            if key in seen_networks:
+                errors.append(f"{subnet} is duplicated (first seen as {self.lines[seen_networks[key]]}).")
+                continue
+            seen_networks[key] = index
+
+        if errors:
+            raise SubnetValidationError("\n".join(errors))
+
+        return self
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "SubnetBatch":
+        """Reads the networks from any iterable of lines and validates them,
+        skipping empty lines."""
+
+        subnet_batch = cls()
+        for line in lines:
+            line = line.strip()
+            if line:
+                subnet_batch.append(line)
+
+        return subnet_batch.validate()
+
+    @classmethod
+    def from_file(cls, networks: TextIO) -> "SubnetBatch":
+        """Streams the networks from the text file once and validates them."""
+        return cls.from_lines(networks)
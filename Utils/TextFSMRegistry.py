@@ -0,0 +1,150 @@
+"""Registry of the precompiled TextFSM templates.
+
+All templates of the ntc_templates directory are read and compiled once;
+every parse runs on a clone of the compiled FSM, so the registry can be
+shared between threads.
+
+Template file names follow the ntc-templates convention
+'<platform>_<command>.textfsm', e.g.
+'cisco_ios_show_cdp_neighbors_detail.textfsm' is registered as
+('cisco_ios', 'show cdp neighbors detail').
+
+Usage example:
+
+from Utils.TextFSMRegistry import template_registry
+
+parsed_output = template_registry.parse("cisco_ios", "show cdp neighbors detail", raw_output)
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import copy
+import pathlib
+import re
+import threading
+from typing import NamedTuple, Optional
+
+import textfsm
+
+TEMPLATES_DIR = pathlib.Path(__file__).resolve().parent.parent / "ntc_templates"
+
+
+class TemplateNotFound(Exception):
+    """An exception is generated when there is no template for the platform
+    and command."""
+
+    def __init__(self, *args):
+        self.message = args[0] if args else "Undefined error."
+
+    def __str__(self):
+        return f"Error: {self.message}"
+
+
+class TemplateKey(NamedTuple):
+    """Platform (netmiko device type) and full command of the template."""
+
+    platform: str
+    command: str
+
+
+class TextFSMRegistry:
+    """The class compiles the TextFSM templates once and parses the outputs
+    through cloned FSM instances."""
+
+    __slots__ = ("templates_dir", "__templates", "__paths", "__lock")
+
+    FILENAME_RE = re.compile(r"^(?P<platform>[a-z0-9]+_[a-z0-9]+)_(?P<command>(?:show|display)_.+)\.textfsm$")
+
+    def __init__(self, templates_dir: Optional[str | pathlib.Path] = TEMPLATES_DIR) -> None:
+        """TextFSMRegistry class __init__."""
+
+        self.templates_dir = pathlib.Path(templates_dir)
+        self.__templates: Optional[dict[TemplateKey, textfsm.TextFSM]] = None
+        self.__paths: dict[str, TemplateKey] = {}
+        self.__lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__}: {self.templates_dir}"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    @classmethod
+    def key_from_filename(cls, filename: str) -> Optional[TemplateKey]:
+        """Returns the template key by the ntc-templates file name."""
+
+        filename_match = cls.FILENAME_RE.match(filename)
+        if not filename_match:
+            return None
+        return TemplateKey(filename_match.group("platform"), filename_match.group("command").replace("_", " "))
+
+    def _load(self) -> dict[TemplateKey, textfsm.TextFSM]:
+        """Compiles all templates of the directory (once, on the first use)."""
+
+        with self.__lock:
+            if self.__templates is None:
+                templates: dict[TemplateKey, textfsm.TextFSM] = {}
+                for template_path in sorted(self.templates_dir.glob("*.textfsm")):
+                    template_key = self.key_from_filename(template_path.name)
+                    if template_key is None:
+                        continue
+                    with open(template_path, "r", encoding="utf-8") as template_file:
+                        templates[template_key] = textfsm.TextFSM(template_file)
+                    self.__paths[template_path.name] = template_key
+                self.__templates = templates
+
+        return self.__templates
+
+    def keys(self) -> list[TemplateKey]:
+        return list(self._load())
+
+    def get(self, platform: str, command: str) -> textfsm.TextFSM:
+        """Returns a clone of the compiled FSM ready for parsing."""
+
+        try:
+            prototype = self._load()[TemplateKey(platform, command)]
+        except KeyError:
+            raise TemplateNotFound(f"There is no TextFSM template for '{command}' on {platform}.") from None
+
+        # Правила состояний неизменяемы и используются всеми копиями, копируются только переменные
+        memo = {id(prototype.states): prototype.states, id(prototype.state_list): prototype.state_list}
+        for state_rules in prototype.states.values():
+            memo[id(state_rules)] = state_rules
+        fsm = copy.deepcopy(prototype, memo)
+        fsm.Reset()
+        return fsm
+
+    def key_by_path(self, template_path: str | pathlib.Path) -> TemplateKey:
+        """Returns the template key by the template file path."""
+
+        self._load()
+        template_name = pathlib.PurePath(template_path).name
+        if template_name not in self.__paths:
+            raise TemplateNotFound(f"The TextFSM template '{template_path}' is not registered.")
+        return self.__paths[template_name]
+
+    def parse(self, platform: str, command: str, raw_output: str) -> list[dict] | str:
+        """Parses the raw output.
+
+        Returns the list of dicts with lowercase keys or the raw output
+        if nothing was parsed (same as netmiko use_textfsm=True).
+        """
+
+        fsm = self.get(platform, command)
+        rows = fsm.ParseText(raw_output)
+        if not rows:
+            return raw_output
+
+        header = [column.lower() for column in fsm.header]
+        return [dict(zip(header, row)) for row in rows]
+
+    def parse_template(self, template_path: str | pathlib.Path, raw_output: str) -> list[dict] | str:
+        """Parses the raw output with the template given by its file path."""
+        return self.parse(*self.key_by_path(template_path), raw_output)
+
+
+# Общий реестр шаблонов (в каждом процессе свой, шаблоны компилируются при первом разборе)
+template_registry: TextFSMRegistry = TextFSMRegistry()
@@ -0,0 +1,155 @@
+"""Threaded adapter exposing SSHConnect to asyncio code.
+
+This is not an asynchronous SSH transport: netmiko has none, and every
+session still needs its own OS thread while a call on it is in flight.
+The blocking netmiko calls run in one bounded thread pool shared by all
+connections (SSH_WORKERS threads), so an event loop may hold sessions to
+many devices, but at most SSH_WORKERS of them do I/O at the same time and
+the rest wait for a free thread. Calls on one connection are serialized,
+netmiko connections are not thread-safe.
+
+Usage example:
+
+async def sh_clock(netdev):
+    async with ThreadedSSHConnect(netdev, "user", "password", log_to="all") as ssh:
+        return await ssh.send_command("sh clock")
+
+async def main():
+    return await asyncio.gather(*(sh_clock(netdev) for netdev in netdevs))
+
+asyncio.run(main())
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Literal, Optional
+
+from Utils.BastionTunnel import BastionTunnel
+from Utils.SSHConnect import CheckCredentials, SSHConnect
+
+# Общий пул потоков для блокирующих вызовов netmiko
+SSH_WORKERS = 32
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def ssh_executor(max_workers: Optional[int] = None) -> ThreadPoolExecutor:
+    """Returns the shared thread pool for the netmiko calls (created on the
+    first use)."""
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers or SSH_WORKERS, thread_name_prefix="ssh")
+    return _executor
+
+
+class SessionNotConnected(Exception):
+    """An exception is generated when the session is used before connect()."""
+
+    def __init__(self, *args):
+        self.message = args[0] if args else "Undefined error."
+
+    def __str__(self):
+        return f"Error: {self.message}"
+
+
+class ThreadedSSHConnect:
+    """The class establishes a ssh session on the network device and exposes
+    awaitable netmiko methods executed in the shared thread pool."""
+
+    __slots__ = ("netdev_host", "device_type", "ssh", "ssh_conn", "executor", "connect_factory", "__lock")
+
+    def __init__(
+        self,
+        netdev_host: str,
+        username: str,
+        password: str,
+        device_type: Optional[str] = None,
+        port: Optional[int] = 22,
+        log_to: Optional[Literal["console", "rich_console", "file", "all", "all"]] = "file",
+        executor: Optional[ThreadPoolExecutor] = None,
+        bastion: Optional[BastionTunnel] = None,
+        connect_factory: Optional[Callable] = None,
+    ) -> None:
+        """ThreadedSSHConnect class __init__.
+
+        connect_factory(host, device_type) replaces the default SSHConnect,
+        it returns a not connected SSHConnect.
+        """
+
+        # Проверки учетных данных и типа устройства те же, что у SSHConnect (DNS проверяется при connect)
+        CheckCredentials._verify_credentials(username)
+        CheckCredentials._verify_credentials(password)
+        SSHConnect._verify_device_type(device_type)
+
+        self.netdev_host = netdev_host
+        self.device_type = device_type
+        self.ssh: Optional[SSHConnect] = None
+        self.ssh_conn = None
+        self.executor = executor or ssh_executor()
+        self.connect_factory = connect_factory or (
+            lambda host, device_type: SSHConnect(host, username, password, device_type, port, log_to, bastion)
+        )
+        self.__lock = asyncio.Lock()
+
+    def __repr__(self):
+        return f"{self.__class__}: {self.netdev_host}"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+        return False
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Runs the blocking call of this connection in the thread pool."""
+
+        async with self.__lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    @property
+    def connection(self):
+        """The current netmiko connection (a new object after every
+        connect())."""
+
+        if self.ssh_conn is None:
+            raise SessionNotConnected(f"{self.netdev_host} - the SSH session is not connected.")
+        return self.ssh_conn
+
+    def _connect(self):
+        self.ssh = self.connect_factory(self.netdev_host, self.device_type)
+        return self.ssh.connect()
+
+    async def connect(self):
+        """Establishes a SSH connection to the device (DNS check, OS
+        autodetect, login and session preparation)."""
+
+        self.ssh_conn = await self.run(self._connect)
+        self.device_type = self.ssh_conn.device_type
+        return self.ssh_conn
+
+    async def disconnect(self) -> None:
+        """Disconnects the SSH connection to the device."""
+
+        if self.ssh is not None and self.ssh_conn is not None:
+            await self.run(self.ssh.disconnect)
+
+    async def send_command(self, command_string: str, **kwargs) -> str | list:
+        return await self.run(self.connection.send_command, command_string, **kwargs)
+
+    async def send_config_set(self, config_commands: str | list[str], **kwargs) -> str:
+        return await self.run(self.connection.send_config_set, config_commands, **kwargs)
@@ -0,0 +1,730 @@
+"""Local VRA daemon with a JSON API over localhost HTTP.
+
+The daemon keeps everything a cold vra_cli run pays for between the
+requests: imported modules, compiled TextFSM and jinja2 templates, the SSH
+sessions and the device types of the network devices, and the discovered
+topology of the vlan scope (until topology_ttl expires). create, apply and
+verify requests are queued as jobs and executed one by one by a worker
+thread (netmiko sessions are not thread-safe); the progress of a job is
+streamed as NDJSON events. Finished jobs are kept for job_ttl seconds and
+at most max_jobs of them (the generated files stay on disk). Every create
+job writes into a new config_dir/<job id> directory.
+
+The API listens on the loopback interface only and every request needs
+the token the daemon writes to <cache_dir>/daemon.token (mode 0600, so
+only the daemon user can read it): 'Authorization: Bearer <token>'. The
+apply/verify jobs read the plans only from the daemon configuration
+directory.
+
+API:
+
+GET  /health                      - daemon state
+GET  /jobs                        - all jobs
+POST /jobs                        - {"kind": "create" | "apply" | "verify", "params": {...}} -> 202 job
+GET  /jobs/<job_id>               - job state and result
+GET  /jobs/<job_id>/events?since= - NDJSON progress events until the job is finished
+
+Usage example:
+
+vra_daemon = VraDaemon("user", "password", gateway="MS-TEST-0001", scope_name="SCOPE_VRA", scope_vlan_ids=[100, 101])
+vra_daemon.serve_forever("127.0.0.1", 8765)
+
+VRA_TOKEN="Authorization: Bearer $(cat .vra_cache/daemon.token)"
+curl -s -H "$VRA_TOKEN" -XPOST 127.0.0.1:8765/jobs -d '{"kind": "create", "params": {"networks": ["10.1.0.0/24"],
+     "environment": "test", "start_vlan_id": 500, "start_rd": 10}}'
+curl -sN -H "$VRA_TOKEN" 127.0.0.1:8765/jobs/<job_id>/events
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import hmac
+import ipaddress
+import json
+import pathlib
+import queue
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Final, Iterator, Optional
+from urllib.parse import parse_qs, urlparse
+
+from Utils.ApplyPlan import ApplyPlan, ExceptionApplyPlan
+from Utils.CircuitBreaker import HostUnreachable
+from Utils.ConfigWriter import ConfigWriter
+from Utils.GenerationCache import GenerationCache
+from Utils.NetErrorDetect import NetErrorDetect
+from Utils.NetHelper import NetHelper
+from Utils.ScopeDiscovery import ScopeDiscovery, cdp_neighbors_by_intf
+from Utils.SSHConnect import AuthenticationFailed, SSHConnect
+from Utils.SubnetBatch import SubnetBatch, SubnetValidationError
+from Utils.TextFSMRegistry import template_registry
+from Utils.zlogger import zLogger
+from VRA import Vra, VraPreview, VraTest, VraTopology
+
+QUEUED: Final = "queued"
+RUNNING: Final = "running"
+DONE: Final = "done"
+FAILED: Final = "failed"
+
+
+class DaemonError(Exception):
+    """An exception is generated when the job request is incorrect or the
+    job cannot be completed."""
+
+    def __init__(self, *args):
+        self.message = args[0] if args else "Undefined error."
+
+    def __str__(self):
+        return f"Error: {self.message}"
+
+
+class VraJob:
+    """One create/apply/verify request with its progress events."""
+
+    __slots__ = ("job_id", "kind", "params", "status", "result", "error", "created", "finished", "__events", "__cond")
+
+    def __init__(self, job_id: str, kind: str, params: dict) -> None:
+        """VraJob class __init__."""
+
+        self.job_id = job_id
+        self.kind = kind
+        self.params = params
+        self.status = QUEUED
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.__events: list[dict] = []
+        self.__cond = threading.Condition()
+
+    def __repr__(self):
+        return f"{self.__class__}: {self.job_id} {self.kind} {self.status}"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def emit(self, event: str, **fields) -> None:
+        """Adds the progress event and wakes up the event streams."""
+
+        with self.__cond:
+            self.__events.append({"seq": len(self.__events), "time": round(time.time(), 3), "event": event, **fields})
+            self.__cond.notify_all()
+
+    def set_status(self, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        # Событие добавляется под той же блокировкой, чтобы поток событий не завершился раньше него
+        with self.__cond:
+            self.status = status
+            self.result = result
+            self.error = error
+            if self.is_finished:
+                self.finished = time.time()
+            self.emit("status", status=status, error=error)
+
+    def events(self, since: Optional[int] = 0, poll_timeout: Optional[float] = 15.0) -> Iterator[Optional[dict]]:
+        """Yields the events starting from the 'since' number until the job is
+        finished; None is yielded when there were no events for
+        poll_timeout seconds (keepalive for the stream)."""
+
+        seq = since
+        while True:
+            with self.__cond:
+                if seq >= len(self.__events) and not self.is_finished:
+                    self.__cond.wait(poll_timeout)
+                new_events = self.__events[seq:]
+                finished = self.is_finished
+            if not new_events and not finished:
+                yield None
+            yield from new_events
+            seq += len(new_events)
+            if finished and seq >= len(self.__events):
+                return
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.job_id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+            "events": len(self.__events),
+        }
+
+
+class DevicePool:
+    """The class keeps the SSH sessions and the device types of the network
+    devices between the jobs."""
+
+    __slots__ = ("connect_factory", "device_types", "hits", "misses", "__sessions")
+
+    def __init__(self, connect_factory: Callable) -> None:
+        """DevicePool class __init__.
+
+        connect_factory(host, device_type) returns a not connected
+        SSHConnect.
+        """
+
+        self.connect_factory = connect_factory
+        # host -> device_type, автоопределение ОС выполняется один раз на устройство
+        self.device_types: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        # host -> (SSHConnect, ssh_conn)
+        self.__sessions: dict[str, tuple] = {}
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self.__sessions)} sessions"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def __len__(self) -> int:
+        return len(self.__sessions)
+
+    def get(self, host: str):
+        """Returns the alive session to the device in the exec mode, a broken
+        or missing session is (re)established."""
+
+        ssh, ssh_conn = self.__sessions.get(host, (None, None))
+        if ssh_conn is not None and ssh_conn.is_alive():
+            self.hits += 1
+            if ssh_conn.check_config_mode():
+                ssh_conn.exit_config_mode()
+            return ssh_conn
+
+        self.misses += 1
+        ssh = self.connect_factory(host, self.device_types.get(host))
+        ssh_conn = ssh.connect()
+        self.device_types[host] = ssh_conn.device_type
+        self.__sessions[host] = (ssh, ssh_conn)
+        return ssh_conn
+
+    def close(self) -> None:
+        sessions, self.__sessions = self.__sessions, {}
+        for ssh, ssh_conn in sessions.values():
+            if ssh_conn.is_alive():
+                ssh.disconnect()
+
+
+class VraDaemon:
+    """The class executes the create/apply/verify jobs with the warm state
+    and serves the HTTP API."""
+
+    __slots__ = (
+        "gateway",
+        "scope_name",
+        "scope_vlan_ids",
+        "stp_all_vlans",
+        "config_dir",
+        "topology_ttl",
+        "pool",
+        "generation_cache",
+        "jobs",
+        "job_ttl",
+        "max_jobs",
+        "logger",
+        "__topology",
+        "__jobs_lock",
+        "__queue",
+        "__worker",
+        "__server",
+        "__token",
+    )
+
+    JOB_KINDS: Final = ("create", "apply", "verify")
+    TOKEN_FILE: Final = "daemon.token"
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        gateway: str,
+        scope_name: str,
+        scope_vlan_ids: list[int],
+        config_dir: Optional[str | pathlib.Path] = "generated_vra_configs",
+        cache_dir: Optional[str | pathlib.Path] = ".vra_cache",
+        topology_ttl: Optional[float] = 600.0,
+        connect_factory: Optional[Callable] = None,
+        stp_all_vlans: Optional[bool] = False,
+        job_ttl: Optional[float] = 3600.0,
+        max_jobs: Optional[int] = 100,
+    ) -> None:
+        """VraDaemon class __init__.
+
+        connect_factory(host, device_type) replaces the default
+        SSHConnect (e.g. to pass the bastion tunnel). With stp_all_vlans
+        the discovery checks all scope vlans with one stp command per
+        device instead of a random one. Finished jobs are evicted after
+        job_ttl seconds or when there are more than max_jobs of them.
+        """
+
+        self.gateway = gateway
+        self.scope_name = scope_name
+        self.scope_vlan_ids = scope_vlan_ids
+        self.stp_all_vlans = stp_all_vlans
+        self.config_dir = pathlib.Path(config_dir)
+        self.topology_ttl = topology_ttl
+        self.pool = DevicePool(
+            connect_factory or (lambda host, device_type: SSHConnect(host, username, password, device_type=device_type))
+        )
+        self.generation_cache = GenerationCache(cache_dir)
+        self.jobs: dict[str, VraJob] = {}
+        self.job_ttl = job_ttl
+        self.max_jobs = max_jobs
+        self.logger = zLogger(username)
+        # (время обхода, топология {VLAN SCOPE}) или None
+        self.__topology: Optional[tuple[float, dict]] = None
+        self.__jobs_lock = threading.Lock()
+        self.__queue: queue.Queue = queue.Queue()
+        self.__worker: Optional[threading.Thread] = None
+        self.__server: Optional[ThreadingHTTPServer] = None
+        self.__token: Optional[str] = None
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self.jobs)} jobs"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    @staticmethod
+    def warm_up() -> None:
+        """Compiles the TextFSM and jinja2 templates before the first job."""
+
+        template_registry.keys()
+        jinja2_env = Vra._get_jinja2_env()
+        for template in jinja2_env.list_templates(extensions="jinja2"):
+            jinja2_env.get_template(template)
+
+    def submit(self, kind: str, params: Optional[dict] = None) -> VraJob:
+        """Queues the job and returns it."""
+
+        if kind not in self.JOB_KINDS:
+            raise DaemonError(f"Unknown job kind '{kind}', expected one of {', '.join(self.JOB_KINDS)}.")
+        if not isinstance(params or {}, dict):
+            raise DaemonError("The job params must be a JSON object.")
+
+        job = VraJob(self._new_job_id(), kind, params or {})
+        with self.__jobs_lock:
+            self._evict_jobs()
+            self.jobs[job.job_id] = job
+        self.__queue.put(job)
+        job.emit("queued", position=self.__queue.qsize())
+        return job
+
+    @staticmethod
+    def _new_job_id() -> str:
+        """Unique job id, also across the daemon restarts (it names the
+        configuration directory of the create job)."""
+
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}"
+
+    def _evict_jobs(self) -> None:
+        """Removes the finished jobs older than job_ttl and the oldest finished
+        jobs over max_jobs (the caller holds the jobs lock)."""
+
+        finished_jobs = sorted(
+            (job for job in self.jobs.values() if job.finished is not None), key=lambda job: job.finished
+        )
+        expired_before = time.time() - self.job_ttl
+        # Задания в очереди и выполняемые не удаляются
+        over_limit = len(finished_jobs) - self.max_jobs
+        for num, job in enumerate(finished_jobs):
+            if num < over_limit or job.finished < expired_before:
+                del self.jobs[job.job_id]
+
+    def list_jobs(self) -> list[VraJob]:
+        """The kept jobs in the order of submission."""
+
+        with self.__jobs_lock:
+            return list(self.jobs.values())
+
+    def _run_jobs(self) -> None:
+        """Worker thread: executes the queued jobs one by one."""
+
+        while True:
+            job = self.__queue.get()
+            if job is None:
+                return
+
+            job.set_status(RUNNING)
+            try:
+                result = getattr(self, f"_job_{job.kind}")(job, job.params)
+            except (DaemonError, AuthenticationFailed, ExceptionApplyPlan, SubnetValidationError) as error:
+                job.set_status(FAILED, error=error.message)
+            except Exception as error:
+                self.logger.log("file").exception(f"Job {job.job_id} [{job.kind}] failed.")
+                job.set_status(FAILED, error=f"{error.__class__.__name__}: {error}")
+            else:
+                job.set_status(DONE, result=result)
+
+    def _job_config_dir(self, params: dict) -> pathlib.Path:
+        """The configuration directory of the apply/verify job: 'config_dir' or
+        the directory of the 'create_job'."""
+
+        if params.get("create_job"):
+            create_job = self.jobs.get(str(params["create_job"]))
+            if create_job is None or create_job.kind != "create" or create_job.status != DONE:
+                raise DaemonError(f"The create job {params['create_job']} is not found or not finished successfully.")
+            return pathlib.Path(create_job.result["config_dir"])
+
+        # План применяется только из каталога конфигураций демона (или его подкаталога)
+        config_dir = pathlib.Path(params.get("config_dir", self.config_dir)).resolve()
+        if not config_dir.is_relative_to(self.config_dir.resolve()):
+            raise DaemonError(f"The config_dir must be inside the daemon configuration directory '{self.config_dir}'.")
+        return config_dir
+
+    def _topology(self, job: VraJob, refresh: Optional[bool] = False) -> dict:
+        """Returns the cached topology of the vlan scope, the network is
+        crawled again after topology_ttl or on request. Raises DaemonError if
+        any device was skipped."""
+
+        if self.__topology and not refresh and time.time() - self.__topology[0] < self.topology_ttl:
+            job.emit("topology", source="cache", devices=len(self.__topology[1]))
+            return self.__topology[1]
+
+        random_vlan_id = random.choice(self.scope_vlan_ids)
+        inf_params_d: dict[str, dict] = {}
+        skipped_netdevs: list[str] = []
+
+        def on_skipped(netdev: str, unreachable: HostUnreachable) -> None:
+            skipped_netdevs.append(netdev)
+            job.emit("skipped", device=netdev, error=unreachable.message)
+
+        def collect_device(current_netdev: str) -> tuple[dict, dict]:
+            net_helper = NetHelper(self.pool.get(current_netdev))
+            if self.stp_all_vlans:
+                scope_intfs_d = net_helper.get_intf_in_scopes_by_stp_vlans({self.scope_name: self.scope_vlan_ids})
+            else:
+                scope_intfs_d = net_helper.get_intf_in_scopes_by_stp_instance({self.scope_name: random_vlan_id})
+            return scope_intfs_d, cdp_neighbors_by_intf(net_helper, scope_intfs_d)
+
+        scope_discovery = ScopeDiscovery(
+            [self.scope_name],
+            self.gateway,
+            on_reached=lambda scope, netdev_host, intfs_d: inf_params_d.__setitem__(netdev_host, intfs_d),
+        )
+        scope_discovery.crawl(
+            collect_device,
+            on_visit=lambda netdev, number, queued: job.emit("discovery", device=netdev, done=number, queued=queued),
+            on_skipped=on_skipped,
+        )
+        # Неполная топология не кэшируется и не используется для генерации
+        if skipped_netdevs:
+            raise DaemonError(
+                f"Discovery skipped {len(skipped_netdevs)} devices ({', '.join(skipped_netdevs)}), "
+                f"the topology is incomplete."
+            )
+
+        self.__topology = (time.time(), inf_params_d)
+        job.emit("topology", source="discovery", devices=len(inf_params_d))
+        return inf_params_d
+
+    def _job_create(self, job: VraJob, params: dict) -> dict:
+        """Generates the configuration files and the apply plan into
+        config_dir/<job id>."""
+
+        try:
+            vra_subnets = SubnetBatch.from_lines(params["networks"])
+            start_vlan_id = int(params["start_vlan_id"])
+            start_rd = int(params["start_rd"])
+        except (KeyError, TypeError, ValueError) as error:
+            raise DaemonError(f"Incorrect create params: {error.__class__.__name__} {error}.") from None
+        environment = str(params.get("environment", "test")).lower()
+        if environment not in ("test", "preview"):
+            raise DaemonError("The environment must be 'test' or 'preview'.")
+
+        vra_topology = VraTopology(self._topology(job, params.get("refresh", False)))
+        vra_cls = VraTest if environment == "test" else VraPreview
+        vra_subnets_cls = [
+            vra_cls(start_vlan_id + num, subnet, start_rd + num, vra_topology) for num, subnet in enumerate(vra_subnets)
+        ]
+
+        # Каталог задания всегда новый: вывод не смешивается с результатами прошлых запусков
+        config_dir = self.config_dir / job.job_id
+        try:
+            config_dir.mkdir(parents=True)
+        except FileExistsError:
+            raise DaemonError(f"The configuration directory '{config_dir}' already exists.") from None
+        config_writer = ConfigWriter()
+        apply_plan = ApplyPlan(config_dir, environment=environment.upper())
+        for vra in vra_subnets_cls:
+            pathlib.Path(config_dir, vra.vrf_name).mkdir(parents=True, exist_ok=True)
+
+        for num, net_dev in enumerate(vra_topology, start=1):
+            apply_plan.add_device(net_dev, self.pool.device_types.get(net_dev))
+            for vra in vra_subnets_cls:
+                conf_path = pathlib.Path(config_dir, vra.vrf_name, f"{net_dev}.config")
+                render_key = vra.render_key(net_dev)
+                written_file = self.generation_cache.materialize(render_key, conf_path)
+                if written_file is None:
+                    written_file = config_writer.write(conf_path, vra.iter_config(net_dev, verbose=False))
+                    self.generation_cache.store(render_key, written_file)
+                apply_plan.add_block(net_dev, vra.vrf_name, vra.vlan_id, written_file)
+            job.emit("render", device=net_dev, done=num, total=len(vra_topology))
+
+        apply_plan.save()
+        self.generation_cache.save()
+        return {"config_dir": str(config_dir), "devices": len(apply_plan), "vlan_ids": apply_plan.vlan_ids}
+
+    def _job_apply(self, job: VraJob, params: dict) -> dict:
+        """Pushes the apply plan device by device over the pooled sessions."""
+
+        apply_plan = ApplyPlan.load(self._job_config_dir(params))
+        apply_counts = Counter()
+        total_lines = sum(plan_device.lines for plan_device in apply_plan)
+
+        for plan_device in apply_plan:
+            try:
+                ssh_conn = self.pool.get(plan_device.device)
+            except HostUnreachable as unreachable:
+                apply_counts["skipped devices"] += 1
+                job.emit("skipped", device=plan_device.device, error=unreachable.message)
+                continue
+
+            error_classifier = NetErrorDetect.classifier(ssh_conn.device_type)
+            for plan_block in plan_device.blocks:
+                block_commands = [command.strip() for command in apply_plan.read_block(plan_block)]
+                output = ssh_conn.send_config_set(block_commands, exit_config_mode=False, strip_prompt=True)
+                apply_counts["commands"] += len(block_commands)
+
+                if error_classifier:
+                    for detected_error in error_classifier.classify(output, block_commands):
+                        apply_counts[f"{detected_error.severity}s"] += 1
+                        job.emit(detected_error.severity, device=plan_device.device, message=detected_error.message)
+                job.emit(
+                    "push",
+                    device=plan_device.device,
+                    vrf=plan_block.vrf_name,
+                    done=apply_counts["commands"],
+                    total=total_lines,
+                )
+            ssh_conn.exit_config_mode()
+            apply_counts["devices"] += 1
+
+        return dict(apply_counts)
+
+    def _job_verify(self, job: VraJob, params: dict) -> dict:
+        """Checks the IPv4 interfaces on the gateway and the STP state of the
+        plan vlans on the access devices once (without waiting for the
+        convergence)."""
+
+        apply_plan = ApplyPlan.load(self._job_config_dir(params))
+        verify_result = {"ipv4": Counter(), "stp": Counter(), "problems": []}
+
+        try:
+            net_helper = NetHelper(self.pool.get(self.gateway))
+            for vlan_id in apply_plan.vlan_ids:
+                for ipv4_intf_dict in net_helper.get_ip_interfaces_status(vlan_id):
+                    intf_up = ipv4_intf_dict.get("status") == "up" and ipv4_intf_dict.get("proto") == "up"
+                    verify_result["ipv4"]["up" if intf_up else "down"] += 1
+                    if not intf_up:
+                        verify_result["problems"].append({"device": self.gateway, **ipv4_intf_dict})
+            job.emit("ipv4", device=self.gateway, **verify_result["ipv4"])
+        except HostUnreachable as unreachable:
+            job.emit("skipped", device=self.gateway, error=unreachable.message)
+
+        for plan_device in apply_plan:
+            if plan_device.device == self.gateway:
+                continue
+            try:
+                net_helper = NetHelper(self.pool.get(plan_device.device))
+            except HostUnreachable as unreachable:
+                job.emit("skipped", device=plan_device.device, error=unreachable.message)
+                continue
+
+            device_stp = Counter()
+            for vlan_id in sorted({plan_block.vlan_id for plan_block in plan_device.blocks}):
+                for stp_intf_dict in net_helper.get_stp_status(vlan_id):
+                    device_stp[stp_intf_dict.get("status")] += 1
+                    if stp_intf_dict.get("status") in ("BLK", "LRN"):
+                        verify_result["problems"].append({"device": plan_device.device, **stp_intf_dict})
+            verify_result["stp"].update(device_stp)
+            job.emit("stp", device=plan_device.device, **device_stp)
+
+        return {
+            "ipv4": dict(verify_result["ipv4"]),
+            "stp": dict(verify_result["stp"]),
+            "problems": verify_result["problems"],
+        }
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "scope": self.scope_name,
+            "jobs": Counter(job.status for job in self.list_jobs()),
+            "sessions": len(self.pool),
+            "device_types": len(self.pool.device_types),
+            "topology_age": round(time.time() - self.__topology[0], 1) if self.__topology else None,
+        }
+
+    @property
+    def token_path(self) -> pathlib.Path:
+        return self.generation_cache.cache_dir / self.TOKEN_FILE
+
+    def check_token(self, authorization: Optional[str]) -> bool:
+        """Checks the 'Authorization: Bearer <token>' header value."""
+
+        scheme, _, token = (authorization or "").partition(" ")
+        return (
+            self.__token is not None
+            and scheme.lower() == "bearer"
+            and hmac.compare_digest(token.strip().encode("utf-8"), self.__token.encode("utf-8"))
+        )
+
+    @staticmethod
+    def _verify_loopback(host: str) -> None:
+        """The API may listen only on the loopback interface."""
+
+        if host == "localhost":
+            return
+        try:
+            is_loopback = ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            is_loopback = False
+        if not is_loopback:
+            raise DaemonError(f"The daemon can listen only on a loopback address, '{host}' is not one.")
+
+    def serve_forever(self, host: Optional[str] = "127.0.0.1", port: Optional[int] = 8765) -> None:
+        """Starts the worker thread and serves the HTTP API until shutdown()
+        or KeyboardInterrupt. A new token is written to token_path on every
+        start."""
+
+        self._verify_loopback(host)
+        self.__token = secrets.token_urlsafe(32)
+        self.token_path.parent.mkdir(parents=True, exist_ok=True)
+        ConfigWriter().write(self.token_path, [self.__token, "\n"], mode=0o600)
+
+        self.warm_up()
+        self.__worker = threading.Thread(target=self._run_jobs, name="vra-jobs", daemon=True)
+        self.__worker.start()
+
+        self.__server = ThreadingHTTPServer((host, port), VraRequestHandler)
+        self.__server.daemon_threads = True
+        self.__server.vra_daemon = self
+        self.logger.log("all").info(
+            f"VRA daemon is listening on http://{host}:{self.__server.server_port}, "
+            f"the API token is in '{self.token_path}'."
+        )
+        try:
+            self.__server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.__server.server_close()
+            self.__queue.put(None)
+            self.__worker.join()
+            self.pool.close()
+            self.token_path.unlink(missing_ok=True)
+            self.logger.log("all").info("VRA daemon is stopped.")
+
+    def shutdown(self) -> None:
+        """Stops serve_forever() from another thread."""
+
+        if self.__server is not None:
+            self.__server.shutdown()
+
+
+class VraRequestHandler(BaseHTTPRequestHandler):
+    """HTTP API of VraDaemon."""
+
+    server_version = "VraDaemon/1.0"
+
+    @property
+    def vra_daemon(self) -> VraDaemon:
+        return self.server.vra_daemon
+
+    def log_message(self, format, *args):
+        # Запросы пишутся в файл лога, а не в stderr
+        self.vra_daemon.logger.log("file").info(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status: HTTPStatus, body) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _job_or_404(self, job_id: str) -> Optional[VraJob]:
+        job = self.vra_daemon.jobs.get(job_id)
+        if job is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Job {job_id} was not found."})
+        return job
+
+    def _stream_events(self, job: VraJob, since: int) -> None:
+        """Streams the job events as NDJSON, the response ends when the job is
+        finished."""
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            for event in job.events(since):
+                # Пустая строка - keepalive, пока задание стоит в очереди
+                self.wfile.write(b"\n" if event is None else json.dumps(event).encode("utf-8") + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _authorized(self) -> bool:
+        """Answers 401 if the request has no valid token."""
+
+        if self.vra_daemon.check_token(self.headers.get("Authorization")):
+            return True
+        self._send_json(HTTPStatus.UNAUTHORIZED, {"error": "A valid 'Authorization: Bearer <token>' is required."})
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+
+        url = urlparse(self.path)
+        path_parts = [part for part in url.path.split("/") if part]
+
+        if path_parts == ["health"]:
+            self._send_json(HTTPStatus.OK, self.vra_daemon.health())
+        elif path_parts == ["jobs"]:
+            self._send_json(HTTPStatus.OK, [job.to_dict() for job in self.vra_daemon.list_jobs()])
+        elif len(path_parts) == 2 and path_parts[0] == "jobs":
+            job = self._job_or_404(path_parts[1])
+            if job:
+                self._send_json(HTTPStatus.OK, job.to_dict())
+        elif len(path_parts) == 3 and path_parts[0] == "jobs" and path_parts[2] == "events":
+            job = self._job_or_404(path_parts[1])
+            if job:
+                since = parse_qs(url.query).get("since", ["0"])[0]
+                self._stream_events(job, int(since) if since.isdigit() else 0)
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path '{url.path}'."})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path '{self.path}'."})
+            return
+
+        try:
+            request_d = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            job = self.vra_daemon.submit(request_d.get("kind"), request_d.get("params"))
+        except (json.JSONDecodeError, AttributeError):
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "The request body must be a JSON object."})
+        except DaemonError as daemon_error:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": daemon_error.message})
+        else:
+            self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
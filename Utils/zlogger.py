@@ -1,4 +1,11 @@
-"""A class for working with logging in python."""
+"""A class for working with logging in python.
+
+The loggers and their handlers are configured once per output (and log
+file) under a lock and reused by every zLogger.log() call, so the
+threads which log at the same time (the prewarm sessions, the daemon
+requests) neither swap the handlers of each other nor open a new log
+file handler per message.
+"""
 
 __author__ = "ZHEZLYAEV Aleksandr"
 __version__ = "1.0"
@@ -10,11 +17,30 @@ import logging
 import os
 import pathlib
 import sys
+import threading
 from typing import Literal, Optional
 
 import coloredlogs
 from rich.logging import RichHandler
 
+# configured loggers and handlers shared by all zLogger instances
+_loggers: dict[tuple[str, str], logging.Logger] = {}
+_handlers: dict[tuple[str, ...], logging.Handler] = {}
+_lock = threading.Lock()
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Stream handler which writes to the current sys.stdout (it may be
+    replaced after the shared handler is created)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
 
 class zLogger:
     """The class creates and formats logs."""
@@ -31,14 +57,10 @@ class zLogger:
         self.extra_logging_field = {"username": self.username}
 
     @staticmethod
-    def logger_basic_init():
+    def logger_basic_init(name: Optional[str] = None):
         """Basic parameters for the logger."""
 
-        logger = logging.getLogger(__name__)
-
-        # check if handlers are already present and if so, clear them before adding new handlers
-        if logger.hasHandlers():
-            logger.handlers.clear()
+        logger = logging.getLogger(f"{__name__}.{name}" if name else __name__)
 
         # to prevent double printing
         logger.propagate = False
@@ -57,7 +79,7 @@ class zLogger:
         )
 
         # create console handler
-        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler = _StdoutHandler()
         console_handler.setFormatter(console_formatter)
         return console_handler
 
@@ -73,7 +95,7 @@ class zLogger:
         rich_console_handler.setFormatter(rich_console_formatter)
         return rich_console_handler
 
-    def __create_file_handler(self):
+    def __create_file_handler(self, log_file: pathlib.Path):
         """The method creates file handler."""
 
         # create logfile formatter
@@ -83,53 +105,50 @@ class zLogger:
         )
 
         # create log folder if not exist
-        pathlib.Path("log").mkdir(parents=True, exist_ok=True)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
 
         # create file handler
-        file_handler = logging.FileHandler(
-            f"log/{self.username}_{datetime.datetime.now().strftime('%d_%m_%Y')}.log",
-            "a",
-            "utf-8",
-        )
+        file_handler = logging.FileHandler(log_file, "a", "utf-8")
 
         file_handler.setFormatter(file_formatter)
         return file_handler
 
+    @staticmethod
+    def __shared_handler(handler_key: tuple[str, ...], create_handler):
+        """Returns the handler shared by the loggers, it is created on the
+        first use (the caller holds the lock)."""
+
+        handler = _handlers.get(handler_key)
+        if handler is None:
+            handler = _handlers[handler_key] = create_handler()
+        return handler
+
     def log(
         self,
         log_to: Optional[Literal["console", "rich_console", "file", "all", "all_use_rich"]] = "console",
     ) -> logging.LoggerAdapter:
         """The method creates and formats logs."""
 
-        # logging init
-        logger = self.logger_basic_init()
-
-        if log_to == "console":
-            handlers = [self.__create_console_handler()]
-
-        elif log_to == "rich_console":
-            handlers = [self.__create_rich_console_handler()]
-
-        elif log_to == "file":
-            handlers = [self.__create_file_handler()]
-
-        elif log_to == "all":
-            handlers = [
-                self.__create_console_handler(),
-                self.__create_file_handler(),
-            ]
-
-        elif log_to == "all_use_rich":
-            handlers = [
-                self.__create_rich_console_handler(),
-                self.__create_file_handler(),
-            ]
-
-        else:
+        if log_to not in ("console", "rich_console", "file", "all", "all_use_rich"):
             raise ValueError("Incorrect log output value.")
 
-        for handler in handlers:
-            logger.addHandler(handler)
+        log_file = pathlib.Path("log", f"{self.username}_{datetime.datetime.now().strftime('%d_%m_%Y')}.log").absolute()
+        logger_key = (log_to, str(log_file) if log_to in ("file", "all", "all_use_rich") else "")
+
+        # the logger of the output is configured once, the handlers are never cleared
+        with _lock:
+            logger = _loggers.get(logger_key)
+            if logger is None:
+                logger = self.logger_basic_init(f"{log_to}.{len(_loggers)}")
+                if log_to in ("console", "all"):
+                    logger.addHandler(self.__shared_handler(("console",), self.__create_console_handler))
+                if log_to in ("rich_console", "all_use_rich"):
+                    logger.addHandler(self.__shared_handler(("rich_console",), self.__create_rich_console_handler))
+                if log_to in ("file", "all", "all_use_rich"):
+                    logger.addHandler(
+                        self.__shared_handler(("file", str(log_file)), lambda: self.__create_file_handler(log_file))
+                    )
+                _loggers[logger_key] = logger
 
         # add an additional field to the logger_formatter
         logger = logging.LoggerAdapter(logger, self.extra_logging_field)
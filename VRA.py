@@ -6,11 +6,17 @@ __version__ = "1.0"
 
 # -*- coding: utf-8 -*-
 
-import ipaddress
-from typing import Final, Optional
+import hashlib
+import json
+import pathlib
+import sys
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Final, Iterator, NamedTuple, Optional
 
 from jinja2 import Environment, FileSystemLoader, TemplateSyntaxError
 
+from Utils.SubnetBatch import SubnetRecord
 from Utils.zlogger import zLogger
 
 
@@ -28,22 +34,110 @@ class ExceptionGenerateConfig(ExceptionVra):
         return f"Error: {self.message}"
 
 
+class IntfParams(NamedTuple):
+    """Immutable parameters of the interface in the vlan scope."""
+
+    intf_mode: str
+    allowed_vlans: frozenset[int]
+
+
+class VraTopology(Mapping):
+    """Immutable map of the network devices and their interfaces in the vlan
+    scope.
+
+    The structure is validated once in __init__ and then shared by
+    reference between all Vra instances.
+    """
+
+    __slots__ = ("__devices",)
+
+    def __init__(self, intf_in_scope_d: dict) -> None:
+        """Class VraTopology __init__."""
+
+        self._verify_intf_in_scope_d(intf_in_scope_d)
+        self.__devices = MappingProxyType(
+            {
+                netdev_hostname: MappingProxyType(
+                    {
+                        intf: IntfParams(
+                            intf_params_d.get("intf_mode"),
+                            frozenset(intf_params_d.get("allowed_vlans")),
+                        )
+                        for intf, intf_params_d in intfs_d.items()
+                    }
+                )
+                for netdev_hostname, intfs_d in intf_in_scope_d.items()
+            }
+        )
+
+    def __repr__(self):
+        return f"{self.__class__}: {len(self)} network devices"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}"
+
+    def __getitem__(self, netdev_hostname: str) -> Mapping[str, IntfParams]:
+        return self.__devices[netdev_hostname]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__devices)
+
+    def __len__(self) -> int:
+        return len(self.__devices)
+
+    @staticmethod
+    def _verify_intf_in_scope_d(intf_in_scope_d):
+        """The method checks the correctness of the structure of the
+        transmitted dictionary."""
+        if not isinstance(intf_in_scope_d, dict):
+            raise TypeError("Interfaces parameters should be a dictionary.")
+
+        for netdev_hostname, intfs_dict in intf_in_scope_d.items():
+            if not isinstance(netdev_hostname, str):
+                raise TypeError("Incorrect interface dictionary format. Network Device hostname must be a string.")
+            if not isinstance(intfs_dict, dict):
+                raise TypeError("Incorrect interface dictionary format.")
+
+            for intf, intf_params_dict in intfs_dict.items():
+                if not isinstance(intf, str):
+                    raise TypeError("Incorrect interface dictionary format. Interface name value must be a string.")
+
+                if not isinstance(intf_params_dict.get("intf_mode"), str):
+                    raise TypeError("Incorrect interface dictionary format. Interface mode value must be a string.")
+
+                if not isinstance(intf_params_dict.get("allowed_vlans"), list):
+                    raise TypeError("Incorrect interface dictionary format. Allowed vlans value must be a list.")
+
+                for vlan_id in intf_params_dict.get("allowed_vlans"):
+                    if not isinstance(vlan_id, int):
+                        raise TypeError(
+                            "Incorrect interface dictionary format. Vlan id value in allowed vlans list must be an integer."
+                        )
+
+
 class Vra:
     """Base class for creating VRA test/preview network configurations."""
 
     __slots__ = (
         "__vlan_id",
-        "__subnet_with_prefix_len",
+        "__subnet",
         "__rd_extended_part",
-        "rd",
-        "intf_gateway_ip_and_netmask",
-        "network_ip_and_netmask",
         "vlan_name",
         "vrf_name",
-        "logger",
         "__intf_in_scope_d",
     )
 
+    logger: Final = zLogger()
+
+    # Общее для всех экземпляров jinja2 окружение (создается при первой генерации)
+    _jinja2_env: Optional[Environment] = None
+
+    # Хэши исходников jinja2 шаблонов для ключа кэша генерации
+    _template_source_hashes: Final[dict[str, str]] = {}
+
+    # Хэш исходного кода генератора для ключа кэша генерации (вычисляется один раз)
+    _generator_source_hash: Optional[str] = None
+
     DC_CORE: Final = ["MS", "ms"]
     DC_ACCESS: Final = ["SW", "NX", "sw", "nx"]
     VLAN_SCOPE: Final = "SCOPE_VRA"
@@ -52,20 +146,22 @@ class Vra:
     def __init__(
         self,
         vlan_id: int,
-        subnet_with_prefix_len: str,
+        subnet: str | SubnetRecord,
         rd_extended_part: int,
-        intf_in_scope_d: dict,
+        intf_in_scope_d: VraTopology | dict,
     ) -> None:
-        """Class Vra __init__."""
+        """Class Vra __init__.
+
+        The subnet can be passed as an already validated SubnetRecord
+        (see Utils.SubnetBatch) or as a string with the prefix length.
+        The VraTopology is referenced as is, a plain dict is validated and
+        wrapped into a new VraTopology.
+        """
 
         self.vlan_id = vlan_id
-        self.subnet_with_prefix_len = subnet_with_prefix_len
+        self.subnet = subnet
         self.rd_extended_part = rd_extended_part
-        self.rd = self.RD_BASE_PART + ":" + str(rd_extended_part)
-        self.intf_gateway_ip_and_netmask = self._gateway_and_netmask_from_cidr(subnet_with_prefix_len)
-        self.network_ip_and_netmask = self._network_with_netmask_from_cidr(subnet_with_prefix_len)
         self.intf_in_scope_d = intf_in_scope_d
-        self.logger = zLogger()
 
     def __repr__(self):
         return f"{self.__class__}"
@@ -99,45 +195,51 @@ class Vra:
         self.__rd_extended_part = rd_extended_part
 
     @property
-    def subnet_with_prefix_len(self):
+    def rd(self) -> str:
+        """Getter for route distinguisher (rd)."""
+        return self.RD_BASE_PART + ":" + str(self.__rd_extended_part)
+
+    @property
+    def subnet(self) -> SubnetRecord:
+        """Getter for subnet record."""
+        return self.__subnet
+
+    @subnet.setter
+    def subnet(self, subnet):
+        """Setter for subnet record."""
+        if isinstance(subnet, SubnetRecord):
+            self.__subnet = subnet
+        else:
+            self._verify_subnet_with_prefix_len(subnet)
+            self.__subnet = SubnetRecord.from_string(subnet)
+
+    @property
+    def subnet_with_prefix_len(self) -> str:
         """Getter for network address with the prefix length."""
-        return self.__subnet_with_prefix_len
+        return self.__subnet.with_prefixlen
 
-    @subnet_with_prefix_len.setter
-    def subnet_with_prefix_len(self, subnet_with_prefix_len):
-        """Setter for network address with the prefix length."""
-        self._verify_subnet_with_prefix_len(subnet_with_prefix_len)
-        self.__subnet_with_prefix_len = subnet_with_prefix_len
+    @property
+    def intf_gateway_ip_and_netmask(self) -> str:
+        """Getter for gateway address and gateway mask."""
+        return self.__subnet.gateway_and_netmask
 
     @property
-    def intf_in_scope_d(self):
-        """Getter for interfaces scope dict."""
+    def network_ip_and_netmask(self) -> str:
+        """Getter for network address and network mask."""
+        return self.__subnet.network_and_netmask
+
+    @property
+    def intf_in_scope_d(self) -> VraTopology:
+        """Getter for interfaces scope topology."""
         return self.__intf_in_scope_d
 
     @intf_in_scope_d.setter
     def intf_in_scope_d(self, intf_in_scope_d):
-        """ "Setter for interfaces scope dict."""
-        self._verify_intf_in_scope_d(intf_in_scope_d)
-        self.__intf_in_scope_d = intf_in_scope_d
-
-    @staticmethod
-    def _verify_subnet_with_prefix_len(subnet_with_prefix_len: str) -> None:
-        """The internal method checks the correctness of the network address
-        with the prefix length."""
-        if not isinstance(subnet_with_prefix_len, str):
-            raise TypeError("The network address with the prefix length must be a string.")
-
-        net_with_pf = subnet_with_prefix_len.split("/")
-        if len(net_with_pf) != 2:
-            raise TypeError("Invalid format for recording the network address with prefix length.")
-
-        try:
-            subnet = ipaddress.ip_network(subnet_with_prefix_len)
-        except ValueError:
-            raise ValueError(f"{subnet_with_prefix_len} does not appear to be an IPv4 network.")
-
-        if not subnet.network_address.is_private:
-            raise ValueError(f"{subnet_with_prefix_len} is not in the RFС1918 address space.")
+        """Setter for interfaces scope topology."""
+        if isinstance(intf_in_scope_d, VraTopology):
+            self.__intf_in_scope_d = intf_in_scope_d
+        else:
+            self.__intf_in_scope_d = VraTopology(intf_in_scope_d)
 
     @staticmethod
     def _verify_vlan_id(vlan_id: int) -> None:
@@ -167,98 +269,53 @@ class Vra:
         if not isinstance(subnet_with_prefix_len, str):
             raise TypeError("The network address with the prefix length must be a string.")
 
-    @staticmethod
-    def _verify_intf_in_scope_d(intf_in_scope_d):
-        """The method checks the correctness of the structure of the
-        transmitted dictionary."""
-        if not isinstance(intf_in_scope_d, dict):
-            raise TypeError("Interfaces parameters should be a dictionary.")
-
-        for netdev_hostname, intfs_dict in intf_in_scope_d.items():
-            if not isinstance(netdev_hostname, str):
-                raise TypeError("Incorrect interface dictionary format. Network Device hostname must be a string.")
-            if not isinstance(intfs_dict, dict):
-                raise TypeError("Incorrect interface dictionary format.")
-
-            for intf, intf_params_dict in intfs_dict.items():
-                if not isinstance(intf, str):
-                    raise TypeError("Incorrect interface dictionary format. Interface name value must be a string.")
-
-                if not isinstance(intf_params_dict.get("intf_mode"), str):
-                    raise TypeError("Incorrect interface dictionary format. Interface mode value must be a string.")
-
-                if not isinstance(intf_params_dict.get("allowed_vlans"), list):
-                    raise TypeError("Incorrect interface dictionary format. Allowed vlans value must be a list.")
-
-                for vlan_id in intf_params_dict.get("allowed_vlans"):
-                    if not isinstance(vlan_id, int):
-                        raise TypeError(
-                            "Incorrect interface dictionary format. Vlan id value in allowed vlans list must be an integer."
-                        )
-
-    @staticmethod
-    def _gateway_and_netmask_from_cidr(subnet_with_prefix_len: str) -> str:
-        """The method converts a network with a prefix len into a gateway
-        address and gateway mask."""
-
-        subnet = ipaddress.ip_network(subnet_with_prefix_len)
-        gateway_ip = str(subnet.network_address + 1)
-        gateway_netmask = str(subnet.netmask)
-        return gateway_ip + " " + gateway_netmask
-
-    @staticmethod
-    def _network_with_netmask_from_cidr(subnet_with_prefix_len: str) -> str:
-        """The method converts a network with a prefix len into a network
-        address and network mask."""
+        if len(subnet_with_prefix_len.split("/")) != 2:
+            raise TypeError("Invalid format for recording the network address with prefix length.")
 
-        subnet = ipaddress.ip_network(subnet_with_prefix_len)
-        ip_address_net = str(subnet.network_address)
-        ip_address_netmask = str(subnet.netmask)
-        return ip_address_net + " " + ip_address_netmask
+    @classmethod
+    def _get_jinja2_env(cls) -> Environment:
+        """The method returns the jinja2 environment shared by all instances
+        (templates are compiled once and cached by jinja2)."""
+
+        if Vra._jinja2_env is None:
+            Vra._jinja2_env = Environment(
+                loader=FileSystemLoader("net_templates"),
+                trim_blocks=True,
+                lstrip_blocks=True,
+                extensions=["jinja2.ext.loopcontrols"],
+            )
+        return Vra._jinja2_env
 
-    def _jinja2_generate_template(self, template: str, init_dict: dict) -> str:
+    def _jinja2_stream_template(self, template: str, init_dict: dict) -> Iterator[str]:
         """The method generates the specified configuration through jinja2
-        templates."""
-
-        jinja2_env = Environment(
-            loader=FileSystemLoader("net_templates"),
-            trim_blocks=True,
-            lstrip_blocks=True,
-            extensions=["jinja2.ext.loopcontrols"],
-        )
+        templates chunk by chunk."""
 
         try:
-            jinja2_template = jinja2_env.get_template(template)
-            generated_config: str = jinja2_template.render(init_dict)
-            return generated_config
-
+            jinja2_template = self._get_jinja2_env().get_template(template)
         except TemplateSyntaxError as jinja2_error:
             self.logger.log("all").error(
                 f"Jinja2 template syntax error during render: {jinja2_error.filename}:{jinja2_error.lineno} error: {jinja2_error.message}."
             )
+            return
 
-    def _create_vlan_config(self, verbose: Optional[bool] = False) -> str:
-        """Create vlan vra config with Jinja2."""
+        yield from jinja2_template.generate(init_dict)
 
-        vlan_data = {
+    def _jinja2_generate_template(self, template: str, init_dict: dict) -> str:
+        """The method generates the specified configuration through jinja2
+        templates."""
+        return "".join(self._jinja2_stream_template(template, init_dict))
+
+    def _vlan_data(self) -> dict:
+        """Render data for the vlan template."""
+        return {
             "vlan_id": self.vlan_id,
             "vlan_name": self.vlan_name,
             "environment": self.environment,
         }
 
-        generated_vlan_config: str = self._jinja2_generate_template("vlan_template.jinja2", vlan_data)
-
-        if generated_vlan_config:
-            if verbose:
-                self.logger.log("all").info(f"The vlan {self.vlan_id} configuration was completed successfully.")
-            return generated_vlan_config
-        else:
-            raise ExceptionGenerateConfig(f"Error generating vlan {self.vlan_id} configuration.")
-
-    def _create_vrf_config(self, verbose: Optional[bool] = False) -> str:
-        """Create vrf vra config with Jinja2."""
-
-        vrf_data = {
+    def _vrf_data(self) -> dict:
+        """Render data for the vrf template."""
+        return {
             "vrf_name": self.vrf_name,
             "rd": self.rd,
             "rd_extended_part": self.rd_extended_part,
@@ -266,64 +323,24 @@ class Vra:
             "rt_import": self.rt_import,
         }
 
-        generated_vrf_config: str = self._jinja2_generate_template("vrf_template.jinja2", vrf_data)
-
-        if generated_vrf_config:
-            if verbose:
-                self.logger.log("all").info(f"The vrf {self.vrf_name} configuration was completed successfully.")
-            return generated_vrf_config
-        else:
-            raise ExceptionGenerateConfig(f"Error generating vrf {self.vrf_name} configuration.")
-
-    def _create_l3_intf_config(self, verbose: Optional[bool] = False) -> str:
-        """Create interfaces vra config with Jinja2."""
-
-        intf_data = {
+    def _l3_intf_data(self) -> dict:
+        """Render data for the l3 interface template."""
+        return {
             "intf_gateway_ip_and_netmask": self.intf_gateway_ip_and_netmask,
             "vlan_id": self.vlan_id,
             "vrf_name": self.vrf_name,
         }
 
-        generated_intf_config: str = self._jinja2_generate_template("l3_intf_template.jinja2", intf_data)
-
-        if generated_intf_config:
-            if verbose:
-                self.logger.log("all").info(
-                    f"The interface {self.intf_gateway_ip_and_netmask} configuration was completed successfully."
-                )
-            return generated_intf_config
-        else:
-            raise ExceptionGenerateConfig(
-                f"Error generating interface {self.intf_gateway_ip_and_netmask} configuration."
-            )
-
-    def _create_ip_prefix_list_config(self, verbose: Optional[bool] = False) -> str:
-        """Create ip prefix-list config for vra networks with Jinja2."""
-
-        ip_prefix_list_data = {
+    def _ip_prefix_list_data(self) -> dict:
+        """Render data for the ip prefix-list template."""
+        return {
             "environment": self.environment,
             "subnet_with_prefix_len": self.subnet_with_prefix_len,
         }
 
-        generated_ip_prefix_list_config: str = self._jinja2_generate_template(
-            "ip_prefix_list_template.jinja2", ip_prefix_list_data
-        )
-
-        if generated_ip_prefix_list_config:
-            if verbose:
-                self.logger.log("all").info(
-                    f"The ip prefix list {self.subnet_with_prefix_len} configuration was completed successfully."
-                )
-            return generated_ip_prefix_list_config
-        else:
-            raise ExceptionGenerateConfig(
-                f"Error generating ip prefix list {self.subnet_with_prefix_len} configuration."
-            )
-
-    def _create_ip_routing_config(self, verbose: Optional[bool] = False) -> str:
-        """Create ip ip routing config for vra networks with Jinja2."""
-
-        ip_routing_config_data = {
+    def _ip_routing_data(self) -> dict:
+        """Render data for the ip routing template."""
+        return {
             "environment": self.environment,
             "fw_vrf_testprev_intf_address": self.fw_vrf_testprev_intf_address,
             "fw_vrf_transit_intf_address": self.fw_vrf_transit_intf_address,
@@ -331,71 +348,121 @@ class Vra:
             "vrf_name": self.vrf_name,
         }
 
-        generated_ip_routing_config: str = self._jinja2_generate_template(
-            "ip_routing_template.jinja2", ip_routing_config_data
-        )
+    def _l2_intf_data(self, netdev_hostname: str) -> dict:
+        """Render data for the l2 interfaces template."""
+        return {
+            "dict": self.intf_in_scope_d.get(netdev_hostname),
+            "vra_vlan_id": self.vlan_id,
+        }
 
-        if generated_ip_routing_config:
-            if verbose:
-                self.logger.log("all").info(
-                    f"The ip routing configuration for network {self.network_ip_and_netmask} was completed successfully."
-                )
-            return generated_ip_routing_config
-        else:
-            raise ExceptionGenerateConfig(
-                f"Error generating ip routing configuration for network {self.network_ip_and_netmask}."
-            )
+    def _config_blocks(self, netdev_hostname: str) -> list[tuple[str, dict, Optional[str]]]:
+        """The method returns the ordered (template, render data, block
+        description) list for the network device.
 
-    def _create_l2_intf_config(self, netdev_hostname: str, verbose: Optional[bool] = False) -> str:
-        """Create l2 interfaces config for vra networks with Jinja2."""
-        intf_d = self.intf_in_scope_d.get(netdev_hostname)
+        A block without description may be rendered empty.
+        """
 
-        for intf_params_d in intf_d.values():
-            intf_params_d.update(dict(vra_vlan_id=self.vlan_id))
+        if any(map(netdev_hostname.startswith, self.DC_CORE)):
+            return [
+                ("vlan_template.jinja2", self._vlan_data(), f"vlan {self.vlan_id}"),
+                ("vrf_template.jinja2", self._vrf_data(), f"vrf {self.vrf_name}"),
+                ("l3_intf_template.jinja2", self._l3_intf_data(), f"interface {self.intf_gateway_ip_and_netmask}"),
+                (
+                    "ip_prefix_list_template.jinja2",
+                    self._ip_prefix_list_data(),
+                    f"ip prefix list {self.subnet_with_prefix_len}",
+                ),
+                (
+                    "ip_routing_template.jinja2",
+                    self._ip_routing_data(),
+                    f"ip routing for network {self.network_ip_and_netmask}",
+                ),
+                ("l2_intf_template.jinja2", self._l2_intf_data(netdev_hostname), None),
+            ]
 
-        jinja2_env = Environment(
-            loader=FileSystemLoader("net_templates"),
-            trim_blocks=True,
-            lstrip_blocks=True,
-        )
+        elif any(map(netdev_hostname.startswith, self.DC_ACCESS)):
+            return [
+                ("vlan_template.jinja2", self._vlan_data(), f"vlan {self.vlan_id}"),
+                ("l2_intf_template.jinja2", self._l2_intf_data(netdev_hostname), None),
+            ]
 
-        try:
-            jinja2_template = jinja2_env.get_template("l2_intf_template.jinja2")
-            generated_config: str = jinja2_template.render(dict=intf_d)
+        else:
+            raise ExceptionGenerateConfig("The configuration can only be configured for MS/MX/SW/NX devices.")
 
-            return generated_config
+    @classmethod
+    def _template_source_hash(cls, template: str) -> str:
+        """The method returns the hash of the jinja2 template source."""
+
+        if template not in cls._template_source_hashes:
+            jinja2_env = cls._get_jinja2_env()
+            template_source, _, _ = jinja2_env.loader.get_source(jinja2_env, template)
+            cls._template_source_hashes[template] = hashlib.sha256(template_source.encode("utf-8")).hexdigest()
+        return cls._template_source_hashes[template]
+
+    @classmethod
+    def _generator_hash(cls) -> str:
+        """The method returns the hash of the generator source code (this
+        module and the subnet records module), so any change of the generator
+        invalidates the cached renders."""
+
+        if cls._generator_source_hash is None:
+            generator_hash = hashlib.sha256(__version__.encode("utf-8"))
+            for module_name in (__name__, SubnetRecord.__module__):
+                generator_hash.update(pathlib.Path(sys.modules[module_name].__file__).read_bytes())
+            cls._generator_source_hash = generator_hash.hexdigest()
+        return cls._generator_source_hash
 
-        except TemplateSyntaxError as jinja2_error:
-            self.logger.log("all").error(
-                f"Jinja2 template syntax error during render: {jinja2_error.filename}:{jinja2_error.lineno} error: {jinja2_error.message}."
-            )
+    @staticmethod
+    def _render_key_default(obj):
+        """JSON serializer for the render data that is not supported by
+        default."""
+
+        if isinstance(obj, Mapping):
+            return dict(obj)
+        if isinstance(obj, (set, frozenset)):
+            return sorted(obj)
+        raise TypeError(f"{type(obj)} can't be used in the render key.")
+
+    def render_key(self, netdev_hostname: str) -> str:
+        """The method returns the hash of everything the network device
+        configuration depends on: template sources, render data (the Vra
+        fields and the device interfaces) and the generator source code."""
+
+        render_inputs = {
+            "generator_version": self._generator_hash(),
+            "blocks": [
+                (template, self._template_source_hash(template), init_dict)
+                for template, init_dict, _ in self._config_blocks(netdev_hostname)
+            ],
+        }
+        render_inputs_json = json.dumps(render_inputs, sort_keys=True, default=self._render_key_default)
+        return hashlib.sha256(render_inputs_json.encode("utf-8")).hexdigest()
 
-    def generate_config(self, netdev_hostname: str, verbose: Optional[bool] = False):
-        """The method generates a configuration for the VRA network
-        infrastructure."""
+    def iter_config(self, netdev_hostname: str, verbose: Optional[bool] = False) -> Iterator[str]:
+        """The method streams the configuration for the VRA network
+        infrastructure as jinja2 output chunks."""
 
-        if any(map(netdev_hostname.startswith, self.DC_CORE)):
-            vlan_config: str = self._create_vlan_config(verbose)
-            vrf_config: str = self._create_vrf_config(verbose)
-            intf_l3_config: str = self._create_l3_intf_config(verbose)
-            ip_prefix_list_config: str = self._create_ip_prefix_list_config(verbose)
-            ip_routing_config: str = self._create_ip_routing_config(verbose)
-            intf_l2_config: str = self._create_l2_intf_config(netdev_hostname, verbose)
-            generated_config = (
-                vlan_config + vrf_config + intf_l3_config + ip_prefix_list_config + ip_routing_config + intf_l2_config
-            )
+        for template, init_dict, block_description in self._config_blocks(netdev_hostname):
+            block_generated = False
+            for chunk in self._jinja2_stream_template(template, init_dict):
+                block_generated = block_generated or bool(chunk)
+                yield chunk
 
-            return dict([(netdev_hostname, generated_config)])
+            if block_description is None:
+                continue
 
-        elif any(map(netdev_hostname.startswith, self.DC_ACCESS)):
-            vlan_config: str = self._create_vlan_config(verbose)
-            intf_l2_config: str = self._create_l2_intf_config(netdev_hostname, verbose)
-            generated_config = vlan_config + intf_l2_config
+            if not block_generated:
+                raise ExceptionGenerateConfig(f"Error generating {block_description} configuration.")
 
-            return dict([(netdev_hostname, generated_config)])
+            if verbose:
+                self.logger.log("all").info(f"The {block_description} configuration was completed successfully.")
 
-        else:
-            raise ExceptionGenerateConfig("The configuration can only be configured for MS/MX/SW/NX devices.")
+    def generate_config(self, netdev_hostname: str, verbose: Optional[bool] = False):
+        """The method generates a configuration for the VRA network
+        infrastructure."""
+
+        generated_config = "".join(self.iter_config(netdev_hostname, verbose))
+        return dict([(netdev_hostname, generated_config)])
 
 
 class VraTest(Vra):
@@ -412,13 +479,13 @@ class VraTest(Vra):
     def __init__(
         self,
         vlan_id: int,
-        subnet_with_prefix_len: str,
+        subnet: str | SubnetRecord,
         rd_extended_part: int,
-        intf_in_scope: list[str],
+        intf_in_scope: VraTopology | dict,
     ) -> None:
         """Class VraTest __init__."""
 
-        super().__init__(vlan_id, subnet_with_prefix_len, rd_extended_part, intf_in_scope)
+        super().__init__(vlan_id, subnet, rd_extended_part, intf_in_scope)
         self.vlan_name = "TEST-VRA" + str(self.vlan_id)
         self.vrf_name = "TEST-VRA" + str(self.vlan_id)
 
@@ -443,12 +510,12 @@ class VraPreview(Vra):
     def __init__(
         self,
         vlan_id: int,
-        subnet_with_prefix_len: str,
+        subnet: str | SubnetRecord,
         rd_extended_part: int,
-        intf_in_scope: list[str],
+        intf_in_scope: VraTopology | dict,
     ) -> None:
         """Class VraPreview __init__."""
-        super().__init__(vlan_id, subnet_with_prefix_len, rd_extended_part, intf_in_scope)
+        super().__init__(vlan_id, subnet, rd_extended_part, intf_in_scope)
         self.vlan_name = "PREVIEW-VRA" + str(self.vlan_id)
         self.vrf_name = "PREVIEW-VRA" + str(self.vlan_id)
 
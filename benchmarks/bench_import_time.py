@@ -0,0 +1,112 @@
+"""Benchmark of the vra_cli import time.
+
+The script runs 'python -X importtime -c "import vra_cli"' several times,
+prints the best cumulative import time, the slowest imported modules and
+checks that the heavy dependencies are not loaded at import time.
+
+Usage example:
+
+python benchmarks/bench_import_time.py --runs 10 --budget-ms 250
+"""
+
+__author__ = "ZHEZLYAEV Aleksandr"
+__version__ = "1.0"
+
+# -*- coding: utf-8 -*-
+
+import argparse
+import pathlib
+import subprocess
+import sys
+
+PROJECT_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+# Модули, которые не должны загружаться при импорте vra_cli
+HEAVY_MODULES = (
+    "netmiko",
+    "paramiko",
+    "textfsm",
+    "jinja2",
+    "coloredlogs",
+    "rich.progress",
+    "rich.table",
+    "rich.tree",
+)
+
+
+def run_importtime(module: str) -> dict[str, tuple[int, int]]:
+    """Runs the interpreter with -X importtime and returns {module: (self us,
+    cumulative us)}."""
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    import_times: dict[str, tuple[int, int]] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module_name = line.removeprefix("import time:").split("|")
+        import_times[module_name.strip()] = (int(self_us), int(cumulative_us))
+
+    return import_times
+
+
+def loaded_heavy_modules(module: str) -> list[str]:
+    """Returns the heavy modules loaded by importing the module."""
+
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; print('\\n'.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))",
+        ],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return completed.stdout.split()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="vra_cli import time benchmark")
+    parser.add_argument("--module", default="vra_cli", help="module to import")
+    parser.add_argument("--runs", type=int, default=5, help="number of runs, the best one is reported")
+    parser.add_argument("--top", type=int, default=10, help="number of the slowest modules to show")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the import takes longer")
+    args = parser.parse_args()
+
+    best_import_times = min(
+        (run_importtime(args.module) for _ in range(args.runs)),
+        key=lambda import_times: import_times[args.module][1],
+    )
+    total_ms = best_import_times[args.module][1] / 1000
+
+    print(f"import {args.module}: {total_ms:.1f} ms (best of {args.runs})")
+    print(f"{'self, ms':>10} {'cumulative, ms':>15}  module")
+    for module_name, (self_us, cumulative_us) in sorted(
+        best_import_times.items(), key=lambda item: item[1][0], reverse=True
+    )[: args.top]:
+        print(f"{self_us / 1000:>10.1f} {cumulative_us / 1000:>15.1f}  {module_name}")
+
+    exit_code = 0
+
+    heavy_modules = loaded_heavy_modules(args.module)
+    if heavy_modules:
+        print(f"FAIL: heavy modules are loaded at import time: {', '.join(heavy_modules)}")
+        exit_code = 1
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"FAIL: import time {total_ms:.1f} ms exceeds the budget {args.budget_ms:.1f} ms")
+        exit_code = 1
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
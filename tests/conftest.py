@@ -0,0 +1,55 @@
+import pytest
+
+# Вывод 'sh int <intf> switchport' trunk-порта с vlan 100 и 200
+SWITCHPORT_OUTPUT = """Name: Gi1/0
+Switchport: Enabled
+Administrative Mode: trunk
+Operational Mode: trunk
+Access Mode VLAN: 1 (default)
+Trunking Native Mode VLAN: 1 (default)
+Trunking VLANs Enabled: 100,200
+"""
+
+
+class FakeConnection:
+    """netmiko connection double: send_command returns the output of the
+    first command substring found in the sent command ('' otherwise) and
+    records the sent commands."""
+
+    def __init__(self, outputs: dict[str, str], host: str = "MS-TEST-0001", device_type: str = "cisco_ios") -> None:
+        self.outputs = outputs
+        self.host = host
+        self.device_type = device_type
+        self.sent: list[str] = []
+
+    def send_command(self, command, **kwargs):
+        self.sent.append(command)
+        for command_part, output in self.outputs.items():
+            if command_part in command:
+                return output
+        return ""
+
+    def sent_with(self, command_part: str) -> list[str]:
+        return [command for command in self.sent if command_part in command]
+
+
+@pytest.fixture(autouse=True)
+def run_in_tmp_path(tmp_path, monkeypatch):
+    """zLogger writes to ./log, the tests must not leave it in the repository."""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def switchport_output() -> str:
+    return SWITCHPORT_OUTPUT
+
+
+@pytest.fixture
+def fake_connection(switchport_output):
+    """Factory of FakeConnection, the switchport command is answered with
+    switchport_output unless the test passes its own output."""
+
+    def make_fake_connection(outputs: dict[str, str], **conn_kwargs) -> FakeConnection:
+        return FakeConnection({**outputs, "switchport": outputs.get("switchport", switchport_output)}, **conn_kwargs)
+
+    return make_fake_connection
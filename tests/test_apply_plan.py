@@ -0,0 +1,53 @@
+import pytest
+
+from Utils.ApplyPlan import ApplyPlan, ExceptionApplyPlan
+from Utils.ConfigWriter import ConfigWriter
+
+
+@pytest.fixture
+def saved_plan(tmp_path):
+    (tmp_path / "TEST-VRA500").mkdir()
+    written_file = ConfigWriter().write(tmp_path / "TEST-VRA500" / "MS-TEST-0001.config", ["vlan 500\n", " name VRA\n"])
+
+    apply_plan = ApplyPlan(str(tmp_path), environment="test")
+    apply_plan.add_device("MS-TEST-0001", "cisco_ios")
+    apply_plan.add_block("MS-TEST-0001", "TEST-VRA500", 500, written_file)
+    apply_plan.save()
+    return tmp_path
+
+
+def test_plan_round_trip(saved_plan):
+    apply_plan = ApplyPlan.load(str(saved_plan))
+    plan_device = next(iter(apply_plan))
+
+    assert (plan_device.device, plan_device.device_type, plan_device.lines) == ("MS-TEST-0001", "cisco_ios", 2)
+    assert apply_plan.vlan_ids == [500]
+    assert apply_plan.read_block(plan_device.blocks[0]) == ["vlan 500", " name VRA"]
+
+
+def test_changed_block_is_rejected(saved_plan):
+    apply_plan = ApplyPlan.load(str(saved_plan))
+    plan_block = next(iter(apply_plan)).blocks[0]
+    # Тот же размер, другое содержимое
+    (saved_plan / plan_block.path).write_text("vlan 501\n name VRA\n")
+
+    with pytest.raises(ExceptionApplyPlan, match="was changed after the plan was created"):
+        apply_plan.read_block(plan_block)
+
+
+def test_missing_block_is_rejected(saved_plan):
+    apply_plan = ApplyPlan.load(str(saved_plan))
+    plan_block = next(iter(apply_plan)).blocks[0]
+    (saved_plan / plan_block.path).unlink()
+
+    with pytest.raises(ExceptionApplyPlan, match="was not found"):
+        apply_plan.read_block(plan_block)
+
+
+def test_missing_and_damaged_plans_are_rejected(tmp_path):
+    with pytest.raises(ExceptionApplyPlan, match="Run the 'create' command first"):
+        ApplyPlan.load(str(tmp_path))
+
+    (tmp_path / ApplyPlan.PLAN_FILE).write_text("{")
+    with pytest.raises(ExceptionApplyPlan, match="is damaged"):
+        ApplyPlan.load(str(tmp_path))
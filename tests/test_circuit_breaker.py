@@ -0,0 +1,136 @@
+import pytest
+from netmiko.exceptions import NetMikoAuthenticationException, NetMikoTimeoutException
+
+import Utils.CircuitBreaker
+import Utils.SSHConnect
+from Utils.CircuitBreaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, HostUnreachable
+from Utils.SSHConnect import AuthenticationFailed, SSHConnect
+
+HOST = "MS-TEST-0002"
+
+
+class NoPrecheckBreaker(CircuitBreaker):
+    """The breaker without the TCP pre-check (no network in the tests)."""
+
+    def tcp_precheck(self, host, port):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(Utils.CircuitBreaker.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def breaker(clock):
+    return NoPrecheckBreaker(enabled=True, failure_threshold=2, reset_timeout=60.0)
+
+
+def test_breaker_opens_after_failure_threshold(breaker):
+    breaker.record_failure(HOST, "timeout")
+    breaker.check(HOST)
+    assert breaker._state(HOST) == CLOSED
+
+    breaker.record_failure(HOST, "timeout")
+    assert breaker._state(HOST) == OPEN
+    with pytest.raises(HostUnreachable):
+        breaker.check(HOST)
+    assert HOST in breaker.skipped
+
+
+def test_breaker_half_open_success_closes(breaker, clock):
+    breaker.record_failure(HOST, "timeout")
+    breaker.record_failure(HOST, "timeout")
+
+    clock[0] += 60.0
+    assert breaker._state(HOST) == HALF_OPEN
+    breaker.check(HOST)
+
+    breaker.record_success(HOST)
+    assert breaker._state(HOST) == CLOSED
+    assert HOST not in breaker.hosts
+
+
+def test_breaker_half_open_failure_opens_again(breaker, clock):
+    breaker.record_failure(HOST, "timeout")
+    breaker.record_failure(HOST, "timeout")
+
+    clock[0] += 60.0
+    breaker.check(HOST)
+    breaker.record_failure(HOST, "refused")
+
+    assert breaker._state(HOST) == OPEN
+    assert breaker.hosts[HOST]["opened_at"] == clock[0]
+    with pytest.raises(HostUnreachable, match="refused"):
+        breaker.check(HOST)
+
+
+def test_breaker_turned_off_ignores_failures(clock):
+    breaker = NoPrecheckBreaker(enabled=False)
+    breaker.record_failure(HOST, "timeout")
+
+    breaker.check(HOST)
+    assert breaker.hosts == {}
+
+
+def test_breaker_state_persistence_round_trip(breaker, clock, tmp_path):
+    state_file = tmp_path / "breaker.json"
+    breaker.load(state_file)
+    breaker.record_failure(HOST, "timeout")
+    breaker.record_failure(HOST, "timeout")
+    breaker.save()
+
+    next_run_breaker = NoPrecheckBreaker(enabled=True, reset_timeout=60.0)
+    next_run_breaker.load(state_file)
+    assert next_run_breaker.hosts == breaker.hosts
+    with pytest.raises(HostUnreachable):
+        next_run_breaker.check(HOST)
+
+    clock[0] += 60.0
+    next_run_breaker.check(HOST)
+    assert next_run_breaker._state(HOST) == HALF_OPEN
+
+
+def test_breaker_load_ignores_broken_state_file(breaker, tmp_path):
+    state_file = tmp_path / "breaker.json"
+    state_file.write_text("{not json", encoding="utf-8")
+
+    breaker.load(state_file)
+    assert breaker.hosts == {}
+
+
+@pytest.fixture
+def ssh_breaker(monkeypatch, clock):
+    ssh_breaker = NoPrecheckBreaker(enabled=True)
+    monkeypatch.setattr(Utils.SSHConnect, "circuit_breaker", ssh_breaker)
+    return ssh_breaker
+
+
+def failing_connect_handler(error):
+    def connect_handler(**ssh_conn_params):
+        raise error
+
+    return connect_handler
+
+
+def test_authentication_error_does_not_trip_breaker(monkeypatch, ssh_breaker):
+    monkeypatch.setattr(
+        Utils.SSHConnect, "ConnectHandler", failing_connect_handler(NetMikoAuthenticationException("Login failed"))
+    )
+
+    with pytest.raises(AuthenticationFailed):
+        SSHConnect("127.0.0.1", "user", "password", device_type="cisco_ios").connect()
+    assert ssh_breaker.hosts == {}
+    assert ssh_breaker.skipped == {}
+
+
+def test_connection_error_trips_breaker(monkeypatch, ssh_breaker):
+    monkeypatch.setattr(
+        Utils.SSHConnect, "ConnectHandler", failing_connect_handler(NetMikoTimeoutException("TCP connection failed"))
+    )
+
+    with pytest.raises(HostUnreachable):
+        SSHConnect("127.0.0.1", "user", "password", device_type="cisco_ios").connect()
+    assert ssh_breaker._state("127.0.0.1") == OPEN
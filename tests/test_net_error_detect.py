@@ -0,0 +1,77 @@
+import pytest
+
+from Utils.NetErrorDetect import NetErrorClassifier, NetErrorDetect
+
+CISCO_OUTPUT = """MS-TEST-0001(config)#vlan 500
+% Applying VLAN changes may take few minutes.  Please do not interrupt.
+MS-TEST-0001(config-vlan)#name TEST-VRA500
+MS-TEST-0001(config-vlan)#interface Vlan500
+MS-TEST-0001(config-if)#ip address 10.1.0.1 255.255.255.254
+% Warning: use /31 mask on non point-to-point interface cautiously
+MS-TEST-0001(config-if)#ip vrf forwardin TEST-VRA500
+                              ^
+% Invalid input detected at '^' marker.
+MS-TEST-0001(config-if)#shutdown
+% Warning: interface is a member of a port-channel
+"""
+CISCO_COMMANDS = [
+    "vlan 500",
+    "name TEST-VRA500",
+    "interface Vlan500",
+    "ip address 10.1.0.1 255.255.255.254",
+    "ip vrf forwardin TEST-VRA500",
+    "shutdown",
+]
+
+
+def test_ignore_rules_win_over_the_generic_rules():
+    detected_errors = NetErrorClassifier("cisco").classify(CISCO_OUTPUT, CISCO_COMMANDS)
+
+    assert [detected_error.rule for detected_error in detected_errors] == ["invalid_input", "warning"]
+
+
+def test_errors_are_attributed_to_the_preceding_command():
+    detected_errors = NetErrorClassifier("cisco").classify(CISCO_OUTPUT, CISCO_COMMANDS)
+
+    assert [detected_error.command for detected_error in detected_errors] == [
+        "ip vrf forwardin TEST-VRA500",
+        "shutdown",
+    ]
+    assert detected_errors[0].text == "Invalid input detected at '^' marker."
+
+
+def test_min_severity_filters_warnings():
+    detected_errors = NetErrorClassifier("cisco").classify(CISCO_OUTPUT, CISCO_COMMANDS, min_severity="error")
+
+    assert [detected_error.severity for detected_error in detected_errors] == ["error"]
+
+
+def test_severity_overrides():
+    classifier = NetErrorClassifier("cisco", severities={"warning": "error", "invalid_input": "ignore"})
+    detected_errors = classifier.classify(CISCO_OUTPUT, CISCO_COMMANDS, min_severity="error")
+
+    assert [(detected_error.rule, detected_error.severity) for detected_error in detected_errors] == [
+        ("warning", "error")
+    ]
+
+
+@pytest.mark.parametrize("severities", [{"no_such_rule": "error"}, {"warning": "fatal"}])
+def test_invalid_overrides_are_rejected(severities):
+    with pytest.raises(ValueError):
+        NetErrorClassifier("cisco", severities=severities)
+
+
+def test_output_without_command_echo_uses_the_first_command():
+    detected_errors = NetErrorClassifier("huawei").classify("Error: Unrecognized command found.", ["vlan 500"])
+
+    assert detected_errors[0].command == "vlan 500"
+    assert (
+        detected_errors[0].message
+        == 'An error occurred while executing the command "vlan 500" -> Unrecognized command found.'
+    )
+
+
+def test_legacy_checks_and_unsupported_os():
+    assert NetErrorDetect.check_cisco_errors("vlan 500", "% Incomplete command.") is not None
+    assert NetErrorDetect.check_cisco_errors("vlan 500", "% Applying VLAN changes may take few minutes.") is None
+    assert NetErrorDetect.classifier("juniper_junos") is None
@@ -0,0 +1,139 @@
+import pytest
+
+from Utils.NxosJson import (
+    map_cdp_neighbors_detail,
+    map_interfaces_switchport,
+    map_port_channel_summary,
+    map_spanning_tree,
+    table_rows,
+)
+
+
+def test_single_row_table_is_returned_as_a_list():
+    assert table_rows({"TABLE_x": {"ROW_x": {"a": 1}}}, "x") == [{"a": 1}]
+    assert table_rows({"TABLE_x": {"ROW_x": [{"a": 1}, {"a": 2}]}}, "x") == [{"a": 1}, {"a": 2}]
+
+
+def test_map_interfaces_switchport():
+    output_d = {
+        "TABLE_interface": {
+            "ROW_interface": [
+                {"interface": "Ethernet1/1", "oper_mode": "trunk", "trunk_vlans": "1-3,100"},
+                {"interface": "Ethernet1/2", "oper_mode": "access", "trunk_vlans": "1-4094"},
+            ]
+        }
+    }
+
+    assert map_interfaces_switchport(output_d)["Ethernet1/1"] == {
+        "interface": "Ethernet1/1",
+        "mode": "trunk",
+        "trunking_vlans": "1-3,100",
+    }
+
+
+def test_map_cdp_neighbors_detail_strips_the_serial_number():
+    output_d = {
+        "TABLE_cdp_neighbor_detail_info": {
+            "ROW_cdp_neighbor_detail_info": {"device_id": "SW-TEST-01(FOX123)", "intf_id": "Ethernet1/2"}
+        }
+    }
+
+    assert map_cdp_neighbors_detail(output_d) == [
+        {"dest_host": "SW-TEST-01", "local_port": "Ethernet1/2", "remote_port": ""}
+    ]
+
+
+def test_map_port_channel_summary_with_and_without_members():
+    output_d = {
+        "TABLE_channel": {
+            "ROW_channel": [
+                {"port-channel": "port-channel10", "TABLE_member": {"ROW_member": {"port": "Ethernet1/2"}}},
+                {"port-channel": "port-channel20"},
+            ]
+        }
+    }
+
+    assert map_port_channel_summary(output_d) == [
+        {"bundle_iface": "port-channel10", "phys_iface": ["Ethernet1/2"]},
+        {"bundle_iface": "port-channel20", "phys_iface": []},
+    ]
+
+
+def test_map_spanning_tree_of_several_instances():
+    output_d = {
+        "TABLE_tree_inst": {
+            "ROW_tree_inst": [
+                {
+                    "tree_inst": 100,
+                    "TABLE_port": {
+                        "ROW_port": {
+                            "ifname": "Ethernet1/1",
+                            "role": "root",
+                            "state": "forwarding",
+                            "cost": 2,
+                            "port_id": "128.1",
+                            "type": "P2p",
+                        }
+                    },
+                },
+                {
+                    "tree_inst": 200,
+                    "TABLE_port": {
+                        "ROW_port": {
+                            "ifname": "port-channel10",
+                            "role": "alternate",
+                            "state": "blocking",
+                            "cost": 1,
+                            "port_id": "128.4105",
+                        }
+                    },
+                },
+            ]
+        }
+    }
+
+    assert map_spanning_tree(output_d) == [
+        {
+            "vlan_id": "100",
+            "interface": "Eth1/1",
+            "role": "Root",
+            "status": "FWD",
+            "cost": "2",
+            "port_priority": "128",
+            "port_id": "1",
+            "type": "P2p",
+        },
+        {
+            "vlan_id": "200",
+            "interface": "Po10",
+            "role": "Altn",
+            "status": "BLK",
+            "cost": "1",
+            "port_priority": "128",
+            "port_id": "4105",
+            "type": "",
+        },
+    ]
+
+
+def test_unexpected_structure_raises_for_the_textfsm_fallback():
+    with pytest.raises(KeyError):
+        map_spanning_tree({"TABLE_tree_inst": {"ROW_tree_inst": {"tree_inst": 100}}})
+
+
+def test_net_helper_falls_back_to_textfsm_on_unexpected_json(fake_connection):
+    from Utils.NetHelper import NetHelper
+
+    ssh_conn = fake_connection(
+        {
+            "| json": '{"unexpected": {}}',
+            "spanning-tree": "VLAN0100\nEth1/1            Root FWD 2         128.1    P2p\n",
+        },
+        host="NX-TEST-01",
+        device_type="cisco_nxos",
+    )
+    sh_spanning_tree = NetHelper(ssh_conn, nxos_json=True)._send_structured_command(
+        "sh spanning-tree vlan 100", "ntc_templates/cisco_ios_show_spanning-tree.textfsm", map_spanning_tree
+    )
+
+    assert [(stp_dict["vlan_id"], stp_dict["interface"]) for stp_dict in sh_spanning_tree] == [("100", "Eth1/1")]
@@ -0,0 +1,64 @@
+import pytest
+
+from Utils.NetHelper import NetHelper, NetworkParsingError
+
+PROMPT = "MS-TEST-0001#"
+OUTPUTS = {
+    "sh clock": "*10:00:00.000 UTC Mon Oct 19 2026",
+    "sh int Gi1/0/1 switchport": "Name: Gi1/0/1\nSwitchport: Enabled",
+    "sh run | i hostname": "",
+}
+
+
+class PipelinedChannel:
+    """Echoes the commands written back-to-back and returns the stream in
+    small chunks with CRLF line ends, like a real channel."""
+
+    host = "MS-TEST-0001"
+    device_type = "cisco_ios"
+    RETURN = "\n"
+
+    def __init__(self, echo_errors=None):
+        self.stream = ""
+        self.echo_errors = echo_errors or {}
+
+    def find_prompt(self):
+        return PROMPT
+
+    def clear_buffer(self):
+        pass
+
+    def normalize_linefeeds(self, chunk):
+        return chunk.replace("\r\n", "\n")
+
+    def write_channel(self, data):
+        for command in data.split(self.RETURN)[:-1]:
+            output_lines = OUTPUTS[command].split("\n") if OUTPUTS[command] else []
+            echo = self.echo_errors.get(command, command)
+            self.stream += "".join(f"{line}\r\n" for line in [echo, *output_lines]) + PROMPT
+
+    def read_channel(self):
+        chunk, self.stream = self.stream[:7], self.stream[7:]
+        return chunk
+
+
+def test_stream_is_split_into_per_command_outputs():
+    net_helper = NetHelper(PipelinedChannel(), pipelining=True)
+
+    assert net_helper._send_commands_pipelined(list(OUTPUTS)) == list(OUTPUTS.values())
+
+
+def test_echo_mismatch_is_reported():
+    net_helper = NetHelper(PipelinedChannel(echo_errors={"sh clock": "sh clok"}), pipelining=True)
+
+    with pytest.raises(NetworkParsingError, match="could not split the pipelined output of 'sh clock'"):
+        net_helper._send_commands_pipelined(list(OUTPUTS))
+
+
+def test_missing_prompts_time_out():
+    channel = PipelinedChannel()
+    channel.write_channel = lambda data: None
+    net_helper = NetHelper(channel, pipelining=True)
+
+    with pytest.raises(NetworkParsingError, match="timed out"):
+        net_helper._send_commands_pipelined(["sh clock"], read_timeout=0.05)
@@ -0,0 +1,50 @@
+import pytest
+
+from Utils.NetHelper import NetHelper, UnsupportedOsType, scope_names_pattern
+
+DESCRIPTION_OUTPUT = """Interface                      Status         Protocol Description
+Gi1/0                          up             up       UPLINK SCOPE_VRA
+Gi1/3                          up             up       SCOPE_VRA_OLD client
+Gi1/4                          up             up       SCOPE_VRA, SCOPE_VRA_OLD
+Gi1/5                          admin down     down     SCOPE_VRA
+Gi1/6                          up             up       XSCOPE_VRA
+"""
+
+
+def test_scope_names_pattern_prefers_longest_name():
+    scope_pattern = scope_names_pattern(("SCOPE_VRA", "SCOPE_VRA_OLD"))
+
+    assert scope_pattern.findall("SCOPE_VRA_OLD") == ["SCOPE_VRA_OLD"]
+    assert scope_pattern.findall("SCOPE_VRA SCOPE_VRA_OLD") == ["SCOPE_VRA", "SCOPE_VRA_OLD"]
+
+
+@pytest.mark.parametrize("description", ["XSCOPE_VRA", "SCOPE_VRA2", "SCOPE_VRA_NEW"])
+def test_scope_names_pattern_matches_whole_words(description):
+    assert scope_names_pattern(("SCOPE_VRA",)).search(description) is None
+
+
+def test_scope_names_pattern_escapes_names():
+    scope_pattern = scope_names_pattern(("SCOPE.A",))
+
+    assert scope_pattern.search("SCOPEXA") is None
+    assert scope_pattern.search("uplink SCOPE.A") is not None
+
+
+def test_scope_names_pattern_is_memoized():
+    assert scope_names_pattern(("SCOPE_A", "SCOPE_B")) is scope_names_pattern(("SCOPE_A", "SCOPE_B"))
+
+
+def test_scopes_by_description_use_one_command(fake_connection):
+    ssh_conn = fake_connection({"description": DESCRIPTION_OUTPUT})
+    scopes_intfs_d = NetHelper(ssh_conn).get_intf_in_scopes_by_description(["SCOPE_VRA", "SCOPE_VRA_OLD"])
+
+    assert ssh_conn.sent_with("description") == ["sh int description"]
+    assert set(scopes_intfs_d["SCOPE_VRA"]) == {"Gi1/0", "Gi1/4"}
+    assert set(scopes_intfs_d["SCOPE_VRA_OLD"]) == {"Gi1/3", "Gi1/4"}
+
+
+def test_scopes_by_description_require_cisco_ios(fake_connection):
+    ssh_conn = fake_connection({"description": DESCRIPTION_OUTPUT}, device_type="cisco_nxos")
+
+    with pytest.raises(UnsupportedOsType):
+        NetHelper(ssh_conn).get_intf_in_scopes_by_description(["SCOPE_VRA"])
@@ -0,0 +1,70 @@
+import pytest
+
+from Utils.NetHelper import NetHelper
+
+STP_OUTPUT = """
+VLAN0100
+  Spanning tree enabled protocol rstp
+Interface           Role Sts Cost      Prio.Nbr Type
+------------------- ---- --- --------- -------- --------------------------------
+Gi1/0               Root FWD 4         128.1    P2p
+Gi1/3               Desg FWD 4         128.4    P2p
+
+VLAN0200
+  Spanning tree enabled protocol rstp
+Interface           Role Sts Cost      Prio.Nbr Type
+------------------- ---- --- --------- -------- --------------------------------
+Gi1/0               Root FWD 4         128.1    P2p
+Gi1/4               Desg FWD 4         128.5    P2p
+
+VLAN0300
+  Spanning tree enabled protocol rstp
+Interface           Role Sts Cost      Prio.Nbr Type
+------------------- ---- --- --------- -------- --------------------------------
+Gi1/5               Desg FWD 4         128.6    P2p
+"""
+
+
+@pytest.mark.parametrize(
+    "vlan_ids, vlan_ranges",
+    [
+        ([100], "100"),
+        ([100, 101, 102, 200], "100-102,200"),
+        ([100, 101, 102, 200, 105, 104], "100-102,104-105,200"),
+        ([7, 7, 8], "7-8"),
+        ([1, 3, 5], "1,3,5"),
+    ],
+)
+def test_format_vlan_ranges(vlan_ids, vlan_ranges):
+    assert NetHelper._format_vlan_ranges(vlan_ids) == vlan_ranges
+
+
+@pytest.fixture
+def ssh_conn(fake_connection):
+    return fake_connection({"spanning-tree": STP_OUTPUT})
+
+
+def test_stp_vlans_use_one_range_command(ssh_conn):
+    scopes_intfs_d = NetHelper(ssh_conn).get_intf_in_scopes_by_stp_vlans({"SCOPE_A": [100], "SCOPE_B": [200, 201]})
+
+    assert ssh_conn.sent_with("spanning-tree") == ["sh spanning-tree vlan 100,200-201"]
+    assert set(scopes_intfs_d["SCOPE_A"]) == {"Gi1/0", "Gi1/3"}
+    assert set(scopes_intfs_d["SCOPE_B"]) == {"Gi1/0", "Gi1/4"}
+
+
+def test_stp_vlans_ignore_vlans_outside_scopes(ssh_conn):
+    scopes_intfs_d = NetHelper(ssh_conn).get_intf_in_scopes_by_stp_vlans({"SCOPE_A": [100]})
+
+    assert "Gi1/5" not in scopes_intfs_d["SCOPE_A"]
+
+
+def test_stp_vlans_fall_back_to_full_stp_when_ranges_are_too_long(ssh_conn):
+    # Каждый второй vlan - диапазоны не сжимаются и строка длиннее лимита
+    scope_vlan_ids = {"SCOPE_A": [100], "SCOPE_B": list(range(1000, 1400, 2))}
+    assert len(NetHelper._format_vlan_ranges(scope_vlan_ids["SCOPE_B"] + [100])) > NetHelper.STP_VLAN_RANGE_MAX_LEN
+
+    scopes_intfs_d = NetHelper(ssh_conn).get_intf_in_scopes_by_stp_vlans(scope_vlan_ids)
+
+    assert ssh_conn.sent_with("spanning-tree") == ["sh spanning-tree"]
+    assert set(scopes_intfs_d["SCOPE_A"]) == {"Gi1/0", "Gi1/3"}
+    assert scopes_intfs_d["SCOPE_B"] == {}
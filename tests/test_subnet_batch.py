@@ -0,0 +1,62 @@
+import pytest
+
+from Utils.SubnetBatch import SubnetBatch, SubnetRecord, SubnetValidationError, int_to_ipv4
+
+
+def test_records_are_parsed_into_integers():
+    subnet_batch = SubnetBatch.from_lines(["10.1.0.0/24", "", "  192.168.10.0/30  "])
+
+    assert len(subnet_batch) == 2
+    assert [record.with_prefixlen for record in subnet_batch] == ["10.1.0.0/24", "192.168.10.0/30"]
+    assert subnet_batch[0].network_and_netmask == "10.1.0.0 255.255.255.0"
+    assert subnet_batch[0].gateway_and_netmask == "10.1.0.1 255.255.255.0"
+
+
+def test_prefix_length_defaults_to_32():
+    subnet_record = SubnetRecord.from_string("172.16.5.7")
+
+    assert subnet_record.prefix_len == 32
+    assert int_to_ipv4(subnet_record.netmask) == "255.255.255.255"
+
+
+def test_host_route_gateway_is_the_network_address():
+    assert int_to_ipv4(SubnetRecord.from_string("172.16.5.7/32").gateway) == "172.16.5.7"
+    assert int_to_ipv4(SubnetRecord.from_string("172.16.5.6/31").gateway) == "172.16.5.7"
+
+
+@pytest.mark.parametrize(
+    "subnet, message",
+    [
+        ("10.1.0.1/24", "host bits set"),
+        ("8.8.8.0/24", "RF"),
+        ("172.32.0.0/16", "RF"),
+        ("10.0.0.0/7", "RF"),
+        ("10.1.0.0/33", "does not appear to be an IPv4 network"),
+        ("10.1.0/24", "does not appear to be an IPv4 network"),
+        ("10.01.0.0/24", "does not appear to be an IPv4 network"),
+        ("10.256.0.0/24", "does not appear to be an IPv4 network"),
+    ],
+)
+def test_invalid_subnets_are_rejected(subnet, message):
+    with pytest.raises(SubnetValidationError) as error:
+        SubnetBatch.from_lines([subnet])
+
+    assert message in error.value.message
+
+
+def test_duplicates_are_rejected_with_the_first_occurrence():
+    with pytest.raises(SubnetValidationError) as error:
+        SubnetBatch.from_lines(["10.1.0.0/24", "10.1.1.0/24", "10.1.0.0/24"])
+
+    assert error.value.message == "10.1.0.0/24 is duplicated (first seen as 10.1.0.0/24)."
+
+
+def test_same_network_with_other_prefix_is_not_a_duplicate():
+    assert len(SubnetBatch.from_lines(["10.1.0.0/24", "10.1.0.0/25"])) == 2
+
+
+def test_all_errors_of_the_batch_are_reported_at_once():
+    with pytest.raises(SubnetValidationError) as error:
+        SubnetBatch.from_lines(["bad", "10.1.0.1/24", "8.8.8.0/24"])
+
+    assert len(error.value.message.splitlines()) == 3
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import Utils.ThreadedSSHConnect
+from Utils.AsyncNetHelper import AsyncNetHelper
+from Utils.ThreadedSSHConnect import SessionNotConnected, ThreadedSSHConnect
+
+STP_OUTPUT = """
+VLAN0100
+  Spanning tree enabled protocol rstp
+Interface           Role Sts Cost      Prio.Nbr Type
+------------------- ---- --- --------- -------- --------------------------------
+Gi1/0               Root FWD 4         128.1    P2p
+"""
+
+
+class InFlight:
+    """Counts the calls running at the same time."""
+
+    def __init__(self) -> None:
+        self.current = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def call(self, func, *args, **kwargs):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        try:
+            time.sleep(0.02)
+            return func(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.current -= 1
+
+
+class FakeSSH:
+    """Not connected SSHConnect double, connect() returns the fake
+    connection with the send_command calls counted by in_flight."""
+
+    def __init__(self, make_connection, in_flight: InFlight = None) -> None:
+        self.make_connection = make_connection
+        self.in_flight = in_flight
+        self.disconnected = False
+
+    def connect(self):
+        ssh_conn = self.make_connection()
+        if self.in_flight is not None:
+            send_command = ssh_conn.send_command
+            ssh_conn.send_command = lambda *args, **kwargs: self.in_flight.call(send_command, *args, **kwargs)
+        return ssh_conn
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+@pytest.fixture
+def small_ssh_executor(monkeypatch):
+    monkeypatch.setattr(Utils.ThreadedSSHConnect, "SSH_WORKERS", 2)
+    monkeypatch.setattr(Utils.ThreadedSSHConnect, "_executor", None)
+    yield
+    Utils.ThreadedSSHConnect.ssh_executor().shutdown()
+
+
+def threaded_ssh(netdev_host: str, connect_factory, **kwargs) -> ThreadedSSHConnect:
+    return ThreadedSSHConnect(netdev_host, "user", "password", connect_factory=connect_factory, **kwargs)
+
+
+def test_gather_over_more_sessions_than_workers(small_ssh_executor, fake_connection):
+    all_sessions = InFlight()
+    netdevs = [f"MS-TEST-{num:04}" for num in range(8)]
+
+    def connect_factory(host, device_type):
+        return FakeSSH(lambda: fake_connection({"clock": f"{host} clock"}, host=host), all_sessions)
+
+    async def sh_clock(netdev):
+        async with threaded_ssh(netdev, connect_factory) as ssh:
+            return await ssh.send_command("sh clock")
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(sh_clock(netdev) for netdev in netdevs)), timeout=10)
+
+    assert asyncio.run(main()) == [f"{netdev} clock" for netdev in netdevs]
+    assert all_sessions.peak == Utils.ThreadedSSHConnect.SSH_WORKERS
+
+
+def test_calls_on_one_connection_are_serialized(fake_connection):
+    one_session = InFlight()
+    commands = [f"sh clock {num}" for num in range(5)]
+    ssh = threaded_ssh(
+        "MS-TEST-0001",
+        lambda host, device_type: FakeSSH(lambda: fake_connection({"clock": "clock"}), one_session),
+        executor=ThreadPoolExecutor(max_workers=4),
+    )
+
+    async def main():
+        await ssh.connect()
+        await asyncio.gather(*(ssh.send_command(command) for command in commands))
+        await ssh.disconnect()
+
+    asyncio.run(main())
+    assert one_session.peak == 1
+    assert ssh.connection.sent == commands
+    assert ssh.ssh.disconnected
+    ssh.executor.shutdown()
+
+
+def test_session_is_not_connected_before_connect(fake_connection):
+    ssh = threaded_ssh("MS-TEST-0001", lambda host, device_type: FakeSSH(lambda: fake_connection({})))
+
+    with pytest.raises(SessionNotConnected):
+        asyncio.run(ssh.send_command("sh clock"))
+
+
+def test_net_helper_is_bound_to_the_current_connection(fake_connection):
+    ssh = threaded_ssh(
+        "MS-TEST-0001",
+        lambda host, device_type: FakeSSH(lambda: fake_connection({"spanning-tree": STP_OUTPUT}, host=host)),
+    )
+    net_helper = AsyncNetHelper(ssh)
+
+    async def discover():
+        await ssh.connect()
+        return await net_helper.get_intf_in_scopes_by_stp_vlans({"SCOPE_A": [100]})
+
+    assert set(asyncio.run(discover())["SCOPE_A"]) == {"Gi1/0"}
+    first_net_helper = net_helper.net_helper
+
+    asyncio.run(ssh.connect())
+    assert net_helper.net_helper is not first_net_helper
+    assert net_helper.net_helper.ssh_conn is ssh.connection
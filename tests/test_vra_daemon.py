@@ -0,0 +1,194 @@
+import json
+import socket
+import stat
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from Utils.VraDaemon import DONE, FAILED, DaemonError, VraDaemon, VraJob
+
+
+@pytest.fixture
+def vra_daemon(tmp_path):
+    return VraDaemon(
+        "user",
+        "password",
+        gateway="MS-TEST-0001",
+        scope_name="SCOPE_VRA",
+        scope_vlan_ids=[100],
+        config_dir=tmp_path / "configs",
+        cache_dir=tmp_path / "cache",
+        max_jobs=2,
+        job_ttl=60.0,
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def running_daemon(vra_daemon):
+    port = free_port()
+    server_thread = threading.Thread(target=vra_daemon.serve_forever, args=("127.0.0.1", port), daemon=True)
+    server_thread.start()
+    # Токен пишется до запуска HTTP-сервера: ждем, пока порт начнет принимать соединения
+    for _ in range(500):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.01)
+    yield vra_daemon, f"http://127.0.0.1:{port}"
+    vra_daemon.shutdown()
+    server_thread.join(5)
+
+
+def http_get(url: str, token: str = None) -> tuple[int, dict]:
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"} if token else {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as http_error:
+        return http_error.code, json.load(http_error)
+
+
+def test_token_is_required(running_daemon):
+    vra_daemon, url = running_daemon
+    token = vra_daemon.token_path.read_text("utf-8").strip()
+
+    assert stat.S_IMODE(vra_daemon.token_path.stat().st_mode) == 0o600
+    assert http_get(f"{url}/health")[0] == 401
+    assert http_get(f"{url}/health", "wrong-token")[0] == 401
+    assert http_get(f"{url}/health", token) == (200, vra_daemon.health())
+
+
+def test_check_token(running_daemon):
+    vra_daemon, _ = running_daemon
+    token = vra_daemon.token_path.read_text("utf-8").strip()
+
+    assert vra_daemon.check_token(f"Bearer {token}")
+    assert vra_daemon.check_token(f"bearer {token}")
+    assert not vra_daemon.check_token(token)
+    assert not vra_daemon.check_token(f"Basic {token}")
+    assert not vra_daemon.check_token(None)
+
+
+def test_token_file_is_removed_on_stop(running_daemon):
+    vra_daemon, _ = running_daemon
+    vra_daemon.shutdown()
+
+    for _ in range(500):
+        if not vra_daemon.token_path.exists():
+            break
+        time.sleep(0.01)
+    assert not vra_daemon.token_path.exists()
+
+
+def test_check_token_before_start(vra_daemon):
+    assert not vra_daemon.check_token("Bearer ")
+
+
+@pytest.mark.parametrize("host", ["127.0.0.1", "127.0.0.2", "::1", "localhost"])
+def test_loopback_hosts_are_allowed(host):
+    VraDaemon._verify_loopback(host)
+
+
+@pytest.mark.parametrize("host", ["0.0.0.0", "::", "10.0.0.1", "vra.example.com"])
+def test_other_hosts_are_rejected(host):
+    with pytest.raises(DaemonError):
+        VraDaemon._verify_loopback(host)
+
+
+def test_job_config_dir_inside_daemon_directory(vra_daemon):
+    assert vra_daemon._job_config_dir({}) == vra_daemon.config_dir.resolve()
+    assert vra_daemon._job_config_dir({"config_dir": str(vra_daemon.config_dir / "job")}) == (
+        vra_daemon.config_dir.resolve() / "job"
+    )
+
+
+@pytest.mark.parametrize("config_dir", ["/etc", "configs/../../outside", "configs_other"])
+def test_job_config_dir_outside_is_rejected(vra_daemon, tmp_path, config_dir):
+    with pytest.raises(DaemonError):
+        vra_daemon._job_config_dir({"config_dir": str(tmp_path / config_dir)})
+
+
+def test_job_config_dir_symlink_outside_is_rejected(vra_daemon, tmp_path):
+    vra_daemon.config_dir.mkdir()
+    (vra_daemon.config_dir / "link").symlink_to(tmp_path)
+
+    with pytest.raises(DaemonError):
+        vra_daemon._job_config_dir({"config_dir": str(vra_daemon.config_dir / "link")})
+
+
+def test_job_config_dir_of_unknown_create_job(vra_daemon):
+    with pytest.raises(DaemonError):
+        vra_daemon._job_config_dir({"create_job": "20260101-000000-00000000"})
+
+
+def test_job_events_until_finished():
+    job = VraJob("1", "create", {})
+    job.emit("discovery", device="MS-TEST-0001")
+    job.set_status(DONE, result={})
+
+    events = list(job.events())
+    assert [event["event"] for event in events] == ["discovery", "status"]
+    assert [event["seq"] for event in events] == [0, 1]
+    assert events[-1]["status"] == DONE
+    assert list(job.events(since=1)) == events[1:]
+
+
+def test_job_events_keepalive_and_wake_up():
+    job = VraJob("1", "create", {})
+
+    def finish_job():
+        time.sleep(0.05)
+        job.set_status(FAILED, error="Error")
+
+    threading.Thread(target=finish_job).start()
+    events = list(job.events(poll_timeout=0.01))
+
+    assert None in events
+    assert (events[-1]["event"], events[-1]["status"], events[-1]["error"]) == ("status", FAILED, "Error")
+
+
+def test_job_ids_are_unique(vra_daemon):
+    job_ids = {vra_daemon.submit("verify").job_id for _ in range(2)}
+
+    assert len(job_ids) == 2
+    assert "1" not in job_ids
+
+
+def test_finished_jobs_over_max_jobs_are_evicted(vra_daemon):
+    jobs = [vra_daemon.submit("verify") for _ in range(3)]
+    for job in jobs:
+        job.set_status(DONE, result={})
+
+    running_job = vra_daemon.submit("verify")
+
+    assert list(vra_daemon.jobs) == [jobs[1].job_id, jobs[2].job_id, running_job.job_id]
+
+
+def test_expired_jobs_are_evicted(vra_daemon):
+    expired_job, finished_job, queued_job = [vra_daemon.submit("verify") for _ in range(3)]
+    expired_job.set_status(DONE, result={})
+    finished_job.set_status(DONE, result={})
+    expired_job.finished -= vra_daemon.job_ttl + 1
+
+    new_job = vra_daemon.submit("verify")
+
+    assert list(vra_daemon.jobs) == [finished_job.job_id, queued_job.job_id, new_job.job_id]
+
+
+def test_create_job_refuses_existing_directory(vra_daemon, monkeypatch):
+    monkeypatch.setattr(VraDaemon, "_topology", lambda self, job, refresh=False: {})
+    job = vra_daemon.submit("create")
+    (vra_daemon.config_dir / job.job_id).mkdir(parents=True)
+
+    with pytest.raises(DaemonError, match="already exists"):
+        vra_daemon._job_create(job, {"networks": ["10.1.0.0/24"], "start_vlan_id": 500, "start_rd": 10})
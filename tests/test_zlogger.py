@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from Utils.zlogger import zLogger
+
+
+def log_file_lines(tmp_path) -> list[str]:
+    return [line for log_file in (tmp_path / "log").iterdir() for line in log_file.read_text("utf-8").splitlines()]
+
+
+def test_logger_is_configured_once():
+    logger = zLogger("tester").log("file").logger
+
+    assert zLogger("tester").log("file").logger is logger
+    assert len(logger.handlers) == 1
+
+
+def test_outputs_share_the_file_handler():
+    file_logger = zLogger("tester").log("file").logger
+    all_logger = zLogger("tester").log("all").logger
+
+    assert file_logger is not all_logger
+    assert file_logger.handlers[0] in all_logger.handlers
+
+
+def test_incorrect_output_is_rejected():
+    with pytest.raises(ValueError):
+        zLogger("tester").log("syslog")
+
+
+def test_threads_log_to_their_own_outputs(tmp_path, capsys):
+    def log_from_thread(thread_num: int) -> None:
+        for message_num in range(50):
+            zLogger("tester").log("file").info(f"thread {thread_num} message {message_num}")
+
+    threads = [threading.Thread(target=log_from_thread, args=(thread_num,)) for thread_num in range(8)]
+    for thread in threads:
+        thread.start()
+    for message_num in range(50):
+        zLogger("tester").log("all").info(f"main message {message_num}")
+    for thread in threads:
+        thread.join()
+
+    console_lines = capsys.readouterr().out.splitlines()
+    assert len(console_lines) == 50
+    assert not any("thread" in line for line in console_lines)
+    assert len(log_file_lines(tmp_path)) == 8 * 50 + 50
@@ -6,45 +6,42 @@ __version__ = "1.0"
 
 # -*- coding: utf-8 -*-
 
-import ipaddress
+import contextlib
+import functools
 import json
 import os
 import pathlib
 import random
 import shutil
 import time
+from collections import Counter
 from datetime import datetime
 from enum import Enum
-from typing import Final, TextIO
+from typing import Final, Optional, TextIO
 
 import typer
-from rich import box, print
+from rich import print
 from rich.console import Console
-from rich.progress import BarColumn, Progress, SpinnerColumn, TaskProgressColumn, TimeElapsedColumn, TimeRemainingColumn
-from rich.prompt import Confirm
-from rich.table import Column, Table
-from rich.tree import Tree
-
-from Utils.NetErrorDetect import NetErrorDetect
-from Utils.NetHelper import NetHelper
-from Utils.SSHConnect import SSHConnect
-from Utils.zlogger import zLogger
-from VRA import VraPreview, VraTest
-
-
-def check_ipv4_format(networks: TextIO) -> TextIO:
-    ip_for_check_list = networks.read().split("\n")
-    for subnet_for_check in ip_for_check_list:
-        if subnet_for_check.strip():
-            try:
-                subnet = ipaddress.ip_network(subnet_for_check)
-            except ValueError:
-                raise typer.BadParameter(f"{subnet_for_check} does not appear to be an IPv4 network.")
-            if not subnet.is_private:
-                raise typer.BadParameter(f"{subnet_for_check} isn't in the RFС1918 address space.")
 
-    networks.seek(0)
-    return networks
+# Тяжелые зависимости (netmiko, jinja2, coloredlogs, rich.progress/table/tree) импортируются
+# внутри команд, чтобы --help и проверка входных данных не платили за их загрузку.
+from Utils.ApplyPlan import ApplyPlan, ExceptionApplyPlan
+from Utils.CircuitBreaker import HostUnreachable, circuit_breaker
+from Utils.ConfigWriter import ConfigWriter
+from Utils.GenerationCache import GenerationCache
+from Utils.MemoryProfiler import MemoryBudgetExceeded, MemoryProfiler
+from Utils.NetTracer import tracer
+from Utils.RunMetrics import run_metrics
+from Utils.RunReport import RunReport
+from Utils.SubnetBatch import SubnetBatch, SubnetValidationError
+
+
+def load_ipv4_subnets(networks: TextIO) -> SubnetBatch:
+    """Reads the file with networks once and validates the whole batch."""
+    try:
+        return SubnetBatch.from_file(networks)
+    except SubnetValidationError as subnet_error:
+        raise typer.BadParameter(subnet_error.message)
 
 
 # Typer app
@@ -56,6 +53,67 @@ console = Console()
 VLAN_SCOPE: Final = "SCOPE_VRA"
 TEST_DC_GATEWAY: Final = "MS-TEST-0001"
 CONFIG_DIR: Final = "generated_vra_configs"
+CACHE_DIR: Final = ".vra_cache"
+DISCOVERY_STREAM_FILE: Final = "discovery.jsonl"
+SCOPE_TOPOLOGY_FILE: Final = "scope_topologies.json"
+# Частота перерисовки прогресс-бара в компактном режиме
+COMPACT_REFRESH_PER_SECOND: Final = 2
+
+
+def report_trace(trace_json: Optional[pathlib.Path]) -> None:
+    """Prints the SSH operations statistics and optionally exports them to
+    JSON."""
+    tracer.print_summary(console)
+    if trace_json:
+        tracer.export_json(trace_json)
+
+
+def get_bastion(
+    bastion: Optional[str],
+    bastion_user: Optional[str],
+    username: str,
+    password: str,
+    known_hosts: Optional[pathlib.Path] = None,
+    accept_new_key: Optional[bool] = False,
+):
+    """Returns the shared tunnel to the jump host or None if it is not
+    set."""
+
+    if not bastion:
+        return None
+
+    from Utils.BastionTunnel import get_bastion_tunnel, parse_bastion
+
+    bastion_host, bastion_port = parse_bastion(bastion)
+    return get_bastion_tunnel(
+        bastion_host,
+        bastion_user or username,
+        password,
+        port=bastion_port,
+        known_hosts=known_hosts,
+        accept_new_host_key=accept_new_key,
+    )
+
+
+def export_run_metrics(command_func):
+    """Decorator for the typer commands: measures the run and writes the
+    OpenMetrics textfile if the --metrics-file option is set (also when the
+    run is stopped with an error)."""
+
+    @functools.wraps(command_func)
+    def wrapper(*args, **kwargs):
+        run_metrics.begin(command_func.__name__)
+        success = False
+        try:
+            result = command_func(*args, **kwargs)
+            success = True
+            return result
+        finally:
+            run_metrics.finish(success)
+            if kwargs.get("metrics_file"):
+                run_metrics.write_textfile(kwargs["metrics_file"])
+
+    return wrapper
 
 
 class DatabaseKeys(str, Enum):
@@ -63,7 +121,14 @@ class DatabaseKeys(str, Enum):
     preview = "PREVIEW"
 
 
+class FsyncPolicy(str, Enum):
+    never = "never"
+    file = "file"
+    always = "always"
+
+
 @app.command()
+@export_run_metrics
 def create(
     environment: DatabaseKeys = typer.Option(
         ...,
@@ -77,7 +142,7 @@ def create(
         ...,
         "-n",
         "--network",
-        callback=check_ipv4_format,
+        callback=load_ipv4_subnets,
         prompt="Specify a txt file with a list of networks",
         help="TXT with IPv4 subnets",
     ),
@@ -112,10 +177,151 @@ def create(
         hide_input=True,
         help="Password for authentication",
     ),
+    fsync: FsyncPolicy = typer.Option(
+        FsyncPolicy.never,
+        "--fsync",
+        case_sensitive=False,
+        help="Fsync policy for the generated configuration files",
+    ),
+    use_cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse unchanged configuration files from previous runs",
+    ),
+    pipelining: bool = typer.Option(
+        False,
+        "--pipelining",
+        help="Write the discovery show commands back-to-back without waiting for the prompt",
+    ),
+    nxos_json: bool = typer.Option(
+        False,
+        "--nxos-json",
+        help="Use the '| json' show commands on NX-OS devices (TextFSM is used as the fallback)",
+    ),
+    prewarm: int = typer.Option(
+        4,
+        "--prewarm",
+        min=0,
+        help="Number of SSH sessions to CDP neighbors opened in the background during discovery (0 - off)",
+    ),
+    parse_workers: int = typer.Option(
+        0,
+        "--parse-workers",
+        min=0,
+        help="Number of processes for the TextFSM parsing of the discovery outputs (0 - parse inline)",
+    ),
+    scopes: Optional[list[str]] = typer.Option(
+        None,
+        "--scope",
+        help=f"VLAN scope from VLANSCOPE.json to discover, can be repeated (one crawl for all scopes); "
+        f"the configuration is generated for the first one [default: {VLAN_SCOPE}]",
+    ),
+    stp_all_vlans: bool = typer.Option(
+        False,
+        "--stp-all-vlans",
+        help="Check all VLANs of the scopes with one 'show spanning-tree' per device instead of one random VLAN",
+    ),
+    stream: bool = typer.Option(
+        False,
+        "--stream",
+        help="Write every device discovery result to a JSONL file and render the devices one by one from it",
+    ),
+    trace: bool = typer.Option(
+        False,
+        "--trace",
+        help="Measure SSH operations and print p50/p95/max tables at the end",
+    ),
+    trace_json: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--trace-json",
+        dir_okay=False,
+        help="JSON file for the SSH operations trace (implies --trace)",
+    ),
+    mem_profile: bool = typer.Option(
+        False,
+        "--mem-profile",
+        help="Report peak/retained memory and top allocation sites per stage",
+    ),
+    mem_budget: Optional[float] = typer.Option(
+        None,
+        "--mem-budget",
+        min=1,
+        help="Fail the run when a stage peak memory exceeds this value in MB (implies --mem-profile)",
+    ),
+    metrics_file: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--metrics-file",
+        dir_okay=False,
+        help="OpenMetrics textfile for the run statistics (node-exporter textfile collector)",
+    ),
+    bastion: Optional[str] = typer.Option(
+        None,
+        "--bastion",
+        help="Jump host HOST[:PORT], all device sessions are multiplexed over one SSH connection to it",
+    ),
+    bastion_user: Optional[str] = typer.Option(
+        None,
+        "--bastion-user",
+        help="Username for the jump host (default: --username, key/agent or --password authentication)",
+    ),
+    bastion_known_hosts: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--bastion-known-hosts",
+        dir_okay=False,
+        help="known_hosts file with the jump host key (in addition to the system known_hosts)",
+    ),
+    bastion_accept_new_key: bool = typer.Option(
+        False,
+        "--bastion-accept-new-key",
+        help="Trust an unknown jump host key and save it to --bastion-known-hosts (rejected by default)",
+    ),
+    use_circuit_breaker: bool = typer.Option(
+        True,
+        "--circuit-breaker/--no-circuit-breaker",
+        help="TCP pre-check the devices and skip the ones which failed to connect",
+    ),
+    breaker_state: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--breaker-state",
+        dir_okay=False,
+        help="JSON file to keep the circuit breaker states across runs",
+    ),
+    verbose: bool = typer.Option(
+        False,
+        "--verbose",
+        help="Print the full per-device trees and tables instead of the aggregated counts",
+    ),
+    report_file: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--report",
+        dir_okay=False,
+        help="Text file for the per-device details (interfaces, IPv4 and STP tables)",
+    ),
 ):
     """Create the VRA network configuration."""
 
+    from rich.prompt import Confirm
+    from rich.tree import Tree
+
+    from Utils.ConnectionPrewarmer import ConnectionPrewarmer
+    from Utils.DiscoveryStream import DiscoveryStream
+    from Utils.NetHelper import NetHelper
+    from Utils.ParsePool import ParsePool
+    from Utils.ScopeDiscovery import ScopeDiscovery, cdp_neighbors_by_intf
+    from Utils.SSHConnect import AuthenticationFailed, SSHConnect
+    from Utils.zlogger import zLogger
+    from VRA import VraPreview, VraTest, VraTopology
+
     logger = zLogger(username)
+    tracer.enabled = trace or trace_json is not None
+    bastion_tunnel = get_bastion(bastion, bastion_user, username, password, bastion_known_hosts, bastion_accept_new_key)
+    circuit_breaker.enabled = use_circuit_breaker
+    if breaker_state:
+        circuit_breaker.load(breaker_state)
+
+    # В компактном режиме построчные сообщения пишутся только в файл, на консоль выводятся итоги
+    detail_log_to = "all" if verbose else "file"
+    run_report = RunReport(report_file)
 
     # Удаляем старые конфигурационные файлы перед созданием новых, если они есть.
     if pathlib.Path(CONFIG_DIR).is_dir() and os.listdir(CONFIG_DIR):
@@ -147,109 +353,274 @@ def create(
 
     start_time = datetime.now()
 
-    # Список будущих VRA сетей
-    vra_subnets: list[str] = []
+    # Профилирование памяти по этапам: discovery -> vra construction -> render and write
+    memory_profiler = MemoryProfiler(enabled=mem_profile or mem_budget is not None, budget_mb=mem_budget)
+    memory_profiler.start()
+
+    def memory_checkpoint(stage: str) -> None:
+        try:
+            memory_profiler.checkpoint(stage)
+        except MemoryBudgetExceeded as memory_error:
+            memory_profiler.stop()
+            memory_profiler.print_summary(console)
+            logger.log("all").error(f"{memory_error.message} The script is stopped.")
+            exit(1)
+
+    # Провалидированный список будущих VRA сетей (файл уже прочитан в load_ipv4_subnets)
+    vra_subnets: SubnetBatch = networks
 
     # Список с экземплярами классов VraTest | VraPreview
     vra_subnets_cls: list[VraTest | VraPreview] = []
 
-    # Берем рандомный vlan из скоупа и ищем путь по нему. Скоупы VLAN описаны в VLANSCOPE.json
+    # Скоупы обходятся одновременно, конфигурация генерируется для первого из них
+    scopes = list(dict.fromkeys(scopes or [VLAN_SCOPE]))
+    render_scope = scopes[0]
+
+    # Берем рандомный vlan из каждого скоупа и ищем путь по нему. Скоупы VLAN описаны в VLANSCOPE.json
     try:
         with open("VLANSCOPE.json") as f:
             vlanscope_d: dict[str, list[int]] = json.load(f)
-            # Список vlan в интересуюшем нам VLAN SCOPE
-            scope_vlan_id_l: list[int] = vlanscope_d.get(VLAN_SCOPE)
     except FileNotFoundError:
         logger.log("all").error("The 'VLANSCOPE.json' file was not found.")
         exit()
 
-    # Случайно выбранный один vlan id из VLAN SCOPE
-    random_vlan_id: int = random.choice(scope_vlan_id_l)
+    unknown_scopes = [scope for scope in scopes if not vlanscope_d.get(scope)]
+    if unknown_scopes:
+        logger.log("all").error(f"The VLAN scopes {', '.join(unknown_scopes)} are not found in 'VLANSCOPE.json'.")
+        exit()
+
+    # Случайно выбранный один vlan id из каждого VLAN SCOPE
+    scope_vlan_ids: dict[str, int] = {scope: random.choice(vlanscope_d[scope]) for scope in scopes}
 
     # Финальный словарь с параметрами интерфейсов в {VLAN SCOPE}
     inf_params_d = {}
 
-    # Список сетевых устройств в котором ищем порты в {VLAN SCOPE}
-    net_todo_lst = []
-    net_todo_lst.append(TEST_DC_GATEWAY)
-
-    # Список сетевых устройств,которые мы уже проверили на порты в {VLAN SCOPE}
-    net_done_lst = []
-
-    # Обходим сетевые устройства и создаем словарь с параметрами портов в {VLAN SCOPE}
-    while net_todo_lst:
-        net_todo_lst = list(set(net_todo_lst))
-        current_netdev = net_todo_lst[0]
-        console.rule(f"{current_netdev} - Сollecting data to generate configurations for {VLAN_SCOPE}")
-
-        # С помощью класса NetHelper ищем порты в нужном для нас vlan scope
-        with SSHConnect(current_netdev, username, password, log_to="all") as ssh_conn:
-            netdev_cls_instance = NetHelper(ssh_conn, verbose=True)
-            net_intf_in_scope_d = netdev_cls_instance.get_intf_in_scope_by_stp_instance(random_vlan_id)
-            inf_params_d[current_netdev] = net_intf_in_scope_d
-
-            for intf in net_intf_in_scope_d.keys():
-                neighbors_lst = netdev_cls_instance.get_cdp_neigbors_by_intf(intf)
-                for neighbor in neighbors_lst:
-                    if neighbor not in net_done_lst:
-                        net_todo_lst.append(neighbor)
-        net_done_lst.append(current_netdev)
-        net_todo_lst.pop(0)
-
-    # Строим Rich-Tree
-    console.rule(f"{VLAN_SCOPE} network structure")
-    net_topology_tree = Tree(VLAN_SCOPE, style="red")
-    for netdev_host, intf_dict in inf_params_d.items():
-        netdev_host_branch = net_topology_tree.add(f"[green]{netdev_host}")
+    # Топологии остальных скоупов: устройство -> интерфейсы
+    extra_scope_topologies: dict[str, dict] = {scope: {} for scope in scopes[1:]}
+
+    # Типы ОС найденных сетевых устройств (нужны для плана применения конфигурации)
+    netdev_types_d: dict[str, str] = {}
+
+    # В потоковом режиме результаты обхода сразу пишутся в JSONL и не накапливаются в inf_params_d
+    discovery_stream = DiscoveryStream(pathlib.Path(CACHE_DIR, DISCOVERY_STREAM_FILE)).open_writer() if stream else None
+
+    def on_scope_reached(scope: str, netdev_host: str, intfs_d: dict) -> None:
+        """The device is reachable in the scope: its interfaces go to the
+        topology of the scope."""
+        if scope != render_scope:
+            extra_scope_topologies[scope][netdev_host] = intfs_d
+        elif discovery_stream:
+            discovery_stream.write(netdev_host, netdev_types_d.get(netdev_host), intfs_d)
+        else:
+            inf_params_d[netdev_host] = intfs_d
+
+    # Устройство попадает в топологию скоупа, если до него есть путь по интерфейсам этого скоупа
+    scope_discovery = ScopeDiscovery(scopes, TEST_DC_GATEWAY, on_reached=on_scope_reached)
+
+    # Разбор вывода TextFSM выполняется в отдельных процессах, пока SSH-поток получает следующие выводы
+    parse_pool = ParsePool(max_workers=parse_workers) if parse_workers else None
+
+    # SSH-сессии к найденным соседям открываются в фоне, пока обрабатывается текущее устройство
+    prewarmer = ConnectionPrewarmer(
+        lambda netdev: SSHConnect(netdev, username, password, log_to="file", bastion=bastion_tunnel),
+        max_sessions=prewarm,
+    )
+
+    def collect_device(current_netdev: str) -> tuple[dict, dict]:
+        """Interfaces of all scopes on the device and their CDP neighbors."""
+        # С помощью класса NetHelper ищем порты в нужных для нас vlan scope
+        with prewarmer.session(current_netdev) as ssh_conn:
+            netdev_cls_instance = NetHelper(
+                ssh_conn, verbose=verbose, pipelining=pipelining, parse_pool=parse_pool, nxos_json=nxos_json
+            )
+            netdev_types_d[current_netdev] = ssh_conn.device_type
+            if stp_all_vlans:
+                scope_intfs_d = netdev_cls_instance.get_intf_in_scopes_by_stp_vlans(
+                    {scope: vlanscope_d[scope] for scope in scopes}
+                )
+            else:
+                scope_intfs_d = netdev_cls_instance.get_intf_in_scopes_by_stp_instance(scope_vlan_ids)
+            return scope_intfs_d, cdp_neighbors_by_intf(netdev_cls_instance, scope_intfs_d)
+
+    def on_visit(current_netdev: str, number: int, queued: int) -> None:
+        if verbose:
+            console.rule(f"{current_netdev} - Сollecting data to generate configurations for {', '.join(scopes)}")
+        else:
+            console.print(f"Discovery: {current_netdev} (#{number}, {queued} queued)")
+
+    # Пропущенные при обходе устройства: без них путь L2 в топологии неполный
+    skipped_netdevs: list[str] = []
+
+    def on_skipped(netdev: str, unreachable: HostUnreachable) -> None:
+        skipped_netdevs.append(netdev)
+        logger.log("all").warning(f"{netdev} - device is skipped. {unreachable.message}")
+
+    # Обходим сетевые устройства и создаем словари с параметрами портов в скоупах
+    auth_error: Optional[AuthenticationFailed] = None
+    try:
+        scope_discovery.crawl(collect_device, on_visit=on_visit, on_queued=prewarmer.warm, on_skipped=on_skipped)
+    except AuthenticationFailed as error:
+        auth_error = error
+
+    prewarmer.close()
+    logger.log("file").info(f"Discovery SSH sessions: {prewarmer.hits} prewarmed, {prewarmer.misses} on demand.")
+    if parse_pool:
+        parse_pool.shutdown()
+
+    if discovery_stream:
+        discovery_stream.close()
+        logger.log("file").info(
+            f"{discovery_stream.records_written} discovery records were written to '{discovery_stream.stream_path}'."
+        )
+
+    # Конфигурация для неполной топологии не генерируется
+    if auth_error or skipped_netdevs:
+        if auth_error:
+            logger.log("all").error(f"{auth_error.message} The script is stopped.")
+        else:
+            logger.log("all").error(
+                f"Discovery skipped {len(skipped_netdevs)} devices ({', '.join(skipped_netdevs)}), "
+                f"the topology is incomplete. The script is stopped."
+            )
+        circuit_breaker.print_summary(console)
+        circuit_breaker.save()
+        exit(1)
+
+    if extra_scope_topologies:
+        scope_topology_path = pathlib.Path(CACHE_DIR, SCOPE_TOPOLOGY_FILE)
+        scope_topology_path.parent.mkdir(parents=True, exist_ok=True)
+        ConfigWriter().write(scope_topology_path, [json.dumps(extra_scope_topologies, indent=2)])
+        for scope, scope_topology_d in extra_scope_topologies.items():
+            run_report.count(scope, "devices", len(scope_topology_d))
+            run_report.count(scope, "interfaces", sum(len(intfs_d) for intfs_d in scope_topology_d.values()))
+        logger.log("all").info(
+            f"The topologies of {', '.join(extra_scope_topologies)} were written to '{scope_topology_path}'."
+        )
+
+    def discovery_records():
+        """Discovery results one device at a time: from the JSONL stream or from
+        inf_params_d."""
+        if discovery_stream:
+            yield from discovery_stream
+        else:
+            for netdev_host, intf_dict in inf_params_d.items():
+                yield netdev_host, netdev_types_d.get(netdev_host), intf_dict
+
+    memory_checkpoint("discovery")
+    run_metrics.mark_stage("discovery")
+    run_metrics.set("devices", discovery_stream.records_written if discovery_stream else len(inf_params_d))
+
+    # Строим Rich-Tree (в компактном режиме считаем устройства и интерфейсы по режимам)
+    net_topology_tree = Tree(render_scope, style="red")
+    for netdev_host, _, intf_dict in discovery_records():
+        run_report.count(render_scope, "devices")
+        if verbose:
+            netdev_host_branch = net_topology_tree.add(f"[green]{netdev_host}")
         for intf, intf_params_dict in intf_dict.items():
             intf_mode = intf_params_dict.get("intf_mode")
-            inf_branch = netdev_host_branch.add(f"{intf} ({intf_mode})", style="gold1")
+            run_report.count(render_scope, f"{intf_mode} interfaces")
+            run_report.add_row(
+                f"{render_scope} interfaces",
+                ("Device", "Interface", "Mode", "Allowed vlans"),
+                (netdev_host, intf, intf_mode, ",".join(map(str, intf_params_dict.get("allowed_vlans")))),
+            )
+            if verbose:
+                inf_branch = netdev_host_branch.add(f"{intf} ({intf_mode})", style="gold1")
 
-    print(net_topology_tree)
+    if verbose:
+        console.rule(f"{render_scope} network structure")
+        print(net_topology_tree)
 
-    # Считываем сети из текстового файла и добавляем их в список
-    for subnet in networks:
-        if not subnet.isspace():
-            vra_subnets.append(subnet.strip())
+    # Топология проверяется один раз и передается во все экземпляры VraTest | VraPreview по ссылке,
+    # в потоковом режиме экземпляры получают топологию очередного устройства перед его рендерингом
+    vra_topology = VraTopology({} if discovery_stream else inf_params_d)
 
     # Создаем экземпляры классы VraTest или VraPreview и добавляем их в список
     for num, subnet in enumerate(vra_subnets):
         vlan_id: int = start_vlan_id + num
         rd_extended_part: int = start_rd + num
         if environment.name == "test":
-            vra_subnets_cls.append(VraTest(vlan_id, subnet, rd_extended_part, inf_params_d))
+            vra_subnets_cls.append(VraTest(vlan_id, subnet, rd_extended_part, vra_topology))
         elif environment.name == "preview":
-            vra_subnets_cls.append(VraPreview(vlan_id, subnet, rd_extended_part, inf_params_d))
+            vra_subnets_cls.append(VraPreview(vlan_id, subnet, rd_extended_part, vra_topology))
+
+    memory_checkpoint("vra construction")
+    run_metrics.mark_stage("vra construction")
+
+    # Каталоги для конфигураций создаем один раз
+    for vra in vra_subnets_cls:
+        pathlib.Path(CONFIG_DIR, vra.vrf_name).mkdir(parents=True, exist_ok=True)
+
+    # Конфигурация пишется в файлы потоком из jinja2, без сборки всей конфигурации в памяти
+    config_writer = ConfigWriter(fsync=fsync.value)
 
-    # Проходим в цикле по экземплярам классов и вызываем метод генерации конфига
-    for net_dev in inf_params_d.keys():
-        console.rule(f"Generating configuration for {net_dev}.")
+    # Кэш генерации: неизменившиеся конфигурации не рендерятся повторно
+    generation_cache = GenerationCache(CACHE_DIR) if use_cache else None
 
-        # Проходим в цикле по сформированным экземплярам класса и вызываем в каждом экземпляре метод generate_config()
+    # План применения конфигурации: устройство -> упорядоченные блоки команд
+    apply_plan = ApplyPlan(CONFIG_DIR, environment=environment.value)
+
+    # Проходим в цикле по устройствам и вызываем метод генерации конфига
+    for net_dev, net_dev_type, intf_dict in discovery_records():
+        if verbose:
+            console.rule(f"Generating configuration for {net_dev}.")
+        apply_plan.add_device(net_dev, net_dev_type)
+
+        if discovery_stream:
+            device_topology = VraTopology({net_dev: intf_dict})
+            for vra in vra_subnets_cls:
+                vra.intf_in_scope_d = device_topology
+
+        # Проходим в цикле по сформированным экземплярам класса и вызываем в каждом экземпляре метод iter_config()
         for vra in vra_subnets_cls:
-            vra_generate_config = vra.generate_config(net_dev, verbose=False)
+            conf_path = pathlib.Path(CONFIG_DIR, vra.vrf_name, f"{net_dev}.config")
+            try:
+                if generation_cache:
+                    render_key = vra.render_key(net_dev)
+                    written_file = generation_cache.materialize(render_key, conf_path)
+                    if written_file is None:
+                        written_file = config_writer.write(conf_path, vra.iter_config(net_dev, verbose=False))
+                        generation_cache.store(render_key, written_file)
+                else:
+                    written_file = config_writer.write(conf_path, vra.iter_config(net_dev, verbose=False))
+                apply_plan.add_block(net_dev, vra.vrf_name, vra.vlan_id, written_file)
+            except OSError:
+                logger.log("all").error(f"Failed creating {net_dev} file.")
+            else:
+                run_report.count("Configurations", "written")
+                logger.log(detail_log_to).info(
+                    f"{vra.vrf_name} [{vra.environment}] - configuration has been successfully written to '{CONFIG_DIR}/{vra.vrf_name}'."
+                )
 
-            if vra_generate_config:
-                pathlib.Path("generated_vra_configs").mkdir(parents=True, exist_ok=True)
-                conf_path = "generated_vra_configs/" + vra.vrf_name + "/"
-                pathlib.Path(conf_path).mkdir(parents=True, exist_ok=True)
+    apply_plan.save()
+    memory_checkpoint("render and write")
+    run_metrics.mark_stage("render and write")
+    memory_profiler.stop()
+    memory_profiler.print_summary(console)
+
+    if generation_cache:
+        generation_cache.save()
+        logger.log("all").info(
+            f"Generation cache: {generation_cache.hits} configurations reused, {generation_cache.misses} rendered."
+        )
+    logger.log("all").info(
+        f"The apply plan for {len(apply_plan)} network devices was written to '{apply_plan.plan_path}'."
+    )
+    if not verbose:
+        run_report.print_summary(console)
+    if report_file:
+        run_report.write()
+        logger.log("all").info(f"The discovery report was written to '{report_file}'.")
+    circuit_breaker.print_summary(console)
+    circuit_breaker.save()
+    report_trace(trace_json)
 
-                for net_dev_host, net_dev_config in vra_generate_config.items():
-                    try:
-                        with open(f"{conf_path}{net_dev}.config", "w") as config_file_dest:
-                            for line in net_dev_config:
-                                config_file_dest.write(line)
-                    except OSError:
-                        logger.log("all").error(f"Failed creating {net_dev} file.")
-                    else:
-                        logger.log("all").info(
-                            f"{vra.vrf_name} [{vra.environment}] - configuration has been successfully written to 'generated_vra_configs/{vra.vrf_name}'."
-                        )
     end_time = datetime.now()
     print(f"Script execution time is {end_time - start_time}")
 
 
 @app.command()
+@export_run_metrics
 def apply(
     username: str = typer.Option(
         ...,
@@ -266,11 +637,96 @@ def apply(
         hide_input=True,
         help="Password for authentication",
     ),
+    trace: bool = typer.Option(
+        False,
+        "--trace",
+        help="Measure SSH operations and print p50/p95/max tables at the end",
+    ),
+    trace_json: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--trace-json",
+        dir_okay=False,
+        help="JSON file for the SSH operations trace (implies --trace)",
+    ),
+    metrics_file: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--metrics-file",
+        dir_okay=False,
+        help="OpenMetrics textfile for the run statistics (node-exporter textfile collector)",
+    ),
+    bastion: Optional[str] = typer.Option(
+        None,
+        "--bastion",
+        help="Jump host HOST[:PORT], all device sessions are multiplexed over one SSH connection to it",
+    ),
+    bastion_user: Optional[str] = typer.Option(
+        None,
+        "--bastion-user",
+        help="Username for the jump host (default: --username, key/agent or --password authentication)",
+    ),
+    bastion_known_hosts: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--bastion-known-hosts",
+        dir_okay=False,
+        help="known_hosts file with the jump host key (in addition to the system known_hosts)",
+    ),
+    bastion_accept_new_key: bool = typer.Option(
+        False,
+        "--bastion-accept-new-key",
+        help="Trust an unknown jump host key and save it to --bastion-known-hosts (rejected by default)",
+    ),
+    use_circuit_breaker: bool = typer.Option(
+        True,
+        "--circuit-breaker/--no-circuit-breaker",
+        help="TCP pre-check the devices and skip the ones which failed to connect",
+    ),
+    breaker_state: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--breaker-state",
+        dir_okay=False,
+        help="JSON file to keep the circuit breaker states across runs",
+    ),
+    verbose: bool = typer.Option(
+        False,
+        "--verbose",
+        help="Print the full per-device trees and tables instead of the aggregated counts",
+    ),
+    report_file: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--report",
+        dir_okay=False,
+        help="Text file for the per-device details (interfaces, IPv4 and STP tables)",
+    ),
 ):
     """Apply the VRA network configuration."""
 
+    from rich import box
+    from rich.progress import (
+        BarColumn,
+        Progress,
+        SpinnerColumn,
+        TaskProgressColumn,
+        TimeElapsedColumn,
+        TimeRemainingColumn,
+    )
+    from rich.table import Table
+
+    from Utils.NetErrorDetect import NetErrorDetect
+    from Utils.NetHelper import NetHelper
+    from Utils.SSHConnect import AuthenticationFailed, SSHConnect
+    from Utils.zlogger import zLogger
+
     start_time = datetime.now()
     logger = zLogger(username)
+    tracer.enabled = trace or trace_json is not None
+    bastion_tunnel = get_bastion(bastion, bastion_user, username, password, bastion_known_hosts, bastion_accept_new_key)
+    circuit_breaker.enabled = use_circuit_breaker
+    if breaker_state:
+        circuit_breaker.load(breaker_state)
+
+    # В компактном режиме построчные сообщения пишутся только в файл, на консоль выводятся итоги
+    detail_log_to = "all" if verbose else "file"
+    run_report = RunReport(report_file)
 
     progress_columns = (
         SpinnerColumn(),
@@ -285,65 +741,117 @@ def apply(
     # Словарь с установленными SSH-соединениями
     ssh_conn_dct = {}
 
-    for vra_name in os.scandir(CONFIG_DIR):
-        if vra_name.is_dir():
-            print()
-            console.rule(
-                f"[magenta][bold]{vra_name.name}[/magenta][/bold] - [yellow]Starting to apply the configuration[/yellow]",
-                style="dark_orange",
-            )
-            for vra_config in os.scandir(vra_name):
-                if vra_config.name.endswith(".config"):
-                    netdev_hostname = vra_config.name.strip(".config")
-                    netdev_config = vra_config.path
-                    number_of_commands = len(open(netdev_config).readlines())
-
-                    # Если SSH соединение уже установлено - перепрыгиваем на него.
-                    if ssh_conn_dct.get(netdev_hostname):
-                        ssh_conn = ssh_conn_dct.get(netdev_hostname)
-                        logger.log("all").info(
-                            f"SSH connection with {ssh_conn.host} [{ssh_conn.device_type}] intercepted from last SSH session."
-                        )
-                    # Если SSH соединение НЕ установлено - устанавливаем новое SSH-соединение.
-                    else:
-                        ssh = SSHConnect(netdev_hostname, username, password, log_to="all")
-                        ssh_conn = ssh.connect()
-                        ssh_conn_dct[netdev_hostname] = ssh_conn
-
-                    with open(netdev_config, "r", encoding="utf-8") as config_text:
-                        with Progress(*progress_columns) as progress_bar:
-                            progress_bar_task1 = progress_bar.add_task(
-                                f"Applying configuration to [green][bold]{ssh_conn.host}[/green][/bold]",
-                                total=number_of_commands,
-                            )
-                            for command in config_text:
-                                output = ssh_conn.send_config_set(
-                                    command.strip(),
-                                    exit_config_mode=False,
-                                    strip_prompt=True,
-                                )
-                                error_message = None
-
-                                if ssh_conn.device_type.startswith("cisco"):
-                                    error_message = NetErrorDetect.check_cisco_errors(command, output)
-                                elif ssh_conn.device_type.startswith("huawei"):
-                                    error_message = NetErrorDetect.check_huawei_errors(command, output)
-                                else:
-                                    logger.log("all").warning(
-                                        f"{netdev_hostname} - It is not possible to check the device output for errors. The OS is not supported."
-                                    )
-
-                                if error_message:
-                                    logger.log("all").error(
-                                        f"{ssh_conn.host} [{ssh_conn.device_type}] - {error_message}"
-                                    )
-                                progress_bar.update(progress_bar_task1, advance=1)
-                    print()
+    # План применения конфигурации, созданный командой create
+    try:
+        apply_plan = ApplyPlan.load(CONFIG_DIR)
+    except ExceptionApplyPlan as plan_error:
+        logger.log("all").error(plan_error.message)
+        exit()
+
+    run_metrics.set("devices", len(apply_plan))
+
+    # В компактном режиме один прогресс-бар на все устройства с редкой перерисовкой
+    push_progress = Progress(*progress_columns, refresh_per_second=COMPACT_REFRESH_PER_SECOND, disable=verbose)
+    push_task = push_progress.add_task(
+        "Applying configuration", total=sum(plan_device.lines for plan_device in apply_plan)
+    )
+
+    # Обходим устройства по плану: одна SSH-сессия и одна упорядоченная заливка на устройство
+    with push_progress:
+        for plan_device in apply_plan:
+            netdev_hostname = plan_device.device
+            if verbose:
+                print()
+                console.rule(
+                    f"[magenta][bold]{netdev_hostname}[/magenta][/bold] - [yellow]Starting to apply the configuration[/yellow]",
+                    style="dark_orange",
+                )
+
+            try:
+                ssh = SSHConnect(
+                    netdev_hostname,
+                    username,
+                    password,
+                    device_type=plan_device.device_type,
+                    log_to=detail_log_to,
+                    bastion=bastion_tunnel,
+                )
+                ssh_conn = ssh.connect()
+            except AuthenticationFailed as auth_error:
+                logger.log("all").error(f"{auth_error.message} The script is stopped.")
+                exit(1)
+            except HostUnreachable as unreachable:
+                logger.log("all").error(f"{netdev_hostname} - configuration is not applied. {unreachable.message}")
+                run_report.count("Push", "skipped devices")
+                push_progress.advance(push_task, plan_device.lines)
+                continue
+            ssh_conn_dct[netdev_hostname] = ssh_conn
+            run_report.count("Push", "devices")
+
+            error_classifier = NetErrorDetect.classifier(ssh_conn.device_type)
+            if error_classifier is None:
+                logger.log("all").warning(
+                    f"{netdev_hostname} - It is not possible to check the device output for errors. The OS is not supported."
+                )
+
+            # В подробном режиме у каждого устройства свой прогресс-бар
+            device_progress = Progress(*progress_columns) if verbose else contextlib.nullcontext(push_progress)
+            with device_progress as progress_bar:
+                if verbose:
+                    progress_bar_task1 = progress_bar.add_task(
+                        f"Applying configuration to [green][bold]{ssh_conn.host}[/green][/bold]",
+                        total=plan_device.lines,
+                    )
                 else:
-                    logger.log("all").error(
-                        f"The script found a incorrect file '{netdev_hostname}' in the {CONFIG_DIR}. The script is stopped."
+                    progress_bar_task1 = push_task
+                    progress_bar.update(
+                        push_task, description=f"Applying configuration to [green][bold]{ssh_conn.host}[/green][/bold]"
                     )
-                    exit()
+                for plan_block in plan_device.blocks:
+                    try:
+                        block_commands = apply_plan.read_block(plan_block)
+                    except ExceptionApplyPlan as plan_error:
+                        logger.log("all").error(f"{plan_error.message} The script is stopped.")
+                        exit()
+
+                    # Блок заливается одним пакетом, вывод проверяется на ошибки за один проход
+                    block_commands = [command.strip() for command in block_commands]
+                    with tracer.span(ssh_conn.host, "send_config_set", stage="config") as span:
+                        output = ssh_conn.send_config_set(
+                            block_commands,
+                            exit_config_mode=False,
+                            strip_prompt=True,
+                        )
+                        span.received(len(output))
+                    run_metrics.inc("commands_sent", len(block_commands))
+                    run_metrics.inc("bytes_pushed", sum(len(command.encode("utf-8")) for command in block_commands))
+                    run_metrics.inc("bytes_received", len(output))
+                    run_report.count("Push", "commands", len(block_commands))
+
+                    if error_classifier:
+                        for detected_error in error_classifier.classify(output, block_commands):
+                            error_log_msg = f"{ssh_conn.host} [{ssh_conn.device_type}] - {detected_error.message}"
+                            run_report.count("Push", f"{detected_error.severity}s")
+                            run_report.add_row(
+                                "Push errors",
+                                ("Device", "Severity", "Command", "Message"),
+                                (
+                                    ssh_conn.host,
+                                    detected_error.severity,
+                                    (detected_error.command or "").strip(),
+                                    detected_error.text,
+                                ),
+                            )
+                            if detected_error.severity == "error":
+                                run_metrics.inc("errors_detected")
+                                logger.log("all").error(error_log_msg)
+                            else:
+                                logger.log("all").warning(error_log_msg)
+                    progress_bar.update(progress_bar_task1, advance=len(block_commands))
+            if verbose:
+                print()
+
+    run_metrics.mark_stage("push")
 
     # Проверяем состояния IP-интерфейсов на TEST_DC_GATEWAY
     console.rule(f"Cheking IPv4 interfaces on {TEST_DC_GATEWAY}", style="bright_blue")
@@ -361,9 +869,9 @@ def apply(
         table.add_column(name, justify="left")
 
     # Если SSH соединение уже установлено - перепригиваем на него.
-    if ssh_conn_dct.get(TEST_DC_GATEWAY):
+    if ssh_conn_dct.get(TEST_DC_GATEWAY) and ssh_conn_dct[TEST_DC_GATEWAY].is_alive():
         ssh_conn = ssh_conn_dct.get(TEST_DC_GATEWAY)
-        logger.log("all").info(
+        logger.log(detail_log_to).info(
             f"SSH connection with {ssh_conn.host} [{ssh_conn.device_type}] intercepted from last SSH session."
         )
 
@@ -371,67 +879,57 @@ def apply(
         if ssh_conn.check_config_mode():
             ssh_conn.exit_config_mode()
 
-    # Если SSH соединение НЕ установлено - устанавливаем новое SSH-соединение.
+    # Если SSH соединение НЕ установлено (или разорвано) - устанавливаем новое SSH-соединение.
     else:
-        ssh = SSHConnect(TEST_DC_GATEWAY, username, password, log_to="all")
-        ssh_conn = ssh.connect()
-        ssh_conn_dct[TEST_DC_GATEWAY] = ssh_conn
-
-    net_cls_instance = NetHelper(ssh_conn, verbose=True)
-    ip_int_br_log_msg = "{} - Interface {} {} has '{}' status, protocol '{}'."
-
-    for vra_name in os.scandir(CONFIG_DIR):
-        vlan_id = vra_name.name.split("VRA")[1]
-        ipv4_intf_info = net_cls_instance.get_ip_interfaces_status(vlan_id)
-
-        for ipv4_intf_dict in ipv4_intf_info:
-            if ipv4_intf_dict.get("status") != "up" or ipv4_intf_dict.get("proto") != "up":
-                table.add_row(
-                    ipv4_intf_dict["intf"],
-                    ipv4_intf_dict["ipaddr"],
-                    ipv4_intf_dict["status"],
-                    ipv4_intf_dict["proto"],
-                    style="red",
-                )
-                logger.log("all").warning(
-                    ip_int_br_log_msg.format(
-                        ssh_conn.host,
-                        ipv4_intf_dict["intf"],
-                        ipv4_intf_dict["ipaddr"],
-                        ipv4_intf_dict["status"],
-                        ipv4_intf_dict["proto"],
-                    )
-                )
-            else:
-                table.add_row(
+        if ssh_conn_dct.get(TEST_DC_GATEWAY):
+            run_metrics.inc("reconnects")
+        try:
+            ssh = SSHConnect(TEST_DC_GATEWAY, username, password, log_to=detail_log_to, bastion=bastion_tunnel)
+            ssh_conn = ssh.connect()
+            ssh_conn_dct[TEST_DC_GATEWAY] = ssh_conn
+        except AuthenticationFailed as auth_error:
+            logger.log("all").error(f"{auth_error.message} The script is stopped.")
+            exit(1)
+        except HostUnreachable as unreachable:
+            logger.log("all").error(f"{TEST_DC_GATEWAY} - IPv4 interfaces check is skipped. {unreachable.message}")
+            ssh_conn = None
+
+    if ssh_conn is not None:
+        net_cls_instance = NetHelper(ssh_conn, verbose=verbose)
+        ip_int_br_log_msg = "{} - Interface {} {} has '{}' status, protocol '{}'."
+
+        for vlan_id in apply_plan.vlan_ids:
+            ipv4_intf_info = net_cls_instance.get_ip_interfaces_status(vlan_id)
+
+            for ipv4_intf_dict in ipv4_intf_info:
+                ipv4_intf_row = (
                     ipv4_intf_dict["intf"],
                     ipv4_intf_dict["ipaddr"],
                     ipv4_intf_dict["status"],
                     ipv4_intf_dict["proto"],
                 )
-                logger.log("all").info(
-                    ip_int_br_log_msg.format(
-                        ssh_conn.host,
-                        ipv4_intf_dict["intf"],
-                        ipv4_intf_dict["ipaddr"],
-                        ipv4_intf_dict["status"],
-                        ipv4_intf_dict["proto"],
-                    )
-                )
+                run_report.add_row("IPv4 interfaces", tuple(rich_ip_intf_status_table_headers), ipv4_intf_row)
+
+                if ipv4_intf_dict.get("status") != "up" or ipv4_intf_dict.get("proto") != "up":
+                    table.add_row(*ipv4_intf_row, style="red")
+                    run_report.count("IPv4 interfaces", "down")
+                    logger.log("all").warning(ip_int_br_log_msg.format(ssh_conn.host, *ipv4_intf_row))
+                else:
+                    table.add_row(*ipv4_intf_row)
+                    run_report.count("IPv4 interfaces", "up")
+                    logger.log(detail_log_to).info(ip_int_br_log_msg.format(ssh_conn.host, *ipv4_intf_row))
 
-    print(table)
+    if verbose:
+        print(table)
+    run_metrics.mark_stage("ipv4 check")
 
     # Проверяем состояние STP внововь раскатанных vlan
     stp_check_netdevs: set[str] = set()
-    vlan_set: set[str] = set()
-    for vra_name in os.scandir(CONFIG_DIR):
-        if vra_name.is_dir():
-            for vra_config in os.scandir(vra_name):
-                if vra_config.name.endswith(".config") and not TEST_DC_GATEWAY in vra_config.name:
-                    access_netdev_hostname = vra_config.name.strip(".config")
-                    vlan_id = vra_name.name.split("VRA")[1]
-                    stp_check_netdevs.add(access_netdev_hostname)
-                    vlan_set.add(vlan_id)
+    vlan_set: set[int] = set()
+    for plan_device in apply_plan:
+        if plan_device.device != TEST_DC_GATEWAY:
+            stp_check_netdevs.add(plan_device.device)
+            vlan_set.update(plan_block.vlan_id for plan_block in plan_device.blocks)
 
     rich_stp_table_headers = [
         "Interface",
@@ -445,28 +943,43 @@ def apply(
 
     for access_netdev_hostname in stp_check_netdevs:
         # Если SSH соединение уже установлено - перепригиваем на него.
-        if ssh_conn_dct.get(access_netdev_hostname):
+        if ssh_conn_dct.get(access_netdev_hostname) and ssh_conn_dct[access_netdev_hostname].is_alive():
             ssh_conn = ssh_conn_dct.get(access_netdev_hostname)
-            logger.log("all").info(
+            logger.log(detail_log_to).info(
                 f"SSH connection with {ssh_conn.host} [{ssh_conn.device_type}] intercepted from last SSH session."
             )
             # Если мы перехватили SSH-соединение, надо убедится что мы находимся не в режиме конфигурирования для дальнейших проверок.
             if ssh_conn.check_config_mode():
                 ssh_conn.exit_config_mode()
 
-        # Если SSH соединение НЕ установлено - устанавливаем новое SSH-соединение.
+        # Если SSH соединение НЕ установлено (или разорвано) - устанавливаем новое SSH-соединение.
         else:
-            ssh = SSHConnect(access_netdev_hostname, username, password, log_to="all")
-            ssh_conn = ssh.connect()
+            if ssh_conn_dct.get(access_netdev_hostname):
+                run_metrics.inc("reconnects")
+            try:
+                ssh = SSHConnect(
+                    access_netdev_hostname, username, password, log_to=detail_log_to, bastion=bastion_tunnel
+                )
+                ssh_conn = ssh.connect()
+            except AuthenticationFailed as auth_error:
+                logger.log("all").error(f"{auth_error.message} The script is stopped.")
+                exit(1)
+            except HostUnreachable as unreachable:
+                logger.log("all").error(f"{access_netdev_hostname} - STP check is skipped. {unreachable.message}")
+                continue
             ssh_conn_dct[access_netdev_hostname] = ssh_conn
 
         stp_intf_status = set()
         stp_intf_status.add("LRN")
         while "LRN" in stp_intf_status:
-            console.rule(f"[bold]{access_netdev_hostname} - Cheking STP state.[/bold]", style="bright_blue")
+            if verbose:
+                console.rule(f"[bold]{access_netdev_hostname} - Cheking STP state.[/bold]", style="bright_blue")
             stp_intf_status.clear()
+            # Количество интерфейсов по состояниям и строки отчета последней проверки
+            stp_status_counts = Counter()
+            stp_report_rows = []
 
-            net_cls_instance = NetHelper(ssh_conn, verbose=True)
+            net_cls_instance = NetHelper(ssh_conn, verbose=verbose)
             for vlan_id in vlan_set:
                 stp_info = net_cls_instance.get_stp_status(vlan_id)
 
@@ -483,6 +996,7 @@ def apply(
 
                 for stp_intf_dict in stp_info:
                     stp_intf_status.add(stp_intf_dict.get("status"))
+                    stp_status_counts[stp_intf_dict.get("status")] += 1
                     stp_log_msg = "{} - Interface {} vlan {} in {} state, role {}"
 
                     stp_table_row = (
@@ -494,6 +1008,7 @@ def apply(
                         stp_intf_dict["port_id"],
                         stp_intf_dict["type"],
                     )
+                    stp_report_rows.append((access_netdev_hostname, vlan_id, *stp_table_row))
 
                     if stp_intf_dict.get("status") == "BLK":
                         table.add_row(*stp_table_row, style="red")
@@ -530,23 +1045,166 @@ def apply(
                             )
                         )
 
-                print(table)
+                if verbose:
+                    print(table)
+            if not verbose:
+                console.print(
+                    f"{access_netdev_hostname} - STP: "
+                    + ", ".join(f"{status} {count}" for status, count in sorted(stp_status_counts.items()))
+                )
             if "LRN" in stp_intf_status:
+                stp_wait_start = time.perf_counter()
                 with console.status(
                     f"Waiting 15 seconds for the STP to converge and check...",
                     spinner="bouncingBall",
                 ):
                     for _ in range(16):
                         time.sleep(1)
+                run_metrics.inc("stp_wait_seconds", time.perf_counter() - stp_wait_start)
+
+        for status, count in stp_status_counts.items():
+            run_report.count("STP", status, count)
+        for stp_report_row in stp_report_rows:
+            run_report.add_row("STP", ("Device", "Vlan", *rich_stp_table_headers), stp_report_row)
+
+    run_metrics.mark_stage("stp check")
 
     for ssh_conn in ssh_conn_dct.values():
         if ssh_conn.is_alive():
             ssh_conn.disconnect()
-            logger.log("all").info(f"SSH connection with {ssh_conn.host} [{ssh_conn.device_type}] closed.")
+            logger.log(detail_log_to).info(f"SSH connection with {ssh_conn.host} [{ssh_conn.device_type}] closed.")
+
+    if not verbose:
+        run_report.print_summary(console)
+    if report_file:
+        run_report.write()
+        logger.log("all").info(f"The apply report was written to '{report_file}'.")
+    circuit_breaker.print_summary(console)
+    circuit_breaker.save()
+    report_trace(trace_json)
 
     end_time = datetime.now()
     print(f"Script execution time is {end_time - start_time}")
 
 
+@app.command()
+def serve(
+    username: str = typer.Option(
+        ...,
+        "-u",
+        "--username",
+        prompt="Enter username",
+        help="Username for authentication",
+    ),
+    password: str = typer.Option(
+        ...,
+        "-p",
+        "--password",
+        prompt="Enter password",
+        hide_input=True,
+        help="Password for authentication",
+    ),
+    host: str = typer.Option(
+        "127.0.0.1",
+        "--host",
+        help="Loopback address of the HTTP API (the requests need the token from .vra_cache/daemon.token)",
+    ),
+    port: int = typer.Option(
+        8765,
+        "--port",
+        min=0,
+        max=65535,
+        help="Port of the HTTP API",
+    ),
+    topology_ttl: float = typer.Option(
+        600.0,
+        "--topology-ttl",
+        min=0,
+        help="Seconds the discovered topology is reused by the create jobs",
+    ),
+    job_ttl: float = typer.Option(
+        3600.0,
+        "--job-ttl",
+        min=0,
+        help="Seconds a finished job and its events are kept by the daemon",
+    ),
+    max_jobs: int = typer.Option(
+        100,
+        "--max-jobs",
+        min=1,
+        help="Maximum number of finished jobs kept by the daemon",
+    ),
+    stp_all_vlans: bool = typer.Option(
+        False,
+        "--stp-all-vlans",
+        help="Check all VLANs of the scope with one 'show spanning-tree' per device instead of one random VLAN",
+    ),
+    bastion: Optional[str] = typer.Option(
+        None,
+        "--bastion",
+        help="Jump host HOST[:PORT], all device sessions are multiplexed over one SSH connection to it",
+    ),
+    bastion_user: Optional[str] = typer.Option(
+        None,
+        "--bastion-user",
+        help="Username for the jump host (default: --username, key/agent or --password authentication)",
+    ),
+    bastion_known_hosts: Optional[pathlib.Path] = typer.Option(
+        None,
+        "--bastion-known-hosts",
+        dir_okay=False,
+        help="known_hosts file with the jump host key (in addition to the system known_hosts)",
+    ),
+    bastion_accept_new_key: bool = typer.Option(
+        False,
+        "--bastion-accept-new-key",
+        help="Trust an unknown jump host key and save it to --bastion-known-hosts (rejected by default)",
+    ),
+    use_circuit_breaker: bool = typer.Option(
+        True,
+        "--circuit-breaker/--no-circuit-breaker",
+        help="TCP pre-check the devices and skip the ones which failed to connect",
+    ),
+):
+    """Run a local daemon executing create/apply/verify jobs with warm SSH sessions and topology."""
+
+    from Utils.SSHConnect import SSHConnect
+    from Utils.VraDaemon import DaemonError, VraDaemon
+    from Utils.zlogger import zLogger
+
+    logger = zLogger(username)
+    bastion_tunnel = get_bastion(bastion, bastion_user, username, password, bastion_known_hosts, bastion_accept_new_key)
+    circuit_breaker.enabled = use_circuit_breaker
+
+    try:
+        with open("VLANSCOPE.json") as f:
+            scope_vlan_id_l: list[int] = json.load(f).get(VLAN_SCOPE)
+    except FileNotFoundError:
+        logger.log("all").error("The 'VLANSCOPE.json' file was not found.")
+        exit()
+
+    vra_daemon = VraDaemon(
+        username,
+        password,
+        gateway=TEST_DC_GATEWAY,
+        scope_name=VLAN_SCOPE,
+        scope_vlan_ids=scope_vlan_id_l,
+        config_dir=CONFIG_DIR,
+        cache_dir=CACHE_DIR,
+        topology_ttl=topology_ttl,
+        stp_all_vlans=stp_all_vlans,
+        job_ttl=job_ttl,
+        max_jobs=max_jobs,
+        connect_factory=lambda netdev, device_type: SSHConnect(
+            netdev, username, password, device_type=device_type, bastion=bastion_tunnel
+        ),
+    )
+    try:
+        vra_daemon.serve_forever(host, port)
+    except DaemonError as daemon_error:
+        logger.log("all").error(daemon_error.message)
+        exit()
+
+
 if __name__ == "__main__":
     app()